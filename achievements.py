@@ -1,226 +1,105 @@
 # achievements.py
 
-from colorama import Fore, Style
-from rich.console import Console
-from rich.table import Table
+from functools import partial
 
-console = Console()
+from utils import console, Table
+from output import TERMINAL
+from rules import RESOURCE_SCALE, get_rules
+
+# Readers for the metrics achievement thresholds are compared against. Metrics of the
+# form "resource:<name>" and "building:<name>" read a single resource or building count.
+METRIC_READERS = {
+    "gather_count": lambda game: game.resources.get_gather_count(),
+    "building_types": lambda game: len(game.buildings.buildings),
+    "level": lambda game: game.player.level,
+    "population": lambda game: game.population.current_population,
+    "min_resource": lambda game: min(game.resources.resources.slots) / RESOURCE_SCALE,
+    "required_buildings": lambda game: sum(1 for building in game.buildings.rules.building_names if game.buildings.buildings.get(building, 0) >= 1),
+    "completed_missions": lambda game: game.missions.completed_count,
+}
+
+def read_resource(name, game):
+    # Straight from the fixed-point slot: metrics are only compared against thresholds
+    resources = game.resources.resources
+    return resources.slots[resources.index[name]] / RESOURCE_SCALE
+
+def read_building(name, game):
+    return game.buildings.buildings.get(name, 0)
+
+def metric_reader(metric):
+    # Resolves a metric name to a callable taking the game, once per metric
+    if metric in METRIC_READERS:
+        return METRIC_READERS[metric]
+    kind, _, name = metric.partition(":")
+    if kind == "resource":
+        return partial(read_resource, name)
+    if kind == "building":
+        return partial(read_building, name)
+    raise ValueError(f"Unknown achievement metric: {metric!r}")
 
 class AchievementManager:
-    def __init__(self):
+    def __init__(self, rules=None):
+        self.rules = rules or get_rules()
+        # Unlock state per achievement; everything else points at the shared rules tables
         self.achievements = {
-            "First Harvest": {
-                "unlocked": False,
-                "description": "Gather resources for the first time.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Energy",
-                    "value": 20,
-                    "turns": 3,
-                    "description": "Gain +20 Energy for the next 3 turns."
-                }
-            },
-            "First Building": {
-                "unlocked": False,
-                "description": "Construct your first building.",
-                "reward": {
-                    "type": "population",
-                    "value": 5,
-                    "turns": 2,
-                    "description": "Gain +5 Population for the next 2 turns."
-                }
-            },
-            "Level 3 Achieved": {  # New Achievement
-                "unlocked": False,
-                "description": "Reach level 3.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Light",
-                    "value": 30,
-                    "turns": 2,
-                    "description": "Gain +30 Light for the next 2 turns."
-                }
-            },
-            "Population Growth": {
-                "unlocked": False,
-                "description": "Reach a population of 50.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Light",
-                    "value": 50,
-                    "turns": 1,
-                    "description": "Gain +50 Light for the next turn."
-                }
-            },
-            "Resource Master": {
-                "unlocked": False,
-                "description": "Accumulate 500 of each resource.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Food",
-                    "value": 100,
-                    "turns": 2,
-                    "description": "Gain +100 Food for the next 2 turns."
-                }
-            },
-            "Master Builder": {
-                "unlocked": False,
-                "description": "Construct all types of buildings.",
-                "reward": {
-                    "type": "population",
-                    "value": 10,
-                    "turns": 3,
-                    "description": "Gain +10 Population for the next 3 turns."
-                }
-            },
-            "Technological Breakthrough": {
-                "unlocked": False,
-                "description": "Construct the Dimensional Gate.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Technology",
-                    "value": 50,
-                    "turns": 1,
-                    "description": "Gain +50 Technology for the next turn."
-                }
-            },
-            "Metal Tycoon": {
-                "unlocked": False,
-                "description": "Accumulate 300 Metal.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Metal",
-                    "value": 75,
-                    "turns": 2,
-                    "description": "Gain +75 Metal for the next 2 turns."
-                }
-            },
-            "Food Sovereign": {
-                "unlocked": False,
-                "description": "Accumulate 200 Food.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Food",
-                    "value": 50,
-                    "turns": 3,
-                    "description": "Gain +50 Food for the next 3 turns."
-                }
-            },
-            "Tech Guru": {
+            achievement["name"]: {
                 "unlocked": False,
-                "description": "Accumulate 100 Technology.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Technology",
-                    "value": 30,
-                    "turns": 4,
-                    "description": "Gain +30 Technology for the next 4 turns."
-                }
-            },
-            "Energy Overlord": {
-                "unlocked": False,
-                "description": "Accumulate 200 Energy.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Energy",
-                    "value": 100,
-                    "turns": 2,
-                    "description": "Gain +100 Energy for the next 2 turns."
-                }
-            },
-            "Mission Accomplished": {  # Achievement for completing missions
-                "unlocked": False,
-                "description": "Complete 3 missions.",
-                "reward": {
-                    "type": "population",
-                    "value": 15,
-                    "turns": 3,
-                    "description": "Gain +15 Population for the next 3 turns."
-                }
-            },
-            "Resource Hoarder": {  # Achievement for resource accumulation
-                "unlocked": False,
-                "description": "Accumulate 1000 Light.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Energy",
-                    "value": 50,
-                    "turns": 2,
-                    "description": "Gain +50 Energy for the next 2 turns."
-                }
-            },
-            "Technocrat": {  # Achievement for Technology accumulation
-                "unlocked": False,
-                "description": "Accumulate 200 Technology.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Technology",
-                    "value": 70,
-                    "turns": 3,
-                    "description": "Gain +70 Technology for the next 3 turns."
-                }
-            },
-            "Victory": {  # Updated condition
-                "unlocked": False,
-                "description": "Unlock all achievements and build the Dimensional Gate.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Technology",
-                    "value": 100,
-                    "turns": 5,
-                    "description": "Gain +100 Technology for the next 5 turns."
-                }
+                "description": achievement["description"],
+                "metric": achievement["metric"],
+                "threshold": achievement["threshold"],
+                "reward": achievement["reward"]
             }
+            for achievement in self.rules.achievements
         }
+        self.unlock_turns = {}  # Turn on which each achievement was unlocked
+        self.output = TERMINAL  # Replaced by the game's output bus in GameLoop
+        self.build_index()
 
-    def check_achievements(self, game):
-        # Iterate through achievements to check if any can be unlocked
+    def build_index(self):
+        # Locked thresholds per metric, sorted so a check only walks the ones just crossed
+        self.thresholds = {}
         for name, details in self.achievements.items():
-            if not details["unlocked"]:
-                if self.meets_conditions(name, game):
+            if details["metric"] != "victory" and not details["unlocked"]:
+                self.thresholds.setdefault(details["metric"], []).append((details["threshold"], name))
+        for entries in self.thresholds.values():
+            entries.sort(reverse=True)  # Lowest threshold at the end for cheap pops
+        self.readers = {metric: metric_reader(metric) for metric in self.thresholds}
+        self.gate_reader = metric_reader("building:Dimensional Gate")
+        self.last_values = {}
+        self.unlocked_count = sum(1 for details in self.achievements.values() if details["unlocked"])
+
+    def check_achievements(self, game):
+        # Only metrics whose value changed since the last check are compared to their thresholds
+        for metric in list(self.thresholds):
+            value = self.readers[metric](game)
+            if self.last_values.get(metric) == value:
+                continue
+            self.last_values[metric] = value
+            entries = self.thresholds[metric]
+            while entries and entries[-1][0] <= value:
+                name = entries.pop()[1]
+                if not self.achievements[name]["unlocked"]:
                     self.unlock_achievement(name, game)
+            if not entries:
+                del self.thresholds[metric]
+                del self.last_values[metric]
+        if not self.achievements["Victory"]["unlocked"] and self.meets_conditions("Victory", game):
+            self.unlock_achievement("Victory", game)
 
     def meets_conditions(self, name, game):
-        if name == "First Harvest":
-            return game.resources.get_gather_count() >= 1
-        elif name == "First Building":
-            return len(game.buildings.buildings) >= 1
-        elif name == "Level 3 Achieved":
-            return game.player.level >= 3
-        elif name == "Population Growth":
-            return game.population.current_population >= 50
-        elif name == "Resource Master":
-            return all(amount >= 500 for amount in game.resources.resources.values())
-        elif name == "Master Builder":
-            required_buildings = ["Land Formation", "Settlement", "Farm", "Metal Mine", "Technology Lab", "Dimensional Gate"]
-            return all(game.buildings.buildings.get(building, 0) >= 1 for building in required_buildings)
-        elif name == "Technological Breakthrough":
-            return "Dimensional Gate" in game.buildings.buildings and game.buildings.buildings["Dimensional Gate"] >= 1
-        elif name == "Metal Tycoon":
-            return game.resources.resources.get("Metal", 0) >= 300
-        elif name == "Food Sovereign":
-            return game.resources.resources.get("Food", 0) >= 200
-        elif name == "Tech Guru":
-            return game.resources.resources.get("Technology", 0) >= 100
-        elif name == "Energy Overlord":
-            return game.resources.resources.get("Energy", 0) >= 200
-        elif name == "Mission Accomplished":
-            completed_missions = len([m for m in game.missions if m['completed']])
-            return completed_missions >= 3  # Change from 5 to 3
-        elif name == "Resource Hoarder":
-            return game.resources.resources.get("Light", 0) >= 1000
-        elif name == "Technocrat":
-            return game.resources.resources.get("Technology", 0) >= 200
-        elif name == "Victory":
+        details = self.achievements[name]
+        if details["metric"] == "victory":
             # Victory condition: All achievements except "Victory" are unlocked and Dimensional Gate is built
-            all_unlocked = all(details["unlocked"] for ach, details in self.achievements.items() if ach != "Victory")
-            dim_gate_built = "Dimensional Gate" in game.buildings.buildings and game.buildings.buildings["Dimensional Gate"] >= 1
-            return all_unlocked and dim_gate_built
-        return False
+            all_unlocked = self.unlocked_count >= len(self.achievements) - 1
+            return all_unlocked and self.gate_reader(game) >= 1
+        return metric_reader(details["metric"])(game) >= details["threshold"]
 
     def unlock_achievement(self, name, game):
         self.achievements[name]["unlocked"] = True
-        console.print(f"\n[bold yellow]🎖️ Achievement Unlocked: {name}! {self.achievements[name]['description']}[/bold yellow]")
+        self.unlock_turns[name] = game.turn
+        self.unlocked_count += 1
+        if self.output.enabled:
+            self.output.emit("achievement_unlocked", name=name, description=self.achievements[name]["description"])
         self.apply_reward(name, game)
 
     def apply_reward(self, name, game):
@@ -258,3 +137,16 @@ class AchievementManager:
             achievements_table.add_row(f"{emoji} {name}", status, details['description'])
         console.print(achievements_table)
         console.print("[bold yellow]====================[/bold yellow]\n")
+
+    def to_dict(self):
+        return {
+            "unlocked": [name for name, details in self.achievements.items() if details["unlocked"]],
+            "unlock_turns": self.unlock_turns.copy()
+        }
+
+    def from_dict(self, data):
+        unlocked = set(data["unlocked"])
+        for name, details in self.achievements.items():
+            details["unlocked"] = name in unlocked
+        self.unlock_turns = dict(data["unlock_turns"])
+        self.build_index()
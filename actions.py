@@ -0,0 +1,43 @@
+# actions.py
+
+from collections import namedtuple
+
+# Action kinds understood by GameLoop.apply_action
+GATHER = "gather"
+BUILD = "build"
+UPGRADE_POPULATION = "upgrade_population"
+ACCEPT_MISSION = "accept_mission"
+UPGRADE_BUILDING = "upgrade_building"
+USE_PORTAL = "use_portal"
+QUIT = "quit"
+WAIT = "wait"  # Skip the action phase (viewing menus, invalid input)
+
+ACTION_KINDS = (GATHER, BUILD, UPGRADE_POPULATION, ACCEPT_MISSION, UPGRADE_BUILDING, USE_PORTAL, QUIT, WAIT)
+
+# A single player decision for one turn; target names the building or mission, and count
+# repeats a build or building upgrade as one batch
+Action = namedtuple("Action", ["kind", "target", "count"], defaults=[None, 1])
+
+def gather():
+    return Action(GATHER)
+
+def build(building_name, count=1):
+    return Action(BUILD, building_name, count)
+
+def upgrade_population():
+    return Action(UPGRADE_POPULATION)
+
+def accept_mission(mission_name):
+    return Action(ACCEPT_MISSION, mission_name)
+
+def upgrade_building(building_name, count=1):
+    return Action(UPGRADE_BUILDING, building_name, count)
+
+def use_portal():
+    return Action(USE_PORTAL)
+
+def quit_game():
+    return Action(QUIT)
+
+def wait():
+    return Action(WAIT)
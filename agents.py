@@ -1,12 +1,11 @@
 # agents.py
 
 import random
-from rich.console import Console
 
-console = Console()
+from output import TERMINAL
 
 class AdvisingAgent:
-    def __init__(self):
+    def __init__(self, planning=True, budget=0.05):
         self.introductory_messages = [
             "Welcome, {name}. Your journey begins in the void.",
             "Establish Light and Land to start creating your civilization.",
@@ -37,21 +36,54 @@ class AdvisingAgent:
         ]
         self.current_intro_message = 0
         self.player_name = "Leader"
+        self.rng = random  # Replaced by the game's advisor stream in GameLoop
+        self.output = TERMINAL  # Replaced by the game's output bus in GameLoop
+        self.planning = planning  # Tips come from a search over the game when a game is given
+        self.budget = budget  # Seconds of search per tip
+        self.planner = None  # Built on first use from the game's rules
 
     def set_player_name(self, name):
         self.player_name = name
 
     def introduce(self):
-        console.print("\n[bold magenta][Advising Agent] Greetings, Leader of the Civilization.[/bold magenta]")
+        if self.output.enabled:
+            self.output.emit("advisor_greeting")
         self.provide_introductory_message()
 
     def provide_introductory_message(self):
         if self.current_intro_message < len(self.introductory_messages):
             message = self.introductory_messages[self.current_intro_message].format(name=self.player_name)
-            console.print(f"[bold magenta][Advising Agent]: {message}[/bold magenta]")
+            if self.output.enabled:
+                self.output.emit("advisor_intro", message=message)
             self.current_intro_message += 1
 
-    def provide_tip(self):
-        # Randomly select a tip from tip_messages
-        tip = random.choice(self.tip_messages)
-        console.print(f"[bold green][Advising Agent]: {tip}[/bold green]")
+    def provide_tip(self, game=None):
+        # Recommend a concrete action when a plan is available, otherwise a random general tip
+        if self.planning and game is not None:
+            recommendation = self.recommend(game)
+            if recommendation is not None:
+                if self.output.enabled:
+                    from planner import describe
+                    self.output.emit("advisor_plan", action=describe(recommendation.action),
+                                     expected_turns=round(recommendation.expected_turns), horizon=self.planner.horizon)
+                return recommendation
+        tip = self.rng.choice(self.tip_messages)
+        if self.output.enabled:
+            self.output.emit("advisor_tip", message=tip)
+
+    def recommend(self, game):
+        # Best action for this turn within the time budget; the search tree carries over between turns
+        if self.planner is None:
+            from planner import Planner
+            self.planner = Planner(game.rules, self.budget)
+        return self.planner.advise(game, self.rng)
+
+    def to_dict(self):
+        return {
+            "player_name": self.player_name,
+            "current_intro_message": self.current_intro_message
+        }
+
+    def from_dict(self, data):
+        self.player_name = data["player_name"]
+        self.current_intro_message = data["current_intro_message"]
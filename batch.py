@@ -0,0 +1,306 @@
+# batch.py
+
+import numpy as np
+
+from rules import get_rules
+from events import EventSampler
+
+# Outcome codes stored per game
+RUNNING = 0
+VICTORY = 1
+DEPLETED = 2
+
+class BatchSimulation:
+    def __init__(self, n_games, seed=None, rules=None):
+        self.n = n_games
+        self.rng = np.random.default_rng(seed)
+        self.turn = 1
+        self.rules = rules = rules or get_rules()
+
+        # Static tables from the compiled rules; column population_column is used for population targets
+        self.resource_names = rules.resource_names
+        self.resource_index = rules.resource_index
+        self.population_column = len(self.resource_names)
+        self.building_names = rules.building_names
+        self.building_index = rules.building_index
+        self.building_costs = np.array([b["cost_vector"] for b in rules.buildings], dtype=float)
+        self.building_effects = np.array([rules.vector(b["effects"]) for b in rules.buildings], dtype=float)
+        self.upgradable = np.array([bool(b["upgrade_cost"]) for b in rules.buildings])
+        self.upgrade_costs = np.array([b["upgrade_cost_vector"] for b in rules.buildings], dtype=float)
+        self.base_rates = np.array(rules.vector(rules.generation), dtype=float)
+        self.truncated = np.array([name in rules.truncated for name in self.resource_names])
+        self.truncated_rates = np.where(self.truncated, self.base_rates, 0)
+        self.base_rates[self.truncated] = 0
+        self.gather_ranges = [(self.resource_index[name], low, high) for name, (low, high) in rules.gather_ranges.items()]
+        self.population_upgrade_cost = np.array(rules.vector(rules.population["upgrade_cost"]), dtype=float)
+        self.experience_rewards = rules.experience
+
+        self.event_names = tuple(e["name"] for e in rules.events)
+        self.event_chances = np.array([e["chance"] for e in rules.events])
+        self.event_effects = [[self.effect_entry(effect) for effect in e["effects"]] for e in rules.events]
+        self.event_sampler = EventSampler(self.event_chances.tolist())
+
+        self.achievement_names = rules.achievement_names
+        self.achievement_index = {name: idx for idx, name in enumerate(self.achievement_names)}
+
+        self.mission_names = tuple(m["name"] for m in rules.missions)
+        self.mission_resource_req = np.array([rules.vector(m["requirements"]["resources"]) for m in rules.missions], dtype=float)
+        self.mission_building_req = np.array([[m["requirements"]["buildings"].get(name, 0) for name in self.building_names]
+                                              for m in rules.missions])
+        self.mission_duration = np.array([m["duration"] for m in rules.missions])
+
+        # One buff slot per reward source: achievements first, then missions
+        rewards = [a["reward"] for a in rules.achievements] + [m["reward"] for m in rules.missions]
+        self.buff_values = np.array([r["value"] for r in rewards], dtype=float)
+        self.buff_durations = np.array([r["turns"] for r in rewards])
+        self.buff_targets = np.zeros((len(rewards), self.population_column + 1))
+        self.buff_targets[np.arange(len(rewards)), [self.reward_target(r) for r in rewards]] = 1
+        self.mission_slot_offset = len(self.achievement_names)
+
+        # Per-game state, struct of arrays
+        self.resources = np.tile(np.array(rules.vector(rules.start_resources), dtype=float), (n_games, 1))
+        self.population = np.full(n_games, rules.population["start"], dtype=np.int64)
+        self.max_population = np.full(n_games, rules.population["max"], dtype=np.int64)
+        self.accumulated_growth = np.zeros(n_games)
+        self.buildings = np.zeros((n_games, len(self.building_names)), dtype=np.int64)
+        self.gather_count = np.zeros(n_games, dtype=np.int64)
+        self.level = np.ones(n_games, dtype=np.int64)
+        self.experience = np.zeros(n_games, dtype=np.int64)
+        self.unlocked = np.zeros((n_games, len(self.achievement_names)), dtype=bool)
+        self.unlock_turn = np.zeros((n_games, len(self.achievement_names)), dtype=np.int64)
+        self.buff_turns = np.zeros((n_games, len(rewards)), dtype=np.int64)
+        self.mission_active = np.zeros((n_games, len(self.mission_names)), dtype=bool)
+        self.mission_completed = np.zeros((n_games, len(self.mission_names)), dtype=bool)
+        self.mission_turns = np.zeros((n_games, len(self.mission_names)), dtype=np.int64)
+        self.outcome = np.full(n_games, RUNNING, dtype=np.int8)
+        self.end_turn = np.zeros(n_games, dtype=np.int64)
+
+    def effect_entry(self, effect):
+        if effect["type"] == "add":
+            return ("add", np.array(self.rules.vector(effect["resources"]), dtype=float))
+        if effect["type"] == "modify":
+            return ("modify", np.array(self.rules.vector({effect["resource"]: effect["amount"]}), dtype=float))
+        return ("population", effect["amount"])
+
+    def reward_target(self, reward):
+        if reward["type"] == "population":
+            return self.population_column
+        return self.resource_index[reward["resource"]]
+
+    @property
+    def alive(self):
+        return self.outcome == RUNNING
+
+    def _mask(self, mask):
+        return self.alive if mask is None else (mask & self.alive)
+
+    # --- Player actions, applied to every game selected by mask ---
+
+    def gather(self, mask=None):
+        mask = self._mask(mask)
+        count = int(mask.sum())
+        for idx, low, high in self.gather_ranges:
+            self.resources[mask, idx] += self.rng.integers(low, high + 1, size=count)
+        self.gather_count[mask] += 1
+        self.gain_experience(self.experience_rewards["gather"], mask)
+        return mask
+
+    def build(self, building_name, mask=None):
+        idx = self.building_index[building_name]
+        mask = self._mask(mask) & self.can_afford(self.building_costs[idx])
+        self.resources[mask] -= self.building_costs[idx]
+        self.buildings[mask, idx] += 1
+        self.gain_experience(self.experience_rewards["build"], mask)
+        self.check_achievements()
+        return mask
+
+    def upgrade_population(self, mask=None):
+        mask = self._mask(mask) & self.can_afford(self.population_upgrade_cost)
+        self.resources[mask] -= self.population_upgrade_cost
+        self.max_population[mask] += self.rules.population["capacity_step"]
+        self.gain_experience(self.experience_rewards["upgrade_population"], mask)
+        return mask
+
+    def upgrade_building(self, building_name, mask=None):
+        idx = self.building_index[building_name]
+        if not self.upgradable[idx]:
+            return np.zeros(self.n, dtype=bool)
+        mask = self._mask(mask) & (self.buildings[:, idx] > 0) & self.can_afford(self.upgrade_costs[idx])
+        self.resources[mask] -= self.upgrade_costs[idx]
+        self.buildings[mask, idx] += 1
+        self.gain_experience(self.experience_rewards["upgrade_building"], mask)
+        return mask
+
+    def accept_mission(self, mission_name, mask=None):
+        idx = self.mission_names.index(mission_name)
+        mask = self._mask(mask) & self.mission_available()[:, idx]
+        self.mission_active[mask, idx] = True
+        self.mission_turns[mask, idx] = self.mission_duration[idx]
+        return mask
+
+    def use_portal(self, mask=None):
+        mask = self._mask(mask) & self.unlocked[:, self.achievement_index["Victory"]]
+        self.outcome[mask] = VICTORY
+        self.end_turn[mask] = self.turn
+        return mask
+
+    def can_afford(self, cost):
+        return (self.resources >= cost).all(axis=1)
+
+    def mission_available(self):
+        requirements = ((self.resources[:, None, :] >= self.mission_resource_req).all(axis=2)
+                        & (self.buildings[:, None, :] >= self.mission_building_req).all(axis=2))
+        return requirements & ~self.mission_active & ~self.mission_completed
+
+    def gain_experience(self, amount, mask):
+        self.experience[mask] += amount
+        leveling = self.experience >= self.level * 100
+        while leveling.any():
+            self.level[leveling] += 1
+            self.experience[leveling] -= (self.level[leveling] - 1) * 100
+            leveling = self.experience >= self.level * 100
+
+    # --- End-of-turn phases, in GameLoop.resolve_turn order ---
+
+    def step(self):
+        alive = self.alive
+        self.generate_automatic_resources(alive)
+        self.grow(alive)
+        self.apply_active_buffs(alive)
+        self.trigger_events(alive)
+        self.check_achievements()
+        self.check_end_conditions()
+        self.manage_missions(self.alive)
+        self.turn += 1
+
+    def generate_automatic_resources(self, alive):
+        population = self.population[alive]
+        income = self.buildings[alive] @ self.building_effects + np.outer(population, self.base_rates)
+        income += np.trunc(np.outer(population, self.truncated_rates))
+        self.resources[alive] += income
+
+    def grow(self, alive):
+        population = self.population[alive]
+        max_population = self.max_population[alive]
+        accumulated = self.accumulated_growth[alive] + population * self.rules.population["growth_rate"]
+        new_members = np.trunc(accumulated).astype(np.int64)
+        growing = new_members >= 1
+        clamped = growing & (population + new_members > max_population)
+        new_members = np.where(clamped, max_population - population, new_members)
+        population = np.where(clamped, max_population, np.where(growing, population + new_members, population))
+        accumulated = np.where(growing, accumulated - new_members, accumulated)
+        self.population[alive] = population
+        self.accumulated_growth[alive] = accumulated
+
+    def apply_active_buffs(self, alive):
+        active = (self.buff_turns > 0) & alive[:, None]
+        if not active.any():
+            return
+        deltas = (active * self.buff_values) @ self.buff_targets
+        touched = (active.astype(float) @ self.buff_targets) > 0
+        resources = self.resources + deltas[:, :self.population_column]
+        # modify_resource clamps at zero, but only for resources a buff touched
+        self.resources = np.where(touched[:, :self.population_column], np.maximum(resources, 0), resources)
+        self.population += deltas[:, self.population_column].astype(np.int64)
+        self.buff_turns[active] -= 1
+
+    def trigger_events(self, alive):
+        games, events = self.event_sampler.sample_batch(self.n, self.rng)
+        fired = np.zeros((self.n, len(self.event_chances)), dtype=bool)
+        fired[games, events] = True
+        self.apply_events(fired & alive[:, None])
+
+    def apply_events(self, fired):
+        # Effects run in catalog order so clamping matches the scalar EventManager
+        for idx, effects in enumerate(self.event_effects):
+            rows = fired[:, idx]
+            if not rows.any():
+                continue
+            for kind, value in effects:
+                if kind == "add":
+                    self.resources[rows] += value
+                elif kind == "modify":
+                    changed = value != 0
+                    updated = self.resources[rows] + value
+                    updated[:, changed] = np.maximum(updated[:, changed], 0)
+                    self.resources[rows] = updated
+                else:
+                    self.population[rows] = np.minimum(self.population[rows] + value, self.max_population[rows])
+
+    def metric(self, metric):
+        # Vectorized counterpart of achievements.METRIC_READERS
+        if metric == "gather_count":
+            return self.gather_count
+        if metric == "building_types":
+            return (self.buildings > 0).sum(axis=1)
+        if metric == "level":
+            return self.level
+        if metric == "population":
+            return self.population
+        if metric == "min_resource":
+            return self.resources.min(axis=1)
+        if metric == "required_buildings":
+            return (self.buildings >= 1).sum(axis=1)
+        if metric == "completed_missions":
+            return self.mission_completed.sum(axis=1)
+        kind, _, name = metric.partition(":")
+        if kind == "resource":
+            return self.resources[:, self.resource_index[name]]
+        if kind == "building":
+            return self.buildings[:, self.building_index[name]]
+        raise ValueError(f"Unknown achievement metric: {metric!r}")
+
+    def check_achievements(self):
+        alive = self.alive
+        victory = self.achievement_index["Victory"]
+        for achievement in self.rules.achievements:
+            if achievement["index"] != victory:
+                met = self.metric(achievement["metric"]) >= achievement["threshold"]
+                self.unlock(achievement["index"], met & alive)
+        others = np.arange(len(self.achievement_names)) != victory
+        gate = self.metric("building:Dimensional Gate") >= 1
+        self.unlock(victory, self.unlocked[:, others].all(axis=1) & gate & alive)
+
+    def unlock(self, idx, met):
+        newly = met & ~self.unlocked[:, idx]
+        self.unlocked[newly, idx] = True
+        self.unlock_turn[newly, idx] = self.turn
+        self.buff_turns[newly, idx] = self.buff_durations[idx]
+
+    def check_end_conditions(self):
+        victory = self.unlocked[:, self.achievement_index["Victory"]]
+        depleted = ((self.resources[:, self.resource_index["Light"]] <= 0)
+                    | (self.resources[:, self.resource_index["Water"]] <= 0)) & ~victory & self.alive
+        self.outcome[depleted] = DEPLETED
+        self.end_turn[depleted] = self.turn
+
+    def manage_missions(self, alive):
+        active = self.mission_active & alive[:, None]
+        if not active.any():
+            return
+        met = ((self.resources[:, None, :] >= self.mission_resource_req).all(axis=2)
+               & (self.buildings[:, None, :] >= self.mission_building_req).all(axis=2))
+        # Missions complete one at a time in catalog order, each followed by an achievement check
+        for idx in range(len(self.mission_names)):
+            completing = active[:, idx] & met[:, idx]
+            if completing.any():
+                self.mission_active[completing, idx] = False
+                self.mission_completed[completing, idx] = True
+                self.buff_turns[completing, self.mission_slot_offset + idx] = self.buff_durations[self.mission_slot_offset + idx]
+                self.check_achievements()
+        self.mission_turns[active] -= 1
+        failed = active & self.mission_active & (self.mission_turns <= 0)
+        self.mission_active[failed] = False
+
+    def summary(self):
+        # Aggregate statistics used to compare against scalar runs
+        return {
+            "turn": self.turn,
+            "games": self.n,
+            "running": int((self.outcome == RUNNING).sum()),
+            "victories": int((self.outcome == VICTORY).sum()),
+            "depleted": int((self.outcome == DEPLETED).sum()),
+            "mean_resources": dict(zip(self.resource_names, self.resources.mean(axis=0).round(3).tolist())),
+            "mean_population": float(self.population.mean()),
+            "achievement_rates": dict(zip(self.achievement_names, self.unlocked.mean(axis=0).round(4).tolist())),
+        }
@@ -0,0 +1,398 @@
+# bench.py
+
+import argparse
+import compileall
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+import types
+from datetime import datetime, timezone
+
+from rich.table import Table
+
+import output
+from main import create_game
+from policies import make_policy
+from rules import RULES_PATH, compile_rules, get_rules
+from utils import console
+
+HISTORY_PATH = "bench_history.jsonl"
+REGRESSION_THRESHOLD = 0.10  # Relative slowdown flagged by `compare`
+LONG = 10 ** 6  # Turns: bench buffs and missions outlast any run
+
+# Extra state layered onto a game after its opening turns: count of every building type
+# except the Gate, active buffs, and open synthetic missions that never complete
+SIZES = {
+    "small": {"buildings": 0, "buffs": 0, "missions": 0},
+    "medium": {"buildings": 10, "buffs": 50, "missions": 50},
+    "huge": {"buildings": 500, "buffs": 5000, "missions": 2000},
+}
+OPENING_TURNS = 10
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Time a fresh interpreter takes to the end of its first simulated turn, above what a bare
+# interpreter takes to start and exit; the difference is our own import and setup work
+STARTUP_TARGET_MS = 25.0
+UI_MODULES = ("rich", "colorama", "tqdm")  # Must stay unimported on headless paths
+HEADLESS_ENTRY_POINTS = ("main", "tournament", "server", "journal", "planner")
+
+# Run in a fresh interpreter: imports an entry point, plays one headless turn and prints the
+# UI modules that got loaded along the way
+STARTUP_SCRIPT = '''
+import sys
+import {module}
+from main import create_game
+from policies import make_policy
+game = create_game(headless=True, seed=1)
+game.play_turn(make_policy("gather").choose(game))
+print(",".join(sorted({{name.split(".")[0] for name in sys.modules}} & set({ui}))))
+'''
+
+_bench_rules = {}
+
+def bench_rules(missions):
+    # Default rules plus `missions` synthetic missions with out-of-reach requirements, spread
+    # over every resource so each watched metric holds many conditions
+    if not missions:
+        return get_rules()
+    if missions in _bench_rules:
+        return _bench_rules[missions]
+    with open(RULES_PATH, encoding="utf-8") as handle:
+        data = json.load(handle)
+    names = [resource["name"] for resource in data["resources"]]
+    template = data["missions"][0]
+    for idx in range(missions):
+        data["missions"].append(dict(
+            template, name=f"Bench Mission {idx}", description="Benchmark mission.",
+            requirements={"resources": {names[idx % len(names)]: 10 ** 9 + idx}, "buildings": {}}))
+    rules = _bench_rules[missions] = compile_rules(data)
+    return rules
+
+def make_state(size, seed=1):
+    # Headless game at the given state size, after a few scripted opening turns
+    spec = SIZES[size]
+    rules = bench_rules(spec["missions"])
+    game = create_game(headless=True, seed=seed, rules=rules)
+    policy = make_policy("victory")
+    for _ in range(OPENING_TURNS):
+        game.play_turn(policy.choose(game))
+    if spec["buildings"]:
+        for name in rules.building_names:
+            if name != "Dimensional Gate":
+                game.buildings.buildings[name] = spec["buildings"]
+        game.resources.invalidate_production()
+    for idx in range(spec["buffs"]):
+        resource = rules.resource_names[idx % len(rules.resource_names)]
+        game.add_buff(f"Bench Buff {idx}", "resource", "Benchmark buff.", 1, LONG, resource)
+    for details in rules.missions[len(rules.missions) - spec["missions"]:] if spec["missions"] else ():
+        game.missions.add(details, LONG, game)
+    return game
+
+def time_call(function, repeat):
+    # Best per-call time in microseconds over `repeat` auto-sized batches
+    timer = timeit.Timer(function)
+    number, taken = timer.autorange()
+    if number == 1 and taken > 1.0:
+        return taken * 1e6  # A single call over a second is measured once
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+def render_status(game):
+    # display_status into the null device, so only rendering is measured
+    saved = console.file
+    with open(os.devnull, "w", encoding="utf-8") as sink:
+        console.file = sink
+        try:
+            return time_call(game.display_status, 3)
+        finally:
+            console.file = saved
+
+def calibration():
+    # Fixed pure-Python workload; its time tracks the machine's speed, so `compare --normalize`
+    # can factor out runs on a slower or busier machine
+    total = 0
+    for idx in range(10000):
+        total += idx * idx % 7
+    return total
+
+# Microbenchmarks: one end-of-turn phase called repeatedly on a prepared state
+MICRO = {
+    "generate_automatic_resources": lambda game: lambda: game.resources.generate_automatic_resources(game.population, game.buildings),
+    "population_grow": lambda game: game.population.grow,
+    "trigger_event": lambda game: lambda: game.event_manager.trigger_event(game),
+    "check_achievements": lambda game: lambda: game.achievements.check_achievements(game),
+    "apply_active_buffs": lambda game: game.apply_active_buffs,
+    "manage_missions": lambda game: game.manage_missions,
+}
+
+def turns_per_second(size, turns):
+    # Victory-policy turns from the size's state; finished games restart from the snapshot
+    game = make_state(size)
+    snapshot = game.to_dict()
+    policy = make_policy("victory")
+    elapsed = 0.0
+    for _ in range(turns):
+        if game.game_over:
+            game.from_dict(snapshot)
+        start = time.perf_counter()
+        game.play_turn(policy.choose(game))
+        elapsed += time.perf_counter() - start
+    return turns / elapsed
+
+def game_to_victory(size, games, max_turns=1000):
+    # Milliseconds per complete game, from the size's state to the portal, after one
+    # untimed warm-up game
+    total = 0.0
+    game = make_state(size, games)
+    policy = make_policy("victory")
+    while not game.game_over and game.turn <= max_turns:
+        game.play_turn(policy.choose(game))
+    for seed in range(games):
+        game = make_state(size, seed)
+        policy = make_policy("victory")
+        start = time.perf_counter()
+        while not game.game_over and game.turn <= max_turns:
+            game.play_turn(policy.choose(game))
+        total += time.perf_counter() - start
+    return total / games * 1e3
+
+# Code objects every game shares; footprints never count them or look inside them
+CODE_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType)
+
+def reachable_bytes(root, seen):
+    # sys.getsizeof total of the objects reachable from root that are not in `seen` (object
+    # ids), which collects the ones visited
+    total = 0
+    stack = [root]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, CODE_TYPES):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, types.MethodType):
+            stack.append(obj.__self__)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(vars(obj))
+            for cls in type(obj).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    if hasattr(obj, name):
+                        stack.append(getattr(obj, name))
+    return total
+
+def game_footprint(game, root=None):
+    # Bytes held by one game, or by `root` within it, beyond what every game shares: the
+    # compiled rules and the terminal output bus are not counted
+    seen = set()
+    reachable_bytes(game.rules, seen)
+    reachable_bytes(output.TERMINAL, seen)
+    return reachable_bytes(game if root is None else root, seen)
+
+def resources_footprint(game):
+    return game_footprint(game, game.resources.resources)
+
+def startup_script(module="main"):
+    return STARTUP_SCRIPT.format(module=module, ui=UI_MODULES)
+
+def run_fresh(script):
+    # Wall time in ms of a new interpreter running `script`, and what it printed
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+    return (time.perf_counter() - start) * 1e3, result.stdout.strip()
+
+def startup_time(repeat):
+    # Best of `repeat` cold starts. Bytecode is compiled first, so a stale cache (or
+    # PYTHONDONTWRITEBYTECODE) does not count as startup time.
+    compileall.compile_dir(ROOT, quiet=1, maxlevels=0)
+    return min(run_fresh(startup_script())[0] for _ in range(repeat))
+
+def ui_imports():
+    # {entry point: UI modules it loaded} for every headless entry point that loads any
+    loaded = {}
+    for module in HEADLESS_ENTRY_POINTS:
+        names = run_fresh(startup_script(module))[1]
+        if names:
+            loaded[module] = names
+    return loaded
+
+def startup_overhead(repeat):
+    # (best startup, best bare interpreter) in ms. The two are timed alternately, so a
+    # machine that slows down part way through slows both.
+    compileall.compile_dir(ROOT, quiet=1, maxlevels=0)
+    script = startup_script()
+    elapsed = bare = float("inf")
+    for _ in range(repeat):
+        elapsed = min(elapsed, run_fresh(script)[0])
+        bare = min(bare, run_fresh("pass")[0])
+    return elapsed, bare
+
+def check_startup(target=STARTUP_TARGET_MS, repeat=20):
+    # The startup gate: fails when the first turn comes more than `target` ms after a bare
+    # interpreter would have exited, or when a headless entry point imports a UI library.
+    # Interpreter startup itself varies several-fold between machines; the work on top of
+    # it is what this code controls.
+    elapsed, bare = startup_overhead(repeat)
+    console.print(f"Startup to first simulated turn: {elapsed:.1f} ms, {elapsed - bare:.1f} ms above the bare "
+                  f"interpreter's {bare:.1f} ms (target {target:.0f} ms above, best of {repeat})")
+    failed = elapsed - bare > target
+    for module, names in ui_imports().items():
+        console.print(f"[bold red]{module} imports {names} on the headless path[/bold red]")
+        failed = True
+    return not failed
+
+def run_benchmarks(sizes, only=None, quick=False):
+    # Returns {name: {"value", "unit", "better"}}
+    repeat = 3 if quick else 5
+    turns = 500 if quick else 3000
+    games = 3 if quick else 20
+    results = {}
+
+    def record(name, unit, better, measure):
+        if only and only not in name:
+            return
+        results[name] = {"value": round(measure(), 3), "unit": unit, "better": better}
+        console.print(f"  {name:<48} {results[name]['value']:>12,.3f} {unit}")
+
+    record("calibration", "us", "lower", lambda: time_call(calibration, repeat))
+    record("startup.first_turn", "ms", "lower", lambda: startup_time(repeat * 2))
+    record("memory.resources", "bytes", "lower", lambda: resources_footprint(make_state("small")))
+    for size in sizes:
+        console.print(f"[bold cyan]{size}[/bold cyan]")
+        for name, make_call in MICRO.items():
+            record(f"micro.{name}.{size}", "us", "lower", lambda: time_call(make_call(make_state(size)), repeat))
+        record(f"micro.display_status.{size}", "us", "lower", lambda: render_status(make_state(size)))
+        record(f"macro.turns_per_second.{size}", "turns/s", "higher", lambda: turns_per_second(size, turns))
+        record(f"macro.game_to_victory.{size}", "ms", "lower", lambda: game_to_victory(size, games))
+        record(f"memory.game.{size}", "bytes", "lower", lambda: game_footprint(make_state(size)))
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def append_history(path, results, label=None):
+    entry = {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "label": label,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(path, "a", encoding="utf-8") as handle:
+        handle.write(json.dumps(entry) + "\n")
+    return entry
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+def find_run(history, ref):
+    # A run by position (-1 is the latest), label or commit
+    try:
+        return history[int(ref)]
+    except ValueError:
+        pass
+    except IndexError:
+        raise SystemExit(f"No run at position {ref}")
+    for entry in reversed(history):
+        if ref in (entry.get("label"), entry.get("commit")):
+            return entry
+    raise SystemExit(f"No run labelled or committed as {ref!r}")
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD, normalize=False):
+    # Rows of (name, baseline, current, relative change, regressed); positive change is worse.
+    # With normalize, times are scaled by the ratio of the two runs' calibration times.
+    scale = 1.0
+    if normalize:
+        before, after = baseline["results"].get("calibration"), current["results"].get("calibration")
+        if not (before and after):
+            raise SystemExit("Both runs need a calibration result to normalize")
+        scale = before["value"] / after["value"]
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None or not before["value"] or (normalize and name == "calibration"):
+            continue
+        value = result["value"]
+        if normalize:
+            value = value / scale if result["better"] == "higher" else value * scale
+        change = (value - before["value"]) / before["value"]
+        if result["better"] == "higher":
+            change = -change
+        rows.append((name, before["value"], value, change, change > threshold))
+    return rows
+
+def describe_run(entry):
+    return entry.get("label") or entry.get("commit") or entry["time"]
+
+def comparison_table(rows, baseline, current, threshold):
+    table = Table(title=f"{describe_run(baseline)} -> {describe_run(current)} (threshold {threshold:.0%})",
+                  show_header=True, header_style="bold blue")
+    table.add_column("Benchmark", style="cyan", no_wrap=True)
+    table.add_column("Baseline", justify="right")
+    table.add_column("Current", justify="right")
+    table.add_column("Change", justify="right")
+    table.add_column("", style="bold red")
+    for name, before, after, change, regressed in rows:
+        table.add_row(name, f"{before:,.3f}", f"{after:,.3f}", f"{change:+.1%}", "REGRESSION" if regressed else "")
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark turn phases and full-game throughput.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Run the benchmarks and append the results to the history")
+    run_parser.add_argument("--sizes", default=",".join(SIZES), help="Comma-separated state sizes")
+    run_parser.add_argument("--only", help="Run only benchmarks whose name contains this text")
+    run_parser.add_argument("--quick", action="store_true", help="Fewer repeats, turns and games")
+    run_parser.add_argument("--label", help="Name for this run, usable as a comparison baseline")
+    run_parser.add_argument("--history", default=HISTORY_PATH)
+    compare_parser = commands.add_parser("compare", help="Compare two runs and flag regressions")
+    compare_parser.add_argument("--baseline", default="-2", help="Run position, label or commit (default: previous run)")
+    compare_parser.add_argument("--current", default="-1", help="Run position, label or commit (default: latest run)")
+    compare_parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    compare_parser.add_argument("--normalize", action="store_true", help="Scale times by the runs' calibration ratio")
+    compare_parser.add_argument("--history", default=HISTORY_PATH)
+    startup_parser = commands.add_parser("startup", help="Check startup time and that headless paths skip the UI libraries")
+    startup_parser.add_argument("--target", type=float, default=STARTUP_TARGET_MS, help="Milliseconds to the first turn above a bare interpreter")
+    startup_parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "startup":
+        if not check_startup(args.target, args.repeat):
+            sys.exit(1)
+        return
+
+    if args.command == "run":
+        sizes = [size.strip() for size in args.sizes.split(",")]
+        for size in sizes:
+            if size not in SIZES:
+                parser.error(f"Unknown size {size!r}. Choose from {', '.join(SIZES)}.")
+        results = run_benchmarks(sizes, args.only, args.quick)
+        append_history(args.history, results, args.label)
+        return
+    history = load_history(args.history)
+    if len(history) < 2 and args.baseline == "-2":
+        raise SystemExit("Need at least two runs in the history to compare")
+    baseline, current = find_run(history, args.baseline), find_run(history, args.current)
+    rows = compare(baseline, current, args.threshold, args.normalize)
+    console.print(comparison_table(rows, baseline, current, args.threshold))
+    if any(row[4] for row in rows):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# buffs.py
+
+WHEEL_SLOTS = 64  # Buffs lasting longer than this stay in their slot for extra rounds
+
+class Buff:
+    # One active buff; `expires` is the scheduler tick of its last application
+    __slots__ = ("name", "type", "description", "value", "resource", "expires")
+
+    def __init__(self, name, buff_type, description, value, resource, expires):
+        self.name = name
+        self.type = buff_type  # 'population' or 'resource'
+        self.description = description
+        self.value = value
+        self.resource = resource
+        self.expires = expires
+
+class BuffScheduler:
+    # Active buffs with their combined effect kept as running totals: one delta per resource
+    # plus one for population. A timer wheel holds each buff in the slot of its expiry tick,
+    # so a turn costs O(resources + expirations) however many buffs are active.
+    def __init__(self, rules):
+        self.rules = rules
+        self.tick = 0  # Number of buff phases run so far
+        self.active = {}  # Insertion-ordered, for display and saving
+        self.wheel = [[] for _ in range(WHEEL_SLOTS)]
+        self.resource_delta = [0] * len(rules.resource_names)
+        self.population_delta = 0
+        self.next_id = 0
+
+    def __len__(self):
+        return len(self.active)
+
+    def __iter__(self):
+        return iter(self.active.values())
+
+    def turns_left(self, buff):
+        return buff.expires - self.tick
+
+    def add(self, name, buff_type, description, value, turns, resource=None):
+        # Applied on each of the next `turns` buff phases, including this turn's if still to come.
+        # A buff lasting zero turns or less still applies once, at the next phase: an expiry
+        # tick already passed would never come round on the wheel.
+        buff = Buff(name, buff_type, description, value, resource, self.tick + max(turns, 1))
+        self.next_id += 1
+        self.active[self.next_id] = buff
+        self.wheel[buff.expires % WHEEL_SLOTS].append(self.next_id)
+        self.shift(buff, 1)
+        return buff
+
+    def shift(self, buff, sign):
+        if buff.type == "population":
+            self.population_delta += sign * buff.value
+        elif buff.type == "resource":
+            self.resource_delta[self.rules.resource_index[buff.resource]] += sign * buff.value
+
+    def apply(self, game):
+        # One buff phase: add every running total once, then retire the buffs whose last
+        # application this was
+        self.tick += 1
+        if not self.active:
+            return
+        output = game.output
+        if output.enabled:
+            for buff in self.active.values():
+                output.emit("buff_applied", name=buff.name, value=buff.value, resource=buff.resource)
+        if self.population_delta:
+            game.population.current_population += self.population_delta
+        for resource, delta in zip(self.rules.resource_names, self.resource_delta):
+            if delta:
+                game.resources.modify_resource(resource, delta)
+        slot = self.wheel[self.tick % WHEEL_SLOTS]
+        if slot:
+            pending = []
+            for buff_id in slot:
+                buff = self.active[buff_id]
+                if buff.expires == self.tick:
+                    del self.active[buff_id]
+                    self.shift(buff, -1)
+                    if output.enabled:
+                        output.emit("buff_expired", name=buff.name)
+                else:
+                    pending.append(buff_id)
+            slot[:] = pending
+
+    def skip(self, phases):
+        # Advance the clock over buff phases with no buffs active (fast-forwarded turns)
+        self.tick += phases
+
+    def to_list(self):
+        entries = []
+        for buff in self.active.values():
+            entry = {
+                "name": buff.name,
+                "type": buff.type,
+                "description": buff.description,
+                "value": buff.value,
+                "turns_left": self.turns_left(buff)
+            }
+            if buff.resource:
+                entry["resource"] = buff.resource
+            entries.append(entry)
+        return entries
+
+    def from_list(self, entries):
+        self.__init__(self.rules)
+        for entry in entries:
+            self.add(entry["name"], entry["type"], entry["description"], entry["value"],
+                     entry["turns_left"], entry.get("resource"))
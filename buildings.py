@@ -1,155 +1,97 @@
 # buildings.py
-from rich.prompt import Prompt
-from rich.prompt import Confirm
-from colorama import Fore, Style
-from rich.console import Console
-from rich.table import Table
-from tqdm import tqdm
-import time
 
-console = Console()
+from output import TERMINAL
+from rules import get_rules, EMPTY
 
 class BuildingManager:
-    def __init__(self):
+    def __init__(self, rules=None):
+        self.rules = rules or get_rules()
         self.buildings = {}
-        self.building_emojis = {
-            "Land Formation": "🌱",
-            "Settlement": "🏘️",
-            "Farm": "🌾",
-            "Metal Mine": "⛏️",
-            "Technology Lab": "🔬",
-            "Dimensional Gate": "🌀"
-        }
-
-    def build_structure(self, resources, population):
-        available_buildings = self.list_available_buildings()
-        if not available_buildings:
-            console.print("[bold yellow]No buildings available to construct at this time.[/bold yellow]")
+        self.building_emojis = self.rules.building_emojis
+        self.output = TERMINAL  # Replaced by the game's output bus in GameLoop
+
+    def construct(self, building_name, resources, count=1):
+        # Non-interactive construction used by GameLoop actions. A batch of `count` is paid
+        # for in one step over the cost vector, so it is all built or none of it is.
+        if count < 1:
+            raise ValueError(f"Build count must be positive, not {count!r}")
+        building = self.get_building(building_name)
+        if building is None:
+            if self.output.enabled:
+                self.output.emit("unknown_building", building=building_name)
             return False
+        if not resources.resources.covers(building["cost_fixed"], count):
+            if self.output.enabled:
+                self.output.emit("build_unaffordable", building=building_name, count=count)
+            return False
+        if not resources.spend_resources(building["cost"], building["cost_fixed"], count):
+            return False
+        self.buildings[building_name] = self.buildings.get(building_name, 0) + count
+        resources.invalidate_production()
+        if self.output.enabled:
+            self.output.emit("constructed", building=building_name, count=count)
+        return True
 
-        console.print("\n[bold yellow]Available Buildings to Construct:[/bold yellow]")
-        building_table = Table(show_header=True, header_style="bold blue")
-        building_table.add_column("Number", style="cyan", no_wrap=True)
-        building_table.add_column("Building", style="magenta")
-        building_table.add_column("Cost", style="green")
-        building_table.add_column("Affordability", style="yellow")
-
-        for idx, building in enumerate(available_buildings, start=1):
-            cost_str = ", ".join([f"{resources.get_resource_symbol(res)} {res}: {amt}" for res, amt in building['cost'].items()])
-            can_afford = self.can_afford_building(building, resources)
-            affordability = "[green]Yes[/green]" if can_afford else "[red]No[/red]"
-            building_table.add_row(str(idx), f"{building['emoji']} {building['name']}", cost_str, affordability)
-
-        console.print(building_table)
-
-        choice = Prompt.ask("Enter the number of the building you want to construct", default="1")
-        try:
-            choice = int(choice)
-            if 1 <= choice <= len(available_buildings):
-                selected = available_buildings[choice - 1]
-                if self.can_afford_building(selected, resources):
-                    if resources.spend_resources(selected["cost"]):
-                        # Simulate building time with tqdm
-                        console.print(f"\n[bold magenta]Constructing {selected['name']}...[/bold magenta]")
-                        for _ in tqdm(range(10), desc="Building", unit="step"):
-                            time.sleep(0.1)
-                        self.buildings[selected["name"]] = self.buildings.get(selected["name"], 0) + 1
-                        console.print(f"[bold green]{selected['name']} constructed successfully.[/bold green]")
-                        return True  # Exit after one construction
-                else:
-                    console.print(f"[bold red]You do not have enough resources to construct {selected['name']}.[/bold red]")
-            else:
-                console.print("[bold red]Invalid choice.[/bold red]")
-        except ValueError:
-            console.print("[bold red]Invalid input. Please enter a number.[/bold red]")
-
-        return False  # Exit function if no valid structure is built
-
-
-
+    def get_building(self, building_name):
+        return self.rules.building_by_name.get(building_name)
 
     def can_afford_building(self, building, resources):
-        for res, amt in building['cost'].items():
-            if resources.resources.get(res, 0) < amt:
-                return False
-        return True
+        return resources.resources.covers(building["cost_fixed"])
+
+    def max_affordable(self, building, resources):
+        # Most copies of the building the resources pay for, from one pass over its cost
+        # vector; None if it costs nothing
+        return resources.resources.affordable(building["cost_fixed"])
 
     def list_buildings(self):
         return self.buildings
 
     def list_available_buildings(self):
-        # Define available buildings and their costs with emojis
-        return [
-            {"name": "Land Formation", "cost": {"Light": 50, "Energy": 20}, "emoji": self.get_building_emoji("Land Formation")},
-            {"name": "Settlement", "cost": {"Light": 100, "Water": 50, "Energy": 30}, "emoji": self.get_building_emoji("Settlement")},
-            {"name": "Farm", "cost": {"Land": 50, "Energy": 20}, "emoji": self.get_building_emoji("Farm")},
-            {"name": "Metal Mine", "cost": {"Land": 100, "Energy": 40, "Metal": 50}, "emoji": self.get_building_emoji("Metal Mine")},
-            {"name": "Technology Lab", "cost": {"Metal": 100, "Energy": 50, "Technology": 20}, "emoji": self.get_building_emoji("Technology Lab")},
-            {"name": "Dimensional Gate", "cost": {"Land": 200, "Energy": 100, "Light": 150, "Technology": 50}, "emoji": self.get_building_emoji("Dimensional Gate")}
-        ]
+        # Compiled once from the rules file; shared and read-only
+        return self.rules.buildings
 
     def get_building_effects(self):
-        # Returns a dictionary with building names as keys and their effects
-        # For example, Farm increases Light and Water generation per population
-        effects = {
-            "Land Formation": {"Land": 100},  # Each Land Formation adds 100 Land
-            "Settlement": {"Energy": 10},      # Settlement increases Energy generation by 10 per turn
-            "Farm": {"Light": 1, "Water": 0.5, "Food": 2},
-            "Metal Mine": {"Metal": 5},
-            "Technology Lab": {"Technology": 2},
-            "Dimensional Gate": {"Light": 5, "Energy": 5}  # Placeholder for end-game effects
-        }
-        return effects
-
-    def upgrade_building(self, building_name, resources):
+        # Building names mapped to the resources each one adds per turn
+        return self.rules.building_effects
+
+    def upgrade_building(self, building_name, resources, count=1):
+        # Applies `count` upgrades paid for in one step, or none
+        if count < 1:
+            raise ValueError(f"Upgrade count must be positive, not {count!r}")
         if building_name not in self.buildings or self.buildings[building_name] <= 0:
-            console.print(f"[bold red]You don't have any {building_name} to upgrade.[/bold red]")
+            if self.output.enabled:
+                self.output.emit("upgrade_missing", building=building_name)
             return False
         upgrade_cost = self.get_upgrade_cost(building_name)
         if not upgrade_cost:
-            console.print(f"[bold yellow]{building_name} cannot be upgraded.[/bold yellow]")
+            if self.output.enabled:
+                self.output.emit("upgrade_unavailable", building=building_name)
             return False
-        if self.can_upgrade_building(building_name, resources):  # Use the existing method here
-            console.print(f"\n[bold yellow]Upgrade Cost for {building_name}:[/bold yellow]")
-            upgrade_table = Table(show_header=False, show_edge=False)
-            upgrade_table.add_column("Cost", style="green")
-            upgrade_table.add_row(", ".join([f"{resources.get_resource_symbol(res)} {res}: {amt}" for res, amt in upgrade_cost.items()]))
-            console.print(upgrade_table)
-            
-            confirm = Confirm.ask("Do you want to proceed with the upgrade?")
-            if confirm:
-                if resources.spend_resources(upgrade_cost):
-                    # Simulate upgrading time with tqdm
-                    console.print(f"\n[bold magenta]Upgrading {building_name}...[/bold magenta]")
-                    for _ in tqdm(range(10), desc="Upgrading", unit="step"):
-                        time.sleep(0.1)
-                    self.buildings[building_name] += 1
-                    console.print(f"[bold green]{building_name} has been upgraded successfully.[/bold green]")
-                    return True
-            else:
-                console.print("[bold yellow]Upgrade action canceled.[/bold yellow]")
+        vector = self.rules.upgrade_costs_fixed[building_name]
+        if resources.resources.covers(vector, count):
+            if resources.spend_resources(upgrade_cost, vector, count):
+                self.buildings[building_name] += count
+                resources.invalidate_production()
+                if self.output.enabled:
+                    self.output.emit("upgraded", building=building_name, count=count)
+                return True
         else:
-            console.print(f"[bold red]Insufficient resources to upgrade {building_name}.[/bold red]")
+            if self.output.enabled:
+                self.output.emit("upgrade_unaffordable", building=building_name, count=count)
         return False
 
     def can_upgrade_building(self, building_name, resources):
-        upgrade_cost = self.get_upgrade_cost(building_name)
-        for res, amt in upgrade_cost.items():
-            if resources.resources.get(res, 0) < amt:
-                return False
-        return True
+        upgrade_cost = self.rules.upgrade_costs_fixed.get(building_name)
+        return upgrade_cost is None or resources.resources.covers(upgrade_cost)
+
+    def max_upgrades(self, building_name, resources):
+        # Most upgrades of an owned building the resources pay for; None if they cost nothing
+        if self.buildings.get(building_name, 0) <= 0 or not self.get_upgrade_cost(building_name):
+            return 0
+        return resources.resources.affordable(self.rules.upgrade_costs_fixed[building_name])
 
     def get_upgrade_cost(self, building_name):
-        # Define upgrade costs for each building
-        upgrade_costs = {
-            "Farm": {"Light": 30, "Water": 20},
-            "Settlement": {"Light": 50, "Water": 30, "Energy": 20},
-            "Metal Mine": {"Metal": 50, "Energy": 30},
-            "Technology Lab": {"Technology": 30, "Energy": 20},
-            "Land Formation": {"Light": 20, "Energy": 10},
-            "Dimensional Gate": {"Light": 100, "Energy": 50, "Technology": 50}
-        }
-        return upgrade_costs.get(building_name, {})
+        return self.rules.upgrade_costs.get(building_name, EMPTY)
 
     def get_building_emoji(self, building_name):
         return self.building_emojis.get(building_name, "")
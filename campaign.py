@@ -0,0 +1,375 @@
+# campaign.py
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import time
+from array import array
+from contextlib import contextmanager
+
+from policies import POLICIES, make_policy
+from rules import RULES_PATH, RulesError, compile_rules
+from sweep import (SweepError, apply_params, configurations, load_data, parse_grid, parse_range, report_table,
+                   summarize)
+from tournament import TournamentResult, play_game
+
+LEASE_SECONDS = 300  # A claimed unit returns to the queue if its lease is not renewed in time
+MAX_ATTEMPTS = 3  # Claims per unit before it is marked failed
+UNIT_SIZE = 500  # Games per work unit
+POLL_SECONDS = 5  # Wait between claim attempts with --wait while other workers hold units
+
+# A campaign is one SQLite file. Each unit is a seed range played under one parameter set
+# and policy; its state goes pending -> leased -> done, or back to pending when its lease
+# expires or it raises, and failed after MAX_ATTEMPTS claims. A leased unit belongs to the
+# (owner, attempts) pair that claimed it, so a worker whose lease was taken over can neither
+# renew nor complete it. Results are committed per unit, so stopping loses at most the
+# units in progress.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    config TEXT NOT NULL,
+    policy TEXT NOT NULL,
+    first_seed INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_expires REAL,
+    error TEXT,
+    records BLOB,
+    finished REAL,
+    UNIQUE (config, policy, first_seed, count)
+);
+CREATE INDEX IF NOT EXISTS units_state ON units (state, id);
+"""
+
+class CampaignError(RuntimeError):
+    pass
+
+def connect(path, create=False):
+    # Autocommit connection: every write below opens its own IMMEDIATE transaction. The
+    # rollback journal (not WAL) keeps the file usable from several machines on a shared
+    # filesystem, as long as that filesystem implements POSIX locks.
+    if not create and not os.path.exists(path):
+        raise CampaignError(f"No campaign at {path}")
+    connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+    connection.execute("PRAGMA busy_timeout = 60000")
+    connection.executescript(SCHEMA)
+    return connection
+
+@contextmanager
+def transaction(connection):
+    # BEGIN IMMEDIATE takes the write lock up front, so two workers never claim one unit
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+def read_meta(connection):
+    return {key: json.loads(value) for key, value in connection.execute("SELECT key, value FROM meta")}
+
+def encode_config(params):
+    return json.dumps([[path, value] for path, value in params])
+
+def decode_config(text):
+    return tuple((path, value) for path, value in json.loads(text))
+
+def pack_records(records):
+    # Stored little-endian so machines of either byte order can share a campaign
+    if sys.byteorder == "big":
+        records = array("q", records)
+        records.byteswap()
+    return records.tobytes()
+
+def unpack_records(blob):
+    records = array("q")
+    records.frombytes(blob)
+    if sys.byteorder == "big":
+        records.byteswap()
+    return records
+
+def seed_gaps(low, high, queued):
+    # Parts of the seed range [low, high) outside the sorted (first, end) ranges in `queued`
+    for first, end in queued:
+        if first > low:
+            yield low, min(first, high)
+        low = max(low, end)
+    if low < high:
+        yield low, high
+
+def add_units(path, configs, games, first_seed=0, policy_name="victory", unit_size=UNIT_SIZE, rules_data=None,
+              max_turns=None, max_attempts=None):
+    # Creates the campaign or extends it with more configurations or seeds. The rules and
+    # turn limit are fixed by the first call. Seeds already queued for a configuration and
+    # policy are skipped, so a range can be grown or re-added; only the gaps become new units.
+    make_policy(policy_name)  # Fail fast on an unknown policy
+    connection = connect(path, create=True)
+    with transaction(connection):
+        meta = read_meta(connection)
+        if not meta:
+            meta = {"rules": rules_data or load_data(), "max_turns": max_turns or 1000,
+                    "max_attempts": max_attempts or MAX_ATTEMPTS, "created": time.time()}
+            connection.executemany("INSERT INTO meta VALUES (?, ?)",
+                                   [(key, json.dumps(value)) for key, value in meta.items()])
+        elif rules_data is not None and rules_data != meta["rules"]:
+            raise CampaignError(f"{path} was created with other rules")
+        elif max_turns is not None and max_turns != meta["max_turns"]:
+            raise CampaignError(f"{path} plays up to {meta['max_turns']} turns")
+        if max_attempts is not None and max_attempts != meta["max_attempts"]:
+            connection.execute("UPDATE meta SET value = ? WHERE key = 'max_attempts'", (json.dumps(max_attempts),))
+        added = 0
+        skipped = []
+        for params in [()] + [tuple(params) for params in configs]:
+            try:
+                compile_rules(apply_params(meta["rules"], params))
+            except (SweepError, RulesError) as exc:
+                skipped.append((params, str(exc)))
+                continue
+            config = encode_config(params)
+            queued = connection.execute(
+                "SELECT first_seed, first_seed + count FROM units WHERE config = ? AND policy = ? "
+                "AND first_seed < ? AND first_seed + count > ? ORDER BY first_seed",
+                (config, policy_name, first_seed + games, first_seed)).fetchall()
+            for low, high in seed_gaps(first_seed, first_seed + games, queued):
+                for start in range(low, high, unit_size):
+                    added += connection.execute(
+                        "INSERT INTO units (config, policy, first_seed, count) VALUES (?, ?, ?, ?)",
+                        (config, policy_name, start, min(unit_size, high - start))).rowcount
+    connection.close()
+    return added, skipped
+
+class Worker:
+    # Claims units one at a time, plays their seeds through tournament.play_game (so every
+    # game is set up by main.create_game) and commits each unit's records with its state
+    def __init__(self, path, owner=None, lease=LEASE_SECONDS):
+        self.connection = connect(path)
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease = lease
+        meta = read_meta(self.connection)
+        if not meta:
+            raise CampaignError(f"{path} has no campaign; add units first")
+        self.base = meta["rules"]
+        self.max_turns = meta["max_turns"]
+        self.max_attempts = meta["max_attempts"]
+        self.rules = {}  # Config text -> compiled rules
+        self.policies = {}
+        self.completed = 0
+
+    def claim(self):
+        # The oldest pending unit or one whose lease ran out; None when there is none
+        now = time.time()
+        with transaction(self.connection) as connection:
+            connection.execute(
+                "UPDATE units SET state = 'failed', owner = NULL, error = COALESCE(error, 'lease expired') "
+                "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?", (now, self.max_attempts))
+            row = connection.execute(
+                "SELECT id, config, policy, first_seed, count, attempts FROM units WHERE state = 'pending' "
+                "OR (state = 'leased' AND lease_expires < ?) ORDER BY id LIMIT 1", (now,)).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE units SET state = 'leased', owner = ?, attempts = ?, lease_expires = ? "
+                               "WHERE id = ?", (self.owner, row[5] + 1, now + self.lease, row[0]))
+        return row[:5] + (row[5] + 1,)
+
+    def renew(self, unit_id, attempts):
+        # False once the lease has been taken over: the unit's work is then abandoned
+        with transaction(self.connection) as connection:
+            return connection.execute(
+                "UPDATE units SET lease_expires = ? WHERE id = ? AND state = 'leased' AND owner = ? AND attempts = ?",
+                (time.time() + self.lease, unit_id, self.owner, attempts)).rowcount == 1
+
+    def complete(self, unit_id, attempts, records):
+        with transaction(self.connection) as connection:
+            return connection.execute(
+                "UPDATE units SET state = 'done', records = ?, finished = ?, owner = NULL, lease_expires = NULL, "
+                "error = NULL WHERE id = ? AND state = 'leased' AND owner = ? AND attempts = ?",
+                (pack_records(records), time.time(), unit_id, self.owner, attempts)).rowcount == 1
+
+    def release(self, unit_id, attempts, error):
+        # Back to the queue for another attempt, or failed after the last one
+        state = "failed" if attempts >= self.max_attempts else "pending"
+        with transaction(self.connection) as connection:
+            connection.execute(
+                "UPDATE units SET state = ?, error = ?, owner = NULL, lease_expires = NULL "
+                "WHERE id = ? AND state = 'leased' AND owner = ? AND attempts = ?",
+                (state, error, unit_id, self.owner, attempts))
+
+    def play(self, config, policy_name, first_seed, count, unit_id, attempts):
+        rules = self.rules.get(config)
+        if rules is None:
+            rules = self.rules[config] = compile_rules(apply_params(self.base, decode_config(config)))
+        policy = self.policies.get(policy_name)
+        if policy is None:
+            policy = self.policies[policy_name] = make_policy(policy_name)
+        records = array("q")
+        renewed = time.monotonic()
+        for seed in range(first_seed, first_seed + count):
+            records.extend(play_game(policy, seed, self.max_turns, rules))
+            if time.monotonic() - renewed > self.lease / 3:
+                if not self.renew(unit_id, attempts):
+                    return None
+                renewed = time.monotonic()
+        return records
+
+    def run(self, wait=False):
+        # Works until no unit can be claimed; with wait, also until no other worker holds one
+        while True:
+            unit = self.claim()
+            if unit is None:
+                if wait and self.connection.execute("SELECT 1 FROM units WHERE state = 'leased' LIMIT 1").fetchone():
+                    time.sleep(POLL_SECONDS)
+                    continue
+                return self.completed
+            unit_id, config, policy_name, first_seed, count, attempts = unit
+            try:
+                records = self.play(config, policy_name, first_seed, count, unit_id, attempts)
+            except Exception as exc:  # Recorded on the unit and retried, possibly by another worker
+                self.release(unit_id, attempts, f"{type(exc).__name__}: {exc}")
+                continue
+            if records is not None and self.complete(unit_id, attempts, records):
+                self.completed += 1
+
+    def close(self):
+        self.connection.close()
+
+def work_process(path, lease, wait):
+    worker = Worker(path, lease=lease)
+    try:
+        return worker.run(wait)
+    finally:
+        worker.close()
+
+def run_workers(path, workers=None, lease=LEASE_SECONDS, wait=False):
+    # Local worker processes; more can be started at any time, here or on other machines
+    workers = workers or os.cpu_count() or 1
+    Worker(path).close()  # Fail fast on a missing campaign
+    if workers == 1:
+        return work_process(path, lease, wait)
+    with multiprocessing.Pool(workers) as pool:
+        return sum(pool.starmap(work_process, [(path, lease, wait)] * workers))
+
+def retry_failed(path):
+    connection = connect(path)
+    with transaction(connection):
+        count = connection.execute("UPDATE units SET state = 'pending', attempts = 0, error = NULL "
+                                   "WHERE state = 'failed'").rowcount
+    connection.close()
+    return count
+
+def status(path):
+    # Units and games per state, plus the errors of failed units
+    connection = connect(path)
+    counts = {state: (units, games or 0) for state, units, games in connection.execute(
+        "SELECT state, COUNT(*), SUM(count) FROM units GROUP BY state")}
+    leases = connection.execute("SELECT owner, COUNT(*) FROM units WHERE state = 'leased' GROUP BY owner").fetchall()
+    errors = connection.execute("SELECT id, attempts, error FROM units WHERE error IS NOT NULL ORDER BY id").fetchall()
+    connection.close()
+    return counts, leases, errors
+
+def results(path):
+    # One row per (policy, configuration) in the shape sweep.report_table takes, merged in
+    # seed order from the completed units
+    connection = connect(path)
+    groups = {}
+    totals = {}
+    for config, policy_name, count, state, blob in connection.execute(
+            "SELECT config, policy, count, state, records FROM units ORDER BY config, policy, first_seed"):
+        key = (policy_name, config)
+        totals[key] = totals.get(key, 0) + count
+        result = groups.get(key)
+        if result is None:
+            result = groups[key] = TournamentResult(policy_name)
+        if state == "done":
+            result.merge(unpack_records(blob))
+    connection.close()
+    rows = []
+    for (policy_name, config), result in groups.items():
+        rows.append({"params": (("policy", policy_name),) + decode_config(config), "summary": summarize(result),
+                     "planned": totals[(policy_name, config)]})
+    rows.sort(key=lambda row: (len(row["params"]) > 1, row["params"]))  # Unchanged rules first
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumable simulation campaigns in a shared SQLite work queue.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add_parser = commands.add_parser("add", help="Create a campaign or add configurations and seeds to it")
+    add_parser.add_argument("database")
+    add_parser.add_argument("--grid", action="append", default=[], metavar="PATH=V1,V2")
+    add_parser.add_argument("--sample", action="append", default=[], metavar="PATH=LOW:HIGH")
+    add_parser.add_argument("--samples", type=int, default=10)
+    add_parser.add_argument("--sample-seed", type=int, default=0)
+    add_parser.add_argument("--policy", action="append", choices=sorted(POLICIES),
+                            help="Policy to play; repeat for several (default: victory)")
+    add_parser.add_argument("--games", type=int, default=10000, help="Games per configuration and policy")
+    add_parser.add_argument("--seed", type=int, default=0, help="First seed; game k uses seed + k")
+    add_parser.add_argument("--unit-size", type=int, default=UNIT_SIZE, help="Games per work unit")
+    add_parser.add_argument("--rules", default=None, help=f"Rules file for a new campaign (default: {RULES_PATH})")
+    add_parser.add_argument("--max-turns", type=int, default=None, help="Turn limit for a new campaign (default: 1000)")
+    add_parser.add_argument("--max-attempts", type=int, default=None, help=f"Claims per unit (default: {MAX_ATTEMPTS})")
+    work_parser = commands.add_parser("work", help="Play units until none is left to claim")
+    work_parser.add_argument("database")
+    work_parser.add_argument("--workers", type=int, default=None)
+    work_parser.add_argument("--lease", type=float, default=LEASE_SECONDS, help="Lease length in seconds")
+    work_parser.add_argument("--wait", action="store_true", help="Keep polling while other workers hold units")
+    for name, help_text in (("status", "Show progress, leases and errors"), ("report", "Summarize completed units"),
+                            ("retry", "Return failed units to the queue")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("database")
+        if name == "report":
+            command.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+    try:
+        run_command(parser, args)
+    except CampaignError as exc:
+        raise SystemExit(str(exc))
+
+def run_command(parser, args):
+    if args.command == "add":
+        try:
+            grid = [parse_grid(spec) for spec in args.grid]
+            ranges = [parse_range(spec) for spec in args.sample]
+        except SweepError as exc:
+            parser.error(str(exc))
+        configs = configurations(grid, ranges, args.samples, args.sample_seed)
+        rules_data = load_data(args.rules) if args.rules else None
+        added = 0
+        for policy_name in args.policy or ["victory"]:
+            count, skipped = add_units(args.database, configs, args.games, args.seed, policy_name, args.unit_size,
+                                       rules_data, args.max_turns, args.max_attempts)
+            added += count
+        for params, error in skipped:
+            print(f"Skipped {encode_config(params)}: {error}")
+        print(f"Added {added} units to {args.database}")
+    elif args.command == "work":
+        completed = run_workers(args.database, args.workers, args.lease, args.wait)
+        print(f"Completed {completed} units")
+    elif args.command == "retry":
+        print(f"Returned {retry_failed(args.database)} failed units to the queue")
+    elif args.command == "status":
+        counts, leases, errors = status(args.database)
+        for state in ("pending", "leased", "done", "failed"):
+            units, games = counts.get(state, (0, 0))
+            print(f"{state:<8} {units:>7} units {games:>10} games")
+        for owner, units in leases:
+            print(f"  leased by {owner}: {units}")
+        for unit_id, attempts, error in errors:
+            print(f"  unit {unit_id} (attempt {attempts}): {error}")
+    else:
+        rows = results(args.database)
+        if args.json:
+            print(json.dumps(rows, indent=2))
+            return
+        from utils import console
+        paths = list(dict.fromkeys(path for row in rows for path, _ in row["params"]))
+        console.print(report_table(rows, paths, title=f"Campaign {args.database}"))
+
+if __name__ == "__main__":
+    main()
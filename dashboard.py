@@ -0,0 +1,235 @@
+# dashboard.py
+
+import io
+import time
+
+from rich.console import Console
+from rich.text import Text
+
+CSI = "\x1b["
+MAX_FPS = 20  # Redraws closer together than this are deferred to the next update
+MAX_ROWS = 8  # Buff and mission rows shown before the rest is summarised
+MIN_LOG_ROWS = 8  # Terminal rows always left below the dashboard for messages and prompts
+CELL_WIDTH = 26  # Width of one resource or building cell
+
+class Section:
+    # One block of dashboard lines. `version` reads a cheap key of the state the section
+    # shows; `rows` lists (key, make_text) pairs for the section's lines. Lines are only
+    # rebuilt when the version changes, and then each row is rendered only if its key is new.
+    def __init__(self, name, version, rows):
+        self.name = name
+        self.version = version
+        self.rows = rows
+        self.key = None
+        self.lines = []
+        self.cache = {}  # Row key -> rendered line, for the rows of the last render
+
+    def render(self, game, dashboard):
+        key = self.version(game)
+        if key == self.key and self.lines:
+            return self.lines
+        self.key = key
+        cache = {}
+        lines = []
+        for row_key, make_text in self.rows(game, dashboard.width):
+            line = cache.get(row_key) or self.cache.get(row_key)
+            if line is None:
+                line = dashboard.render_line(make_text())
+            cache[row_key] = line
+            lines.append(line)
+        self.cache = cache
+        self.lines = lines
+        return lines
+
+def grid_rows(cells, width):
+    # Groups (key, make_text) cells into lines of fixed-width columns
+    per_line = max(1, width // CELL_WIDTH)
+    for start in range(0, len(cells), per_line):
+        chunk = cells[start:start + per_line]
+
+        def make_text(chunk=chunk):
+            line = Text()
+            for _, make_cell in chunk:
+                cell = make_cell()
+                cell.truncate(CELL_WIDTH - 1, overflow="ellipsis", pad=True)
+                line.append_text(cell)
+                line.append(" ")
+            return line
+        yield tuple(key for key, _ in chunk), make_text
+
+def header_rows(game, width):
+    population = game.population
+    key = (game.turn, game.player.name, game.player.level, population.current_population, population.max_population)
+    yield key, lambda: Text.assemble(
+        (f"Turn {game.turn}", "bold magenta"), "  │  ", (game.player.name, "bold"), f" (level {game.player.level})  │  ",
+        ("Population: ", "bold green"), f"{population.current_population}/{population.max_population}")
+
+def resource_rows(game, width):
+    cells = []
+    for resource, amount in game.resources.resources.items():
+        symbol = game.get_resource_symbol(resource)
+        cells.append(((resource, amount), lambda symbol=symbol, resource=resource, amount=amount: Text.assemble(
+            (f"{symbol} {resource} ", "cyan"), (str(amount), "magenta"))))
+    return grid_rows(cells, width)
+
+def building_rows(game, width):
+    buildings = game.buildings.list_buildings()
+    if not buildings:
+        return [("none", lambda: Text.assemble(("Buildings: ", "bold yellow"), "None"))]
+    cells = []
+    for building, count in buildings.items():
+        emoji = game.buildings.get_building_emoji(building)
+        cells.append(((building, count), lambda emoji=emoji, building=building, count=count: Text.assemble(
+            (f"{emoji} {building} ", "cyan"), (f"x{count}", "magenta"))))
+    return grid_rows(cells, width)
+
+def achievement_rows(game, width):
+    achieved = game.achievements.get_achieved()
+    yield tuple(achieved), lambda: Text.assemble(
+        ("Achievements Unlocked: ", "bold green"), ", ".join(achieved) if achieved else "None")
+
+def buff_rows(game, width):
+    buffs = game.buffs
+    if not buffs:
+        return
+    yield ("title", len(buffs)), lambda: Text(f"Active Buffs ({len(buffs)})", style="bold blue")
+    shown = sorted(buffs, key=buffs.turns_left)[:MAX_ROWS]
+    for buff in shown:
+        last = game.turn + buffs.turns_left(buff) - 1
+        yield (buff.name, buff.description, last), lambda buff=buff, last=last: Text.assemble(
+            "  ", (buff.name, "cyan"), "  ", (buff.description, "magenta"), "  ", (f"through turn {last}", "green"))
+    if len(buffs) > len(shown):
+        yield ("more", len(buffs) - len(shown)), lambda: Text(f"  ... and {len(buffs) - len(shown)} more")
+
+def mission_rows(game, width):
+    missions = game.missions
+    if not missions and not missions.archive:
+        return
+    completed = missions.completed_count
+    yield ("title", len(missions), completed), lambda: Text(
+        f"Missions: {len(missions)} open, {completed} completed", style="bold blue")
+    shown = list(missions)[:MAX_ROWS]
+    for mission in shown:
+        last = game.turn + missions.turns_left(mission) - 1
+        yield (mission.id, last), lambda mission=mission, last=last: Text.assemble(
+            "  ", (mission.name, "cyan"), "  ", (mission.details["description"], "magenta"), "  ",
+            (f"due by turn {last}", "green"))
+    if len(missions) > len(shown):
+        yield ("more", len(missions) - len(shown)), lambda: Text(f"  ... and {len(missions) - len(shown)} more")
+
+def rule_rows(game, width):
+    yield ("rule", width), lambda: Text("─" * width, style="dim")
+
+SECTIONS = (
+    ("header", header_rows, lambda game: (game.turn, game.player.level, game.player.name,
+                                          game.population.current_population, game.population.max_population)),
+    ("resources", resource_rows, lambda game: game.resources.resources.slots.tobytes()),
+    ("buildings", building_rows, lambda game: tuple(game.buildings.buildings.items())),
+    ("achievements", achievement_rows, lambda game: len(game.achievements.get_achieved())),
+    # Buffs and missions show the turn they run out on rather than turns left, so their
+    # lines only change when one is added or removed
+    ("buffs", buff_rows, lambda game: (game.buffs.next_id, len(game.buffs))),
+    ("missions", mission_rows, lambda game: game.missions.version),
+    ("rule", rule_rows, lambda game: None),
+)
+
+class Dashboard:
+    # Status panel pinned to the top of the terminal in place of display_status's tables.
+    # The rows below it form a scroll region, so messages, menus and prompts scroll past
+    # while the dashboard stays put. Each update rewrites only the screen lines that
+    # changed, and redraws are capped at max_fps.
+    def __init__(self, console, max_fps=MAX_FPS):
+        self.console = console
+        self.min_interval = 1 / max_fps if max_fps else 0
+        self.sections = [Section(name, version, rows) for name, rows, version in SECTIONS]
+        self.screen = []  # Lines currently shown, top to bottom
+        self.size = None
+        self.width = console.width
+        self.last_draw = 0.0
+        self.pending = None  # Game whose update was deferred by the frame cap
+        self.bytes_written = 0
+        self.active = False
+        self.renderer = None
+
+    def start(self):
+        # Only a real terminal can hold a pinned panel; elsewhere display_status prints as usual
+        if not self.console.is_terminal or self.console.is_dumb_terminal:
+            return False
+        self.active = True
+        # Clear the screen; anything printed before the first draw scrolls up from the bottom
+        self.write(f"{CSI}2J{CSI}{self.console.size.height};1H")
+        return True
+
+    def stop(self):
+        if not self.active:
+            return
+        if self.pending is not None:
+            self.draw(self.pending)
+        self.active = False
+        height = self.console.size.height
+        self.write(f"{CSI}r{CSI}{height};1H\n")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def update(self, game):
+        now = time.perf_counter()
+        if now - self.last_draw < self.min_interval:
+            self.pending = game
+            return
+        self.draw(game)
+
+    def render_line(self, text):
+        # One line of ANSI text, cut to the terminal width
+        buffer = self.renderer.file
+        buffer.seek(0)
+        buffer.truncate()
+        self.renderer.print(text, end="", no_wrap=True, overflow="ellipsis", crop=True)
+        return buffer.getvalue()
+
+    def draw(self, game):
+        self.pending = None
+        self.last_draw = time.perf_counter()
+        size = self.console.size
+        out = []
+        if size != self.size:
+            # New terminal size: every cached line has the wrong width
+            self.size = size
+            # One column spare: terminals disagree on some emoji widths, and a line that reached
+            # the last column could wrap and push the panel out of place
+            self.width = max(1, size.width - 1)
+            self.renderer = Console(file=io.StringIO(), force_terminal=True, color_system=self.console.color_system,
+                                    width=self.width, legacy_windows=False)
+            for section in self.sections:
+                section.key = None
+                section.cache = {}
+            self.screen = []
+            out.append(f"{CSI}2J")
+        lines = []
+        for section in self.sections:
+            lines.extend(section.render(game, self))
+        lines = lines[:max(1, size.height - MIN_LOG_ROWS)]
+        previous = self.screen
+        resized = len(lines) != len(previous)
+        out.append("\x1b7")  # Save the cursor in the scroll region
+        for row, line in enumerate(lines):
+            if row >= len(previous) or previous[row] != line:
+                out.append(f"{CSI}{row + 1};1H{line}{CSI}0m{CSI}K")
+        for row in range(len(lines), len(previous)):
+            out.append(f"{CSI}{row + 1};1H{CSI}K")
+        if resized:
+            # Setting the scroll region homes the cursor; messages continue from its last line
+            out.append(f"{CSI}{len(lines) + 1};{size.height}r{CSI}{size.height};1H")
+        else:
+            out.append("\x1b8")
+        self.screen = lines
+        self.write("".join(out))
+
+    def write(self, data):
+        self.bytes_written += len(data.encode("utf-8"))
+        self.console.file.write(data)
+        self.console.file.flush()
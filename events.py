@@ -1,118 +1,104 @@
 # events.py
 
+import math
 import random
-from colorama import Fore, Style
-from rich.console import Console
 
-console = Console()
+from output import TERMINAL
+from rules import get_rules
+
+class EventSampler:
+    # Draws which events fire in a turn at a cost proportional to the number that fire.
+    # Events are grouped into power-of-two chance classes; within a class with upper bound q,
+    # geometric skips jump straight to the next candidate (each member is a candidate with
+    # probability q) and a candidate fires with probability chance / q. Every event therefore
+    # still fires independently with exactly its own chance.
+    def __init__(self, chances):
+        classes = {}
+        for idx, chance in enumerate(chances):
+            if chance > 0:
+                classes.setdefault(math.ceil(-math.log2(chance)), []).append(idx)
+        self.buckets = []
+        for _, members in sorted(classes.items()):
+            bound = max(chances[idx] for idx in members)
+            log_miss = math.log1p(-bound) if bound < 1 else None  # None: every member is a candidate
+            ratios = tuple(chances[idx] / bound for idx in members)
+            self.buckets.append((bound, log_miss, tuple(members), ratios))
+
+    def sample(self, rng):
+        # Indices of the events that fire this turn, in catalog order
+        fired = []
+        for bound, log_miss, members, ratios in self.buckets:
+            size = len(members)
+            position = -1
+            while True:
+                if log_miss is None:
+                    position += 1
+                else:
+                    position += 1 + int(math.log(1.0 - rng.random()) / log_miss)
+                if position >= size:
+                    break
+                ratio = ratios[position]
+                if ratio >= 1 or rng.random() < ratio:
+                    fired.append(members[position])
+        if len(fired) > 1:
+            fired.sort()
+        return fired
+
+    def sample_batch(self, n_games, rng):
+        # NumPy variant for a batch of games: returns (game, event) index arrays of every
+        # event that fired, sorted by game and then catalog order
+        import numpy as np
+        games, events = [], []
+        for bound, log_miss, members, ratios in self.buckets:
+            size = len(members)
+            trials = n_games * size
+            if log_miss is None:
+                candidates = np.arange(trials)
+            else:
+                chunks, total = [], -1
+                expected = int(trials * bound) + 16
+                while total < trials:
+                    gaps = rng.geometric(bound, size=expected)
+                    positions = total + np.cumsum(gaps)
+                    chunks.append(positions)
+                    total = positions[-1]
+                candidates = np.concatenate(chunks)
+                candidates = candidates[candidates < trials]
+            slots = candidates % size
+            accepted = rng.random(len(candidates)) < np.asarray(ratios)[slots]
+            games.append(candidates[accepted] // size)
+            events.append(np.asarray(members)[slots[accepted]])
+        games = np.concatenate(games) if games else np.zeros(0, dtype=np.int64)
+        events = np.concatenate(events) if events else np.zeros(0, dtype=np.int64)
+        order = np.lexsort((events, games))
+        return games[order], events[order]
 
 class EventManager:
-    def __init__(self):
-        self.events = [
-            {
-                "name": "Resource Surge",
-                "description": "A sudden surge in Light resources boosts your civilization.",
-                "effect": lambda game: game.resources.add_resources({"Light": 50}),
-                "chance": 0.1  # 10% chance each turn
-            },
-            {
-                "name": "Water Scarcity",
-                "description": "Water resources are scarce this turn.",
-                "effect": lambda game: game.resources.modify_resource("Water", -30),
-                "chance": 0.05  # 5% chance
-            },
-            {
-                "name": "Energy Boost",
-                "description": "An energy boost increases your civilization's efficiency.",
-                "effect": lambda game: game.resources.add_resources({"Energy": 30}),
-                "chance": 0.1
-            },
-            {
-                "name": "Population Boom",
-                "description": "A sudden boom in population due to favorable conditions.",
-                "effect": lambda game: game.population.modify_population(10),
-                "chance": 0.05
-            },
-            {
-                "name": "Land Expansion",
-                "description": "New lands have been discovered, expanding your civilization's territory.",
-                "effect": lambda game: game.resources.add_resources({"Land": 100}),
-                "chance": 0.07
-            },
-            {
-                "name": "Energy Drain",
-                "description": "A mysterious energy drain affects your civilization.",
-                "effect": lambda game: game.resources.modify_resource("Energy", -40),
-                "chance": 0.05
-            },
-            {
-                "name": "Technological Advancement",
-                "description": "A technological breakthrough improves resource generation.",
-                "effect": lambda game: game.resources.add_resources({"Light": 20, "Energy": 20}),
-                "chance": 0.08
-            },
-            {
-                "name": "Metal Rush",
-                "description": "A surge in demand for Metal resources boosts your Metal production.",
-                "effect": lambda game: game.resources.add_resources({"Metal": 50}),
-                "chance": 0.06
-            },
-            {
-                "name": "Food Festival",
-                "description": "A grand food festival enhances your Food resources.",
-                "effect": lambda game: game.resources.add_resources({"Food": 100}),
-                "chance": 0.04
-            },
-            {
-                "name": "Tech Breakthrough",
-                "description": "A breakthrough in technology accelerates your Technology research.",
-                "effect": lambda game: game.resources.add_resources({"Technology": 50}),
-                "chance": 0.05
-            },
-            {
-                "name": "Meteor Strike",
-                "description": "A meteor strike damages your civilization, reducing resources.",
-                "effect": lambda game: game.resources.modify_resource("Land", -50),
-                "chance": 0.03
-            },
-            {
-                "name": "Trade Agreement",
-                "description": "A trade agreement boosts your resource imports.",
-                "effect": lambda game: game.resources.add_resources({"Metal": 25, "Technology": 25}),
-                "chance": 0.07
-            },
-            {
-                "name": "Natural Disaster",
-                "description": "A natural disaster has struck, reducing your population.",
-                "effect": lambda game: game.population.modify_population(-5),
-                "chance": 0.04
-            },
-            {
-                "name": "Cultural Renaissance",
-                "description": "A cultural renaissance boosts your population's happiness.",
-                "effect": lambda game: game.population.modify_population(5),
-                "chance": 0.05
-            },
-            {
-                "name": "Scientific Breakthrough",
-                "description": "A scientific breakthrough significantly enhances your Technology production.",
-                "effect": lambda game: game.resources.add_resources({"Technology": 100}),
-                "chance": 0.02
-            },
-            {
-                "name": "Economic Boom",
-                "description": "An economic boom increases your resource generation rates.",
-                "effect": lambda game: game.resources.add_resources({"Light": 20, "Water": 20, "Energy": 20}),
-                "chance": 0.03
-            }
-        ]
+    def __init__(self, rules=None):
+        self.rules = rules or get_rules()
+        self.rng = random  # Replaced by the game's event stream in GameLoop
+        self.events = self.rules.events  # Effects are data, so the catalog pickles
+        self.sampler = EventSampler([event["chance"] for event in self.events])
+        self.output = TERMINAL  # Replaced by the game's output bus in GameLoop
+        self.last_fired = []
 
     def trigger_event(self, game):
+        self.last_fired = self.sampler.sample(self.rng)  # Read by the turn journal
         triggered = False
-        for event in self.events:
-            if random.random() < event["chance"]:
-                console.print(f"\n[bold cyan][Event] {event['name']}:[/bold cyan] {event['description']}")
-                event["effect"](game)
-                triggered = True
-        if not triggered:
-            console.print("[bold cyan]\n[Event] No events this turn.[/bold cyan]")
+        for idx in self.last_fired:
+            event = self.events[idx]
+            if self.output.enabled:
+                self.output.emit("event", name=event["name"], description=event["description"])
+            self.apply_effects(event, game)
+            triggered = True
+        if not triggered and self.output.enabled:
+            self.output.emit("no_events")
+
+    def apply_effects(self, event, game):
+        for effect in event["effects"]:
+            if effect["type"] == "add":
+                game.resources.add_resources(effect["resources"])
+            elif effect["type"] == "modify":
+                game.resources.modify_resource(effect["resource"], effect["amount"])
+            elif effect["type"] == "population":
+                game.population.modify_population(effect["amount"])
@@ -0,0 +1,197 @@
+# fastforward.py
+
+import math
+from itertools import product
+
+import actions
+from achievements import metric_reader
+from rules import from_fixed
+
+MAX_POPULATION_EVENTS = 8  # Joint outcomes of population events are enumerated (2^k)
+
+def production(game, population):
+    # Per-turn gains with the given population: the vector generate_automatic_resources adds
+    vector = game.resources.production_vector(population, game.buildings)
+    return {name: from_fixed(amount) for name, amount in zip(game.rules.resource_names, vector)}
+
+def event_amounts(event):
+    # Resource changes of one firing of an event, ignoring population effects
+    amounts = {}
+    for effect in event["effects"]:
+        if effect["type"] == "add":
+            for resource, amount in effect["resources"].items():
+                amounts[resource] = amounts.get(resource, 0) + amount
+        elif effect["type"] == "modify":
+            amounts[effect["resource"]] = amounts.get(effect["resource"], 0) + effect["amount"]
+    return amounts
+
+class EventModel:
+    # Static view of the event catalog used by the closed-form turns, built once per rules
+    def __init__(self, rules):
+        self.amounts = [event_amounts(event) for event in rules.events]
+        self.population_events = [e for e in rules.events if any(f["type"] == "population" for f in e["effects"])]
+        population_indices = {e["index"] for e in self.population_events}
+        self.other_events = [(e["index"], e["chance"]) for e in rules.events if e["index"] not in population_indices]
+        # Largest total loss and gain events can cause to each resource in a single turn
+        self.losses = {r: sum(min(a.get(r, 0), 0) for a in self.amounts) for r in rules.resource_names}
+        self.gains = {r: sum(max(a.get(r, 0), 0) for a in self.amounts) for r in rules.resource_names}
+        self.outcomes = {}
+
+    def population_outcomes(self, capacity):
+        # Every joint outcome of the population events in one turn that starts at capacity:
+        # (probability, population deficit left at the end of the turn, fired event indices)
+        if capacity not in self.outcomes:
+            outcomes = []
+            for fired in product((False, True), repeat=len(self.population_events)):
+                probability = 1.0
+                current = capacity
+                for hit, event in zip(fired, self.population_events):
+                    probability *= event["chance"] if hit else 1.0 - event["chance"]
+                    if hit:
+                        for effect in event["effects"]:
+                            if effect["type"] == "population":
+                                current = min(current + effect["amount"], capacity)
+                if probability > 0:
+                    indices = tuple(e["index"] for hit, e in zip(fired, self.population_events) if hit)
+                    outcomes.append((probability, capacity - current, indices))
+            self.outcomes[capacity] = outcomes
+        return self.outcomes[capacity]
+
+_models = {}
+
+def event_model(rules):
+    model = _models.get(id(rules))
+    if model is None or model[0] is not rules:
+        model = _models[id(rules)] = (rules, EventModel(rules))
+    return model[1]
+
+def crossing_turns(value, threshold, increase):
+    # First turn on which a value rising by at most `increase` per turn could reach the threshold
+    if value >= threshold:
+        return 1
+    if increase <= 0:
+        return math.inf
+    return max(1, math.ceil((threshold - value) / increase))
+
+def steady_turns(game, limit):
+    # Plans the longest stretch of idle turns that can be solved in closed form, or returns
+    # None when the next turn has to be played normally. A stretch is steady when no buff or
+    # open mission is running and the population sits at capacity with enough accumulated
+    # growth to refill any loss within one turn, so every turn is one of a few known shapes.
+    if game.game_over or game.journal is not None or game.buffs or game.missions:
+        return None
+    rules = game.rules
+    population = game.population
+    capacity = population.max_population
+    rate = rules.population["growth_rate"]
+    start_deficit = capacity - population.current_population
+    model = event_model(rules)
+    if start_deficit < 0 or capacity <= 0 or len(model.population_events) > MAX_POPULATION_EVENTS:
+        return None
+    outcomes = model.population_outcomes(capacity)
+    deficits = {start_deficit} | {deficit for _, deficit, _ in outcomes}
+    worst = max(deficits)
+    if worst >= capacity or population.accumulated_growth < worst:
+        return None
+
+    # Growth refills a deficit d in one turn while accumulated growth stays at or above the
+    # largest deficit; each turn it changes by (capacity - d) * rate - d
+    turns = limit
+    decline = max(d - (capacity - d) * rate for d in deficits)
+    if decline > 0:
+        turns = min(turns, int((population.accumulated_growth - worst) / decline) + 1)
+
+    # Per-turn resource bounds: least production minus every loss, most production plus every gain
+    gains = {d: production(game, capacity - d) for d in deficits}
+    resources = game.resources.resources
+    low, high = {}, {}
+    for resource in rules.resource_names:
+        produced = [g[resource] for g in gains.values()]
+        low[resource] = min(produced) + model.losses[resource]
+        high[resource] = max(produced) + model.gains[resource]
+    for resource in game.VITAL_RESOURCES:
+        if resources.get(resource, 0) <= 0 or low[resource] < 0:
+            return None
+
+    # End the stretch on the first turn any locked achievement could unlock, so unlock turns
+    # and the rewards that follow land exactly where turn-by-turn play would put them
+    for details in game.achievements.achievements.values():
+        if details["unlocked"]:
+            continue
+        metric, threshold = details["metric"], details["threshold"]
+        kind, _, name = metric.partition(":")
+        if kind == "resource":
+            turns = min(turns, crossing_turns(resources.get(name, 0), threshold, high[name]))
+        elif metric == "min_resource":
+            turns = min(turns, max(crossing_turns(resources.get(r, 0), threshold, high[r]) for r in rules.resource_names))
+        elif metric == "population":
+            if capacity - min(deficits) >= threshold:
+                turns = 1
+        elif metric != "victory" and metric_reader(metric)(game) >= threshold:
+            turns = 1
+    if turns == math.inf or turns < 1:
+        return None
+    return int(turns), outcomes, gains, model
+
+def jump(game, plan):
+    # Applies a planned steady stretch: event counts are drawn in aggregate from the events
+    # stream, production is summed per population shape, and end-of-turn checks run once
+    turns, outcomes, gains, model = plan
+    rules = game.rules
+    rng = game.rng.events
+    game.rng.jump(game.turn)
+    population = game.population
+    capacity = population.max_population
+    rate = rules.population["growth_rate"]
+    probabilities = [probability for probability, _, _ in outcomes]
+
+    # Population outcome of each turn: turns 1..n-1 set the deficit the next turn starts
+    # with, the last turn sets the final population
+    earlier = rng.multinomial(turns - 1, probabilities)
+    last = rng.multinomial(1, probabilities).index(1)
+    starts = {capacity - population.current_population: 1}
+    fired = {}
+    for count, (_, deficit, indices) in zip(earlier, outcomes):
+        if count:
+            starts[deficit] = starts.get(deficit, 0) + count
+            for idx in indices:
+                fired[idx] = fired.get(idx, 0) + count
+    for idx in outcomes[last][2]:
+        fired[idx] = fired.get(idx, 0) + 1
+    for idx, chance in model.other_events:
+        fired[idx] = rng.binomial(turns, chance)
+
+    resources = game.resources.resources
+    for deficit, count in starts.items():
+        for resource, amount in gains[deficit].items():
+            if amount:
+                resources[resource] += amount * count
+    for idx, count in fired.items():
+        for resource, amount in model.amounts[idx].items():
+            resources[resource] = resources.get(resource, 0) + amount * count
+    resources.clamp()  # Losses the stretch could not absorb clamp once, at the end
+    population.accumulated_growth += sum(((capacity - d) * rate - d) * count for d, count in starts.items())
+    population.current_population = capacity - outcomes[last][1]
+    game.missions.skip(turns)
+    game.buffs.skip(turns)
+
+    # End-of-turn checks for the last turn of the stretch
+    game.turn += turns - 1
+    game.achievements.check_achievements(game)
+    game.check_end_conditions()
+    game.turn += 1
+    if game.output.enabled:
+        game.output.emit("fast_forward", turns=turns, events=sum(fired.values()))
+    return turns
+
+def fast_forward(game, n_turns):
+    # Advances n idle turns: steady stretches are solved in closed form, everything else
+    # (growth towards capacity, buffs, open missions) is played turn by turn
+    target = game.turn + n_turns
+    while game.turn < target and not game.game_over:
+        plan = steady_turns(game, target - game.turn)
+        if plan is None:
+            game.play_turn(actions.wait())
+        else:
+            jump(game, plan)
+    return game.turn
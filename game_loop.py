@@ -1,18 +1,29 @@
 # game_loop.py
 
-from utils import print_separator
-from rich.console import Console
-from rich.table import Table
-from rich.prompt import Prompt, Confirm
-from tqdm import tqdm
-import time
-import random
-from colorama import Fore, Style
-
-console = Console()
+from utils import print_separator, console, Table
+import actions
+from rng import GameRng
+from output import terminal_output, null_output
+import fastforward
+from buffs import BuffScheduler
+from missions import MissionManager
+from prompts import TerminalPrompts
+
+def parse_batch(answer):
+    # Menu answer "3", or "3x40" for 40 at once: (menu number, count)
+    choice, separator, count = answer.strip().lower().partition("x")
+    return int(choice), int(count) if separator else 1
+
+def affordability(most):
+    if most is None:
+        return "[green]Yes[/green]"
+    return f"[green]Yes, up to {most}[/green]" if most else "[red]No[/red]"
 
 class GameLoop:
-    def __init__(self, player, agent, population, resources, buildings, event_manager, achievements):
+    VITAL_RESOURCES = ("Light", "Water")  # The civilization is lost when either runs out
+
+    def __init__(self, player, agent, population, resources, buildings, event_manager, achievements, headless=False, seed=None, output=None):
+        self.rules = resources.rules  # Static game data shared by every subsystem
         self.player = player
         self.agent = agent
         self.population = population
@@ -22,32 +33,97 @@ class GameLoop:
         self.achievements = achievements
         self.turn = 1
         self.game_over = False
-        self.active_buffs = []  # List to hold active buffs
-        self.missions = []  # List to hold active missions
+        self.outcome = None  # "victory", "depleted" or "quit" once the game is over
+        self.buffs = BuffScheduler(self.rules)  # Active buffs and their combined per-turn effect
+        self.missions = MissionManager(self.rules)  # Open missions and the completed-mission archive
+        self.headless = headless  # Headless games take Actions instead of prompts
+        self.journal = None  # Optional journal.TurnJournal recording every turn
+        self.dashboard = None  # Optional dashboard.Dashboard shown in place of the status tables
+        # Independent random streams per subsystem, repositioned at the start of every turn
+        self.rng = GameRng(seed)
+        self.resources.rng = self.rng.gather
+        self.event_manager.rng = self.rng.events
+        self.agent.rng = self.rng.advisor
+        # Structured message bus shared by every subsystem; headless games default to the null sink
+        self.output = output or (null_output() if headless else terminal_output(self.rules))
+        for subsystem in (player, agent, population, resources, buildings, event_manager, achievements):
+            subsystem.output = self.output
+        self.action_handlers = {
+            actions.GATHER: lambda action: self.do_gather(),
+            actions.BUILD: lambda action: self.do_build(action.target, action.count),
+            actions.UPGRADE_POPULATION: lambda action: self.do_upgrade_population(),
+            actions.ACCEPT_MISSION: lambda action: self.do_accept_mission(action.target),
+            actions.UPGRADE_BUILDING: lambda action: self.do_upgrade_building(action.target, action.count),
+            actions.USE_PORTAL: lambda action: self.do_use_portal(),
+            actions.QUIT: lambda action: self.do_quit(),
+            actions.WAIT: lambda action: False
+        }
+        self.prompts = TerminalPrompts()  # Answers to interactive questions; replay.py swaps in a script
+        # Phases of an interactive turn, in order; resolve_turn runs the resolve phases
+        self.turn_phases = [self.provide_tip, self.display_status, self.player_turn,
+                            self.display_action_outcomes, self.resolve_turn, self.end_turn_pause]
+        self.resolve_phases = [self.update_game_state, self.apply_active_buffs, self.trigger_events,
+                               self.check_achievements, self.check_end_conditions, self.manage_missions]
 
     def start(self):
         self.agent.set_player_name(self.player.name)
         self.agent.introduce()
         while not self.game_over:
+            self.begin_turn()
             self.display_turn_separator()
             console.print(f"[bold magenta]=== Turn {self.turn} ===[/bold magenta]")
-            self.agent.provide_tip()
-            self.display_status()
-            self.player_turn()
-            self.display_action_outcomes()
-            self.update_game_state()
-            self.apply_active_buffs()
-            self.event_manager.trigger_event(self)
-            self.achievements.check_achievements(self)
-            self.check_end_conditions()
-            self.manage_missions()
-            input(Fore.GREEN + "\nPress Enter to continue to the next turn..." + Style.RESET_ALL)
+            for phase in self.turn_phases:
+                phase()
             self.turn += 1
 
+    def play_turn(self, action):
+        # Headless turn: apply one Action, then run every end-of-turn phase
+        self.begin_turn()
+        performed = self.apply_action(action)
+        self.resolve_turn()
+        self.turn += 1
+        return performed
+
+    def fast_forward(self, n_turns):
+        # Idle for n turns; steady stretches are solved in closed form instead of played
+        return fastforward.fast_forward(self, n_turns)
+
+    def begin_turn(self):
+        if self.journal is not None:
+            self.journal.begin_turn(self)
+        # Draws for turn K depend only on the seed and K, never on earlier turns
+        self.rng.jump(self.turn)
+        self.resources.pending_gains = None
+
+    def apply_action(self, action):
+        handler = self.action_handlers.get(action.kind)
+        if handler is None:
+            raise ValueError(f"Unknown action kind: {action.kind!r}")
+        performed = handler(action)
+        if performed:
+            self.record_action(action)
+        return performed
+
+    def resolve_turn(self):
+        for phase in self.resolve_phases:
+            phase()
+        if self.journal is not None:
+            self.journal.end_turn(self)
+
+    def provide_tip(self):
+        self.agent.provide_tip(self)
+
+    def end_turn_pause(self):
+        from colorama import Fore, Style
+        self.prompts.pause(Fore.GREEN + "\nPress Enter to continue to the next turn..." + Style.RESET_ALL)
+
     def display_turn_separator(self):
         print_separator()
 
     def display_status(self):
+        if self.dashboard is not None and self.dashboard.active:
+            self.dashboard.update(self)
+            return
         resources = self.resources.get_resources()
         table = Table(title="Resources", show_header=True, header_style="bold blue")
         table.add_column("Resource", style="cyan", no_wrap=True)
@@ -86,50 +162,45 @@ class GameLoop:
         console.print(achievements_text)
         
         # Display Active Buffs
-        if self.active_buffs:
+        if self.buffs:
             buffs_table = Table(title="Active Buffs", show_header=True, header_style="bold blue")
             buffs_table.add_column("Buff", style="cyan", no_wrap=True)
             buffs_table.add_column("Description", style="magenta")
             buffs_table.add_column("Turns Left", style="green", justify="right")
-            for buff in self.active_buffs:
-                buffs_table.add_row(buff['name'], buff['description'], str(buff['turns_left']))
+            for buff in self.buffs:
+                buffs_table.add_row(buff.name, buff.description, str(self.buffs.turns_left(buff)))
             console.print(buffs_table)
         
-        # Display Active Missions
+        # Display Active Missions, then the completed ones
         if self.missions:
-            missions_table = Table(title="Active Missions", show_header=True, header_style="bold blue")
-            missions_table.add_column("Mission", style="cyan", no_wrap=True)
-            missions_table.add_column("Description", style="magenta")
-            missions_table.add_column("Status", style="green")
-            for mission in self.missions:
-                status = "Completed" if mission['completed'] else f"Turns Left: {mission['turns_left']}"
-                missions_table.add_row(mission['name'], mission['description'], status)
-            console.print(missions_table)
+            console.print(self.active_missions_table(title="Active Missions"))
+        if self.missions.archive:
+            console.print(self.completed_missions_table(title="Completed Missions"))
         print_separator()
 
     def player_turn(self):
         console.print("\n[bold yellow]Choose an action:[/bold yellow]")
         # Define the main menu options with emojis
         actions = [
-            {"number": "1", "description": "Gather Resources 🌾", "action": self.gather_resources},
-            {"number": "2", "description": "Build a Structure 🏗️", "action": self.build_structure},
-            {"number": "3", "description": "Upgrade Population 👥", "action": self.upgrade_population},
-            {"number": "4", "description": "View Achievements 🏆", "action": self.view_achievements},
-            {"number": "5", "description": "View Active Missions 📜", "action": self.view_active_missions},
-            {"number": "6", "description": "Accept Mission ✉️", "action": self.accept_mission},
-            {"number": "7", "description": "Upgrade Building 🔧", "action": self.upgrade_building},
-            {"number": "8", "description": "Quit Game 🚪", "action": self.quit_game}
+            {"number": "1", "key": "gather", "description": "Gather Resources 🌾", "action": self.gather_resources},
+            {"number": "2", "key": "build", "description": "Build a Structure 🏗️", "action": self.build_structure},
+            {"number": "3", "key": "upgrade_population", "description": "Upgrade Population 👥", "action": self.upgrade_population},
+            {"number": "4", "key": "achievements", "description": "View Achievements 🏆", "action": self.view_achievements},
+            {"number": "5", "key": "missions", "description": "View Active Missions 📜", "action": self.view_active_missions},
+            {"number": "6", "key": "accept_mission", "description": "Accept Mission ✉️", "action": self.accept_mission},
+            {"number": "7", "key": "upgrade_building", "description": "Upgrade Building 🔧", "action": self.upgrade_building},
+            {"number": "8", "key": "quit", "description": "Quit Game 🚪", "action": self.quit_game}
         ]
 
         # If Victory is achieved, add a new option
         if self.achievements.achievements.get("Victory", {}).get("unlocked", False):
-            actions.append({"number": "9", "description": "Use Portal 🎉", "action": self.use_portal})
+            actions.append({"number": "9", "key": "portal", "description": "Use Portal 🎉", "action": self.use_portal})
 
         # Display the menu with colors and emojis
         for option in actions:
             console.print(f"[green]{option['number']}.[/green] {option['description']}")
 
-        choice = Prompt.ask("Enter the number of your choice", default="1")
+        choice = self.prompts.choose("menu", "Enter the number of your choice", [option["key"] for option in actions])
 
         # Map choice to action
         for option in actions:
@@ -148,36 +219,20 @@ class GameLoop:
             preview_table.add_row(f"{symbol} {resource}", f"+{amount}")
         console.print(preview_table)
         
-        confirm = Confirm.ask("Do you want to proceed with gathering resources?")
+        confirm = self.prompts.confirm("gather", "Do you want to proceed with gathering resources?")
         if confirm:
-            self.resources.gather()
-            self.player.gain_experience(10)  # Example experience gain
-            self.record_action("Gather Resources")
+            self.apply_action(actions.gather())
         else:
             console.print("[bold yellow]Gather Resources action canceled.[/bold yellow]")
 
+    def do_gather(self):
+        self.resources.gather()
+        self.player.gain_experience(self.rules.experience["gather"])
+        return True
+
     def preview_gather(self):
-        # Define possible resource gains
-        possible_gains = {
-            "Light": (5, 15),       # Gain between 5 to 15 Light
-            "Water": (10, 20),      # Gain between 10 to 20 Water
-            "Energy": (5, 10),      # Gain between 5 to 10 Energy
-            "Food": (0, 5)          # Occasionally gain Food
-        }
-        # Randomly determine gains
-        light_gained = random.randint(*possible_gains["Light"])
-        water_gained = random.randint(*possible_gains["Water"])
-        energy_gained = random.randint(*possible_gains["Energy"])
-        food_gained = random.randint(*possible_gains["Food"])
-
-        # Create a dictionary of potential gains
-        preview = {
-            "Light": light_gained,
-            "Water": water_gained,
-            "Energy": energy_gained,
-            "Food": food_gained
-        }
-        return preview
+        # Shares the draws that the following gather commits
+        return self.resources.preview_gather()
 
     def build_structure(self):
         available_buildings = self.buildings.list_available_buildings()
@@ -192,33 +247,31 @@ class GameLoop:
         building_table.add_column("Cost", style="green")
         building_table.add_column("Affordability", style="yellow")
 
+        # How many of each the player can afford, worked out once for the table and the choice
+        most_affordable = []
         for idx, building in enumerate(available_buildings, start=1):
             cost_str = ", ".join([f"{self.resources.get_resource_symbol(res)} {res}: {amt}" for res, amt in building['cost'].items()])
-            can_afford = self.buildings.can_afford_building(building, self.resources)
-            affordability = "[green]Yes[/green]" if can_afford else "[red]No[/red]"
-            building_table.add_row(str(idx), f"{building['emoji']} {building['name']}", cost_str, affordability)
+            most_affordable.append(self.buildings.max_affordable(building, self.resources))
+            building_table.add_row(str(idx), f"{building['emoji']} {building['name']}", cost_str, affordability(most_affordable[-1]))
 
         console.print(building_table)
 
-        choice = Prompt.ask("Enter the number of the building you want to construct", default="1")
+        choice = self.prompts.choose("build", "Enter the number of the building you want to construct (3x10 builds ten of number 3)",
+                                     [building["name"] for building in available_buildings])
         try:
-            choice = int(choice)
-            if 1 <= choice <= len(available_buildings):
+            choice, count = parse_batch(choice)
+            if 1 <= choice <= len(available_buildings) and count >= 1:
                 selected = available_buildings[choice - 1]
-                if self.buildings.can_afford_building(selected, self.resources):
-                    if self.resources.spend_resources(selected["cost"]):
-                        # Simulate building time with tqdm
-                        console.print(f"\n[bold magenta]Constructing {selected['name']}...[/bold magenta]")
-                        for _ in tqdm(range(10), desc="Building", unit="step"):
-                            time.sleep(0.1)
-                        self.buildings.buildings[selected["name"]] = self.buildings.buildings.get(selected["name"], 0) + 1
-                        console.print(f"[bold green]{selected['name']} constructed successfully.[/bold green]")
-                        self.player.gain_experience(15)
-                        
-                        # Check achievements after construction
-                        self.achievements.check_achievements(self)
-
-                        return  # Ensure the function exits after one construction
+                most = most_affordable[choice - 1]
+                if most is None or count <= most:
+                    # Simulate building time, once for the whole batch
+                    label = selected['name'] if count == 1 else f"{count} x {selected['name']}"
+                    console.print(f"\n[bold magenta]Constructing {label}...[/bold magenta]")
+                    self.prompts.progress("Building", 10, 0.1)
+                    self.apply_action(actions.build(selected["name"], count))
+                    return  # Ensure the function exits after one construction
+                elif count > 1 and most:
+                    console.print(f"[bold red]You can only afford {most} x {selected['name']}.[/bold red]")
                 else:
                     console.print(f"[bold red]You do not have enough resources to construct {selected['name']}.[/bold red]")
             else:
@@ -228,47 +281,73 @@ class GameLoop:
 
         return  # Ensure the function exits if no valid action is taken
 
+    def do_build(self, building_name, count=1):
+        if not self.buildings.construct(building_name, self.resources, count):
+            return False
+        self.player.gain_experience(self.rules.experience["build"] * count)
+        # Check achievements after construction
+        self.achievements.check_achievements(self)
+        return True
+
     def upgrade_population(self):
-        upgrade_cost = {"Light": 100, "Energy": 50}
+        upgrade_cost = self.rules.population["upgrade_cost"]
         console.print("\n[bold yellow]Upgrade Population Capacity:[/bold yellow]")
         upgrade_table = Table(show_header=False, show_edge=False)
         upgrade_table.add_column("Cost", style="green")
         upgrade_table.add_row(", ".join([f"{self.resources.get_resource_symbol(res)} {res}: {amt}" for res, amt in upgrade_cost.items()]))
         console.print(upgrade_table)
 
-        confirm = Confirm.ask("Do you want to proceed with upgrading population capacity?")
+        confirm = self.prompts.confirm("upgrade_population", "Do you want to proceed with upgrading population capacity?")
         if confirm:
-            if self.population.upgrade_population(self.resources):
-                # Simulate upgrading time with tqdm
+            if self.apply_action(actions.upgrade_population()):
+                # Simulate upgrading time
                 console.print(f"\n[bold magenta]Upgrading Population Capacity...[/bold magenta]")
-                for _ in tqdm(range(5), desc="Upgrading", unit="step"):
-                    time.sleep(0.2)
+                self.prompts.progress("Upgrading", 5, 0.2)
                 console.print(f"[bold green]Population capacity increased to {self.population.max_population}.[/bold green]")
-                self.player.gain_experience(20)  # Example experience gain
-                self.record_action("Upgrade Population")
-            else:
-                console.print("[bold red]Insufficient resources to upgrade population capacity.[/bold red]")
         else:
             console.print("[bold yellow]Upgrade Population action canceled.[/bold yellow]")
 
+    def do_upgrade_population(self):
+        if not self.population.upgrade_population(self.resources):
+            return False
+        self.player.gain_experience(self.rules.experience["upgrade_population"])
+        return True
+
     def view_achievements(self):
         self.achievements.display_achievements()
-        input("\nPress Enter to continue...")  # Pause to allow the player to view the achievements
-        self.record_action("View Achievements")
+        self.prompts.pause("\nPress Enter to continue...")  # Pause to allow the player to view the achievements
 
     def view_active_missions(self):
-        if not self.missions:
+        if self.missions:
+            console.print("\n[bold cyan]Active Missions:[/bold cyan]")
+            console.print(self.active_missions_table())
+        else:
             console.print("\n[bold cyan]You have no active missions.[/bold cyan]")
-            return
-        console.print("\n[bold cyan]Active Missions:[/bold cyan]")
-        missions_table = Table(show_header=True, header_style="bold blue")
-        missions_table.add_column("Mission", style="cyan")
+        if self.missions.archive:
+            console.print("\n[bold cyan]Completed Missions:[/bold cyan]")
+            console.print(self.completed_missions_table())
+
+    def missions_table(self, title=None):
+        missions_table = Table(title=title, show_header=True, header_style="bold blue")
+        missions_table.add_column("Mission", style="cyan", no_wrap=True)
         missions_table.add_column("Description", style="magenta")
         missions_table.add_column("Status", style="green")
+        return missions_table
+
+    def active_missions_table(self, title=None):
+        # Open missions only; completed ones are in the archive
+        missions_table = self.missions_table(title)
         for mission in self.missions:
-            status = "Completed" if mission['completed'] else f"Turns Left: {mission['turns_left']}"
-            missions_table.add_row(mission['name'], mission['description'], status)
-        console.print(missions_table)
+            missions_table.add_row(mission.name, mission.details['description'], f"Turns Left: {self.missions.turns_left(mission)}")
+        return missions_table
+
+    def completed_missions_table(self, title=None):
+        # One row per mission in the archive, with the times it was completed
+        missions_table = self.missions_table(title)
+        for name, count in self.missions.archive.items():
+            status = "Completed" if count == 1 else f"Completed x{count}"
+            missions_table.add_row(name, self.rules.mission_by_name[name]['description'], status)
+        return missions_table
 
     def accept_mission(self):
         available_missions = self.get_available_missions()
@@ -284,25 +363,29 @@ class GameLoop:
             missions_table.add_row(str(idx), mission['name'], mission['description'])
         console.print(missions_table)
 
-        choice = Prompt.ask("Enter the number of the mission you want to accept", default="1")
+        choice = self.prompts.choose("mission", "Enter the number of the mission you want to accept",
+                                     [mission["name"] for mission in available_missions])
         try:
             choice = int(choice)
             if 1 <= choice <= len(available_missions):
                 selected = available_missions[choice - 1]
-                self.missions.append({
-                    "name": selected['name'],
-                    "description": selected['description'],
-                    "reward": selected['reward'],
-                    "turns_left": selected['duration'],
-                    "completed": False
-                })
-                console.print(f"\n[bold magenta]Mission '{selected['name']}' has been accepted![/bold magenta]")
-                self.record_action("Accept Mission")
+                self.apply_action(actions.accept_mission(selected['name']))
             else:
                 console.print("[bold red]Invalid choice.[/bold red]")
         except ValueError:
             console.print("[bold red]Invalid input. Please enter a number.[/bold red]")
 
+    def do_accept_mission(self, mission_name):
+        for mission in self.get_available_missions():
+            if mission['name'] == mission_name:
+                self.missions.add(mission, mission['duration'], self)
+                if self.output.enabled:
+                    self.output.emit("mission_accepted", name=mission_name)
+                return True
+        if self.output.enabled:
+            self.output.emit("mission_unavailable", name=mission_name)
+        return False
+
     def upgrade_building(self):
         buildings = self.buildings.list_buildings()
         if not buildings:
@@ -313,27 +396,41 @@ class GameLoop:
         building_table.add_column("Number", style="cyan")
         building_table.add_column("Building", style="magenta")
         building_table.add_column("Count", style="green", justify="right")
+        building_table.add_column("Upgrades", style="yellow")
+        most_upgrades = []
         for idx, (building, count) in enumerate(buildings.items(), start=1):
             emoji = self.buildings.get_building_emoji(building)
-            building_table.add_row(str(idx), f"{emoji} {building}", str(count))
+            most_upgrades.append(self.buildings.max_upgrades(building, self.resources))
+            building_table.add_row(str(idx), f"{emoji} {building}", str(count), affordability(most_upgrades[-1]))
         console.print(building_table)
 
-        choice = Prompt.ask("Enter the number of the building you want to upgrade", default="1")
+        choice = self.prompts.choose("upgrade", "Enter the number of the building you want to upgrade (3x10 upgrades number 3 ten times)",
+                                     list(buildings))
         try:
-            choice = int(choice)
-            if 1 <= choice <= len(buildings):
+            choice, count = parse_batch(choice)
+            if 1 <= choice <= len(buildings) and count >= 1:
                 selected_building = list(buildings.keys())[choice - 1]
-                if self.buildings.can_upgrade_building(selected_building, self.resources):
-                    # Simulate upgrading time with tqdm
-                    console.print(f"\n[bold magenta]Upgrading {selected_building}...[/bold magenta]")
-                    for _ in tqdm(range(10), desc="Upgrading", unit="step"):
-                        time.sleep(0.1)
-                    if self.buildings.upgrade_building(selected_building, self.resources):
-                        console.print(f"[bold green]{selected_building} has been upgraded successfully.[/bold green]")
-                        self.player.gain_experience(25)  # Example experience gain
-                        self.record_action("Upgrade Building")
+                upgrade_cost = self.buildings.get_upgrade_cost(selected_building)
+                most = most_upgrades[choice - 1]
+                label = selected_building if count == 1 else f"{count} x {selected_building}"
+                if not upgrade_cost:
+                    console.print(f"[bold yellow]{selected_building} cannot be upgraded.[/bold yellow]")
+                elif most is None or count <= most:
+                    console.print(f"\n[bold yellow]Upgrade Cost for {label}:[/bold yellow]")
+                    upgrade_table = Table(show_header=False, show_edge=False)
+                    upgrade_table.add_column("Cost", style="green")
+                    upgrade_table.add_row(", ".join([f"{self.resources.get_resource_symbol(res)} {res}: {amt * count}" for res, amt in upgrade_cost.items()]))
+                    console.print(upgrade_table)
+                    if self.prompts.confirm("upgrade_building", "Do you want to proceed with the upgrade?"):
+                        # Simulate upgrading time, once for the whole batch
+                        console.print(f"\n[bold magenta]Upgrading {label}...[/bold magenta]")
+                        self.prompts.progress("Upgrading", 10, 0.1)
+                        if not self.apply_action(actions.upgrade_building(selected_building, count)):
+                            console.print(f"[bold red]Failed to upgrade {label} due to insufficient resources.[/bold red]")
                     else:
-                        console.print(f"[bold red]Failed to upgrade {selected_building} due to insufficient resources.[/bold red]")
+                        console.print("[bold yellow]Upgrade action canceled.[/bold yellow]")
+                elif count > 1 and most:
+                    console.print(f"[bold red]You can only afford {most} upgrades of {selected_building}.[/bold red]")
                 else:
                     console.print(f"[bold red]You do not have enough resources to upgrade {selected_building}.[/bold red]")
             else:
@@ -341,83 +438,75 @@ class GameLoop:
         except ValueError:
             console.print("[bold red]Invalid input. Please enter a number.[/bold red]")
 
+    def do_upgrade_building(self, building_name, count=1):
+        if not self.buildings.upgrade_building(building_name, self.resources, count):
+            return False
+        self.player.gain_experience(self.rules.experience["upgrade_building"] * count)
+        return True
+
     def quit_game(self):
+        self.apply_action(actions.quit_game())
+
+    def do_quit(self):
         self.game_over = True
-        console.print("[bold red]Thank you for playing![/bold red]")
+        self.outcome = "quit"
+        if self.output.enabled:
+            self.output.emit("quit")
+        return True
 
     def use_portal(self):
-        console.print("\n[bold green]🌟 You have used the Dimensional Gate to traverse dimensions successfully! 🌟[/bold green]")
-        console.print("[bold green]🎉 Congratulations! You have completed your journey and won the game![/bold green]")
-        input(Fore.GREEN + "\nPress Enter to close the game..." + Style.RESET_ALL)  # Pause for the player to press Enter
+        from colorama import Fore, Style
+        self.apply_action(actions.use_portal())
+        self.prompts.pause(Fore.GREEN + "\nPress Enter to close the game..." + Style.RESET_ALL)  # Pause for the player to press Enter
+
+    def do_use_portal(self):
+        if not self.achievements.achievements.get("Victory", {}).get("unlocked", False):
+            if self.output.enabled:
+                self.output.emit("portal_locked")
+            return False
+        if self.output.enabled:
+            self.output.emit("portal_used")
         self.game_over = True
+        self.outcome = "victory"
+        return True
 
-    def record_action(self, action_name):
-        # Placeholder for any future action recording or logging
-        pass
+    def record_action(self, action):
+        if self.journal is not None:
+            self.journal.record_action(action)
 
     def display_action_outcomes(self):
         # Print separation bar after player action
         print_separator()
-        time.sleep(0.5)  # Small pause for readability
+        self.prompts.delay(0.5)  # Small pause for readability
 
     def update_game_state(self):
         # Automatically generate resources each turn, considering buildings
         self.resources.generate_automatic_resources(self.population, self.buildings)
         self.population.grow()
 
+    def trigger_events(self):
+        self.event_manager.trigger_event(self)
+
+    def check_achievements(self):
+        self.achievements.check_achievements(self)
+
     def apply_active_buffs(self):
-        # Apply buffs at the start of the turn
-        for buff in self.active_buffs[:]:
-            if buff['type'] == 'population':
-                self.population.current_population += buff['value']
-                console.print(f"[bold magenta][Buff] {buff['name']} applied: +{buff['value']} Population.[/bold magenta]")
-            elif buff['type'] == 'resource':
-                resource = buff['resource']
-                self.resources.modify_resource(resource, buff['value'])
-                operation = "+" if buff['value'] >= 0 else ""
-                console.print(f"[bold magenta][Buff] {buff['name']} applied: {operation}{buff['value']} {resource}.[/bold magenta]")
-            # Decrement turns left
-            buff['turns_left'] -= 1
-            if buff['turns_left'] <= 0:
-                console.print(f"[bold blue][Buff] {buff['name']} has expired.[/bold blue]")
-                self.active_buffs.remove(buff)
+        # Apply the combined effect of every active buff, then retire the ones that ran out
+        self.buffs.apply(self)
 
     def add_buff(self, name, buff_type, description, value, turns, resource=None):
-        buff = {
-            "name": name,
-            "type": buff_type,  # 'population' or 'resource'
-            "description": description,
-            "value": value,
-            "turns_left": turns
-        }
-        if resource:
-            buff["resource"] = resource
-        self.active_buffs.append(buff)
-        console.print(f"\n[bold magenta][Buff] {name} has been activated: {description} for {turns} turns.[/bold magenta]")
+        self.buffs.add(name, buff_type, description, value, turns, resource)
+        if self.journal is not None:
+            self.journal.record_buff(name, turns)
+        if self.output.enabled:
+            self.output.emit("buff_activated", name=name, description=description, turns=turns)
 
     def get_resource_symbol(self, resource):
-        symbols = {
-            "Light": "✨",
-            "Water": "💧",
-            "Land": "🌍",
-            "Energy": "⚡",
-            "Metal": "🔩",
-            "Food": "🍖",
-            "Technology": "💻"
-        }
-        return symbols.get(resource, "")
+        return self.resources.get_resource_symbol(resource)
 
     def get_resource_color(self, resource):
-        colors = {
-            "Light": Fore.YELLOW,
-            "Water": Fore.BLUE,
-            "Land": Fore.GREEN,
-            "Energy": Fore.RED,
-            "Metal": Fore.CYAN,
-            "Food": Fore.MAGENTA,
-            "Technology": Fore.WHITE
-        }
-        return colors.get(resource, Fore.WHITE)
+        from colorama import Fore
+        return getattr(Fore, self.rules.resource_colors.get(resource, "WHITE"))
 
     def check_end_conditions(self):
         # Define end conditions, e.g., reaching a certain level
@@ -427,61 +516,14 @@ class GameLoop:
             # Or automatically end the game
             # Here, the new menu option is already added, so continue
             pass
-        elif self.resources.resources["Light"] <= 0 or self.resources.resources["Water"] <= 0:
-            console.print("\n[bold red]☠️ Resources depleted! Your civilization cannot survive.[/bold red]")
+        elif any(self.resources.resources[resource] <= 0 for resource in self.VITAL_RESOURCES):
+            if self.output.enabled:
+                self.output.emit("depleted")
             self.game_over = True
+            self.outcome = "depleted"
 
     def manage_missions(self):
-        for mission in self.missions[:]:
-            if not mission['completed']:
-                # Check if mission is completed
-                if mission['name'] == "Resource Gathering":
-                    if self.resources.resources["Light"] >= 100 and self.resources.resources["Water"] >= 100:
-                        mission['completed'] = True
-                        console.print(f"\n[bold green]🎯 Mission Completed: {mission['name']}! Reward: {mission['reward']['description']}[/bold green]")
-                        self.apply_mission_reward(mission['reward'])
-                        self.achievements.check_achievements(self)  # Add here
-
-                elif mission['name'] == "Technological Research":
-                    if self.buildings.buildings.get("Technology Lab", 0) >= 2:
-                        mission['completed'] = True
-                        console.print(f"\n[bold green]🎯 Mission Completed: {mission['name']}! Reward: {mission['reward']['description']}[/bold green]")
-                        self.apply_mission_reward(mission['reward'])
-                        self.achievements.check_achievements(self)  # Add here
-
-                elif mission['name'] == "Agricultural Expansion":
-                    if self.buildings.buildings.get("Farm", 0) >= 3:
-                        mission['completed'] = True
-                        console.print(f"\n[bold green]🎯 Mission Completed: {mission['name']}! Reward: {mission['reward']['description']}[/bold green]")
-                        self.apply_mission_reward(mission['reward'])
-                        self.achievements.check_achievements(self)  # Add here
-
-                elif mission['name'] == "Metal Mining":
-                    if self.resources.resources.get("Metal", 0) >= 200:
-                        mission['completed'] = True
-                        console.print(f"\n[bold green]🎯 Mission Completed: {mission['name']}! Reward: {mission['reward']['description']}[/bold green]")
-                        self.apply_mission_reward(mission['reward'])
-                        self.achievements.check_achievements(self)  # Add here
-
-                elif mission['name'] == "Technological Prowess":
-                    if self.resources.resources.get("Technology", 0) >= 150:
-                        mission['completed'] = True
-                        console.print(f"\n[bold green]🎯 Mission Completed: {mission['name']}! Reward: {mission['reward']['description']}[/bold green]")
-                        self.apply_mission_reward(mission['reward'])
-                        self.achievements.check_achievements(self)  # Add here
-
-            # Decrement turns left
-            mission['turns_left'] -= 1
-            if mission['turns_left'] <= 0 and not mission['completed']:
-                console.print(f"\n[bold red]🚫 Mission Failed: {mission['name']}.[/bold red]")
-                self.missions.remove(mission)
-
-        # Check for "Mission Accomplished" achievement
-        if not self.achievements.achievements.get("Mission Accomplished", {}).get("unlocked", False):
-            completed_missions = len([m for m in self.missions if m['completed']])
-            if completed_missions >= 5:
-                self.achievements.unlock_achievement("Mission Accomplished", self)
-
+        self.missions.advance(self)
 
     def apply_mission_reward(self, reward):
         if reward["type"] == "population":
@@ -503,87 +545,55 @@ class GameLoop:
             )
 
     def get_available_missions(self):
-        # Define a list of missions
-        all_missions = [
-            {
-                "name": "Resource Gathering",
-                "description": "Gather at least 100 Light and 100 Water.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Food",
-                    "value": 50,
-                    "turns": 2,
-                    "description": "Gain +50 Food for the next 2 turns."
-                },
-                "requirements": lambda game: game.resources.resources["Light"] >= 100 and game.resources.resources["Water"] >= 100,
-                "duration": 3
-            },
-            {
-                "name": "Technological Research",
-                "description": "Build 2 Technology Labs.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Technology",
-                    "value": 30,
-                    "turns": 3,
-                    "description": "Gain +30 Technology for the next 3 turns."
-                },
-                "requirements": lambda game: game.buildings.buildings.get("Technology Lab", 0) >= 2,
-                "duration": 4
-            },
-            {
-                "name": "Agricultural Expansion",
-                "description": "Build 3 Farms.",
-                "reward": {
-                    "type": "population",
-                    "value": 10,
-                    "turns": 2,
-                    "description": "Gain +10 Population for the next 2 turns."
-                },
-                "requirements": lambda game: game.buildings.buildings.get("Farm", 0) >= 3,
-                "duration": 3
-            },
-            {
-                "name": "Metal Mining",
-                "description": "Accumulate 200 Metal.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Metal",
-                    "value": 75,
-                    "turns": 2,
-                    "description": "Gain +75 Metal for the next 2 turns."
-                },
-                "requirements": lambda game: game.resources.resources.get("Metal", 0) >= 200,
-                "duration": 3
-            },
-            {
-                "name": "Technological Prowess",
-                "description": "Accumulate 150 Technology.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Technology",
-                    "value": 50,
-                    "turns": 3,
-                    "description": "Gain +50 Technology for the next 3 turns."
-                },
-                "requirements": lambda game: game.resources.resources.get("Technology", 0) >= 150,
-                "duration": 4
-            },
-            {
-                "name": "Cultural Renaissance",
-                "description": "Build 1 Settlement and 2 Farms.",
-                "reward": {
-                    "type": "resource",
-                    "resource": "Light",
-                    "value": 40,
-                    "turns": 3,
-                    "description": "Gain +40 Light for the next 3 turns."
-                },
-                "requirements": lambda game: game.buildings.buildings.get("Settlement", 0) >= 1 and game.buildings.buildings.get("Farm", 0) >= 2,
-                "duration": 4
-            }
-        ]
-        # Filter missions that are not already active and meet requirements
-        active_mission_names = [mission['name'] for mission in self.missions]
-        available = [m for m in all_missions if m['name'] not in active_mission_names and m['requirements'](self)]
-        return available  # Ensure that the full list of available missions is returned
\ No newline at end of file
+        # Missions come from the compiled rules; requirements are data, not per-call lambdas
+        return self.missions.available(self)
+
+    def meets_requirements(self, requirements):
+        vector = requirements.get('resources_fixed') or self.rules.fixed(requirements['resources'])
+        if not self.resources.resources.covers(vector):
+            return False
+        buildings = self.buildings.buildings
+        for building, count in requirements['buildings'].items():
+            if buildings.get(building, 0) < count:
+                return False
+        return True
+
+    def to_dict(self):
+        # Complete state between turns, as plain containers
+        return {
+            "seed": self.rng.seed,
+            "turn": self.turn,
+            "game_over": self.game_over,
+            "outcome": self.outcome,
+            "player": self.player.to_dict(),
+            "agent": self.agent.to_dict(),
+            "population": self.population.to_dict(),
+            "resources": self.resources.to_dict(),
+            "gather_count": self.resources.gather_count,
+            "buildings": self.buildings.to_dict(),
+            "achievements": self.achievements.to_dict(),
+            "active_buffs": self.buffs.to_list(),
+            "missions": self.missions.to_list(),
+            "mission_archive": dict(self.missions.archive)
+        }
+
+    def from_dict(self, data):
+        if data["seed"] != self.rng.seed:
+            self.rng = GameRng(data["seed"])
+            self.resources.rng = self.rng.gather
+            self.event_manager.rng = self.rng.events
+            self.agent.rng = self.rng.advisor
+        self.turn = data["turn"]
+        self.game_over = data["game_over"]
+        self.outcome = data["outcome"]
+        self.player.from_dict(data["player"])
+        self.agent.from_dict(data["agent"])
+        self.population.from_dict(data["population"])
+        self.resources.from_dict(data["resources"])
+        self.resources.gather_count = data["gather_count"]
+        self.resources.pending_gains = None
+        self.buildings.from_dict(data["buildings"])
+        self.resources.invalidate_production()
+        self.achievements.from_dict(data["achievements"])
+        self.buffs.from_list(data["active_buffs"])
+        self.missions.from_list(data["missions"], data["mission_archive"], self)
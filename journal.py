@@ -0,0 +1,245 @@
+# journal.py
+
+import os
+import struct
+from bisect import bisect_right
+from collections import namedtuple
+
+from actions import Action, ACTION_KINDS, WAIT
+from rng import MASK64, STREAMS
+from rules import get_rules
+import savegame
+
+MAGIC = b"DAJ1"
+VERSION = 3  # 2: keyframes use the savegame binary format; 3: actions record their batch count
+
+# File layout: header, then records of (type, payload length, payload). Keyframes are full
+# game states in the savegame format; their (turn, offset) pairs go to a side index file "<path>.idx".
+HEADER = struct.Struct("<4sHQIH")  # magic, version, seed, keyframe interval, resource count
+RECORD = struct.Struct("<BI")
+INDEX_ENTRY = struct.Struct("<qQ")
+TURN_RECORD = 1
+KEYFRAME_RECORD = 2
+
+TURN_HEAD = struct.Struct("<qbI")  # turn, action kind index (-1: no action performed), count
+SHORT = struct.Struct("<H")
+DRAWS = struct.Struct("<" + "I" * len(STREAMS))  # draws taken from each RNG stream this turn
+BUFF = struct.Struct("<H")
+
+# One decoded turn: draws per stream name, fired event indices, (buff name, turns) activations
+# and the change of every resource over the turn, in rules resource order
+TurnRecord = namedtuple("TurnRecord", ["turn", "action", "draws", "events", "buffs", "deltas"])
+
+class JournalError(ValueError):
+    pass
+
+def pack_text(text):
+    data = text.encode("utf-8")
+    return SHORT.pack(len(data)) + data
+
+def unpack_text(payload, offset):
+    (length,) = SHORT.unpack_from(payload, offset)
+    offset += SHORT.size
+    return payload[offset:offset + length].decode("utf-8"), offset + length
+
+class TurnJournal:
+    # Append-only record of a game, one compact binary record per turn. Records are
+    # buffered in memory and written in large batches; a full keyframe of the game state
+    # is written every `keyframe_interval` turns so readers can seek instead of replaying.
+    def __init__(self, path, game, keyframe_interval=1000, buffer_size=1 << 16):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.buffer_size = buffer_size
+        self.resource_names = game.rules.resource_names
+        self.deltas = struct.Struct("<" + "d" * len(self.resource_names))
+        self.buffer = bytearray()
+        self.pending_index = bytearray()
+        self.offset = HEADER.size
+        self.last_keyframe = None
+        self.handle = open(path, "wb")
+        self.index_handle = open(path + ".idx", "wb")
+        self.handle.write(HEADER.pack(MAGIC, VERSION, game.rng.seed & MASK64, keyframe_interval, len(self.resource_names)))
+        self.reset_turn()
+        game.journal = self
+
+    def reset_turn(self):
+        self.action = None
+        self.buffs = []
+        self.start_values = None
+
+    def append(self, record_type, payload):
+        self.buffer += RECORD.pack(record_type, len(payload))
+        self.buffer += payload
+        self.offset += RECORD.size + len(payload)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def begin_turn(self, game):
+        if self.last_keyframe is None or game.turn - self.last_keyframe >= self.keyframe_interval:
+            self.pending_index += INDEX_ENTRY.pack(game.turn, self.offset)
+            self.append(KEYFRAME_RECORD, savegame.dumps(game.to_dict(), game.rules))
+            self.last_keyframe = game.turn
+        resources = game.resources.resources
+        self.start_values = [resources.get(name, 0) for name in self.resource_names]
+
+    def record_action(self, action):
+        self.action = action
+
+    def record_buff(self, name, turns):
+        self.buffs.append((name, turns))
+
+    def end_turn(self, game):
+        action = self.action
+        parts = [TURN_HEAD.pack(game.turn, ACTION_KINDS.index(action.kind) if action else -1, action.count if action else 1)]
+        parts.append(pack_text((action.target or "") if action else ""))
+        parts.append(DRAWS.pack(*(stream.counter for stream in game.rng.streams.values())))
+        fired = game.event_manager.last_fired
+        parts.append(SHORT.pack(len(fired)))
+        parts.append(struct.pack(f"<{len(fired)}H", *fired))
+        parts.append(SHORT.pack(len(self.buffs)))
+        for name, turns in self.buffs:
+            parts.append(pack_text(name))
+            parts.append(BUFF.pack(turns))
+        resources = game.resources.resources
+        start = self.start_values or [0] * len(self.resource_names)
+        parts.append(self.deltas.pack(*(resources.get(name, 0) - before for name, before in zip(self.resource_names, start))))
+        self.append(TURN_RECORD, b"".join(parts))
+        self.reset_turn()
+
+    def flush(self):
+        # Data first, then the index, so the index never points past written data
+        if self.buffer:
+            self.handle.write(self.buffer)
+            self.handle.flush()
+            self.buffer.clear()
+        if self.pending_index:
+            self.index_handle.write(self.pending_index)
+            self.index_handle.flush()
+            self.pending_index.clear()
+
+    def close(self):
+        if not self.handle.closed:
+            self.flush()
+            self.handle.close()
+            self.index_handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class JournalReader:
+    # Reads a journal written by TurnJournal and rebuilds the game at any turn
+    def __init__(self, path, rules=None):
+        self.path = path
+        self.rules = rules or get_rules()
+        with open(path, "rb") as handle:
+            header = handle.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise JournalError(f"{path}: truncated header")
+        magic, version, self.seed, self.keyframe_interval, resource_count = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION:
+            raise JournalError(f"{path}: not a version {VERSION} turn journal")
+        self.deltas = struct.Struct("<" + "d" * resource_count)
+        self.keyframe_turns, self.keyframe_offsets = self.load_index()
+
+    def load_index(self):
+        turns, offsets = [], []
+        index_path = self.path + ".idx"
+        if os.path.exists(index_path):
+            with open(index_path, "rb") as handle:
+                data = handle.read()
+            for turn, offset in INDEX_ENTRY.iter_unpack(data[:len(data) - len(data) % INDEX_ENTRY.size]):
+                turns.append(turn)
+                offsets.append(offset)
+        else:
+            # Index lost: rebuild it with one pass over the record headers
+            for record_type, payload, offset in self.records(HEADER.size):
+                if record_type == KEYFRAME_RECORD:
+                    turns.append(savegame.loads(payload, self.rules)["turn"])
+                    offsets.append(offset)
+        return turns, offsets
+
+    def records(self, offset=HEADER.size):
+        # Yields (type, payload, offset) from the given offset; stops at a truncated tail
+        with open(self.path, "rb", buffering=1 << 16) as handle:
+            handle.seek(offset)
+            while True:
+                head = handle.read(RECORD.size)
+                if len(head) < RECORD.size:
+                    return
+                record_type, length = RECORD.unpack(head)
+                payload = handle.read(length)
+                if len(payload) < length:
+                    return
+                yield record_type, payload, offset
+                offset += RECORD.size + length
+
+    def decode_turn(self, payload):
+        turn, kind, count = TURN_HEAD.unpack_from(payload, 0)
+        target, offset = unpack_text(payload, TURN_HEAD.size)
+        action = Action(ACTION_KINDS[kind], target or None, count) if kind >= 0 else None
+        draws = dict(zip(STREAMS, DRAWS.unpack_from(payload, offset)))
+        offset += DRAWS.size
+        (count,) = SHORT.unpack_from(payload, offset)
+        offset += SHORT.size
+        events = struct.unpack_from(f"<{count}H", payload, offset)
+        offset += 2 * count
+        (count,) = SHORT.unpack_from(payload, offset)
+        offset += SHORT.size
+        buffs = []
+        for _ in range(count):
+            name, offset = unpack_text(payload, offset)
+            (turns,) = BUFF.unpack_from(payload, offset)
+            offset += BUFF.size
+            buffs.append((name, turns))
+        deltas = self.deltas.unpack_from(payload, offset)
+        return TurnRecord(turn, action, draws, events, buffs, deltas)
+
+    def turns(self, start_turn=None):
+        # Decoded turn records, starting at the keyframe at or before start_turn
+        offset = HEADER.size if start_turn is None else self.keyframe_before(start_turn)[1]
+        for record_type, payload, _ in self.records(offset):
+            if record_type == TURN_RECORD:
+                record = self.decode_turn(payload)
+                if start_turn is None or record.turn >= start_turn:
+                    yield record
+
+    def keyframe_before(self, turn):
+        position = bisect_right(self.keyframe_turns, turn) - 1
+        if position < 0:
+            raise JournalError(f"No keyframe at or before turn {turn}")
+        return self.keyframe_turns[position], self.keyframe_offsets[position]
+
+    def load_keyframe(self, offset):
+        for record_type, payload, _ in self.records(offset):
+            if record_type != KEYFRAME_RECORD:
+                raise JournalError(f"No keyframe at offset {offset}")
+            return savegame.loads(payload, self.rules)
+        raise JournalError(f"No keyframe at offset {offset}")
+
+    def seek(self, turn, verify=True):
+        # Headless game positioned at the start of `turn`: restore the nearest keyframe, then
+        # replay the recorded actions. With verify, the replayed event draws must match; the
+        # gather and advisor streams also move with interactive-only previews and tips.
+        from main import create_game
+        keyframe_turn, offset = self.keyframe_before(turn)
+        game = create_game(headless=True, seed=self.seed, rules=self.rules)
+        game.from_dict(self.load_keyframe(offset))
+        if keyframe_turn == turn:
+            return game
+        for record_type, payload, _ in self.records(offset):
+            if record_type != TURN_RECORD:
+                continue
+            record = self.decode_turn(payload)
+            if record.turn >= turn:
+                break
+            game.play_turn(record.action or Action(WAIT))
+            if verify:
+                if (game.rng.events.counter != record.draws["events"]
+                        or tuple(game.event_manager.last_fired) != record.events):
+                    raise JournalError(f"Replay diverged from the journal at turn {record.turn}")
+        if game.turn != turn:
+            raise JournalError(f"Journal ends before turn {turn}")
+        return game
@@ -8,30 +8,92 @@ from resources import ResourceManager
 from buildings import BuildingManager
 from events import EventManager
 from achievements import AchievementManager
-from colorama import init, Fore, Style
+from rules import get_rules
+from savegame import apply_scenario
+
+# Only the interactive entry point below imports argparse and the UI libraries; headless
+# callers of create_game (batch, tournament, server) start without them
+
+def create_game(player_name="Leader", headless=False, seed=None, rules=None, output=None, scenario=None):
+    # Initialize game components; every subsystem shares one compiled rules object
+    rules = rules or get_rules()
+    player = Player(name=player_name)
+    agent = AdvisingAgent()
+    population = Population(rules)
+    resources = ResourceManager(rules)
+    buildings = BuildingManager(rules)
+    event_manager = EventManager(rules)
+    achievements = AchievementManager(rules)
+    game = GameLoop(player, agent, population, resources, buildings, event_manager, achievements, headless=headless, seed=seed, output=output)
+    if scenario:
+        apply_scenario(game, scenario)  # Saved game or JSON scenario to start from
+    return game
 
 def main():
+    import argparse
+    from colorama import init, Fore, Style
     # Initialize colorama
     init(autoreset=True)
-    
+    parser = argparse.ArgumentParser(description="Play Dimensional Architect.")
+    parser.add_argument("--scenario", help="Saved game or JSON scenario file to start from")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the game's random streams")
+    parser.add_argument("--record", metavar="SCRIPT", help="Write every answer you give to an input script")
+    parser.add_argument("--replay", metavar="SCRIPT", help="Play an input script at full speed and report phase timings")
+    parser.add_argument("--show", action="store_true", help="Show the game screens while replaying")
+    parser.add_argument("--dashboard", action="store_true", help="Keep the status pinned at the top of the terminal")
+    parser.add_argument("--trace", metavar="FILE", help="With --replay, write a Chrome trace of every phase call")
+    parser.add_argument("--cprofile", action="store_true", help="With --replay, also report the top functions from cProfile")
+    parser.add_argument("--tracemalloc", action="store_true", help="With --replay, also report memory allocated per phase")
+    args = parser.parse_args()
+
+    if args.replay:
+        run_replay(args.replay, args.show, args.trace, args.cprofile, args.tracemalloc, args.dashboard)
+        return
+
     # Prompt player for their name
     player_name = input(Fore.CYAN + "Enter your name, Leader of the Civilization: " + Style.RESET_ALL).strip()
     if not player_name:
         player_name = "Leader"
         print(Fore.YELLOW + "No name entered. Defaulting to 'Leader'." + Style.RESET_ALL)
-    
-    # Initialize game components
-    player = Player(name=player_name)
-    agent = AdvisingAgent()
-    population = Population()
-    resources = ResourceManager()
-    buildings = BuildingManager()
-    event_manager = EventManager()
-    achievements = AchievementManager()
-    
+
     # Initialize game loop
-    game = GameLoop(player, agent, population, resources, buildings, event_manager, achievements)
-    game.start()
+    game = create_game(player_name, seed=args.seed, scenario=args.scenario)
+    if args.dashboard:
+        from dashboard import Dashboard
+        from utils import console
+        game.dashboard = Dashboard(console)
+        game.dashboard.start()
+    try:
+        if args.record:
+            from replay import record
+            with record(game, args.record, args.scenario):
+                game.start()
+        else:
+            game.start()
+    finally:
+        if game.dashboard is not None:
+            game.dashboard.stop()
+
+def run_replay(path, show=False, trace=None, cprofile=False, memory=False, dashboard=False):
+    from replay import replay, ReplayError
+    from profiling import Profiler
+    from utils import console
+    profiler = Profiler(trace=bool(trace), cprofile=cprofile, memory=memory)
+    try:
+        game, profiler, elapsed = replay(path, show=show, profiler=profiler, dashboard=dashboard)
+    except ReplayError as exc:
+        console.print(f"[bold red]Replay failed: {exc}[/bold red]")
+        raise SystemExit(1)
+    turns = game.turn - 1
+    console.print(f"Replayed {turns} turns in {elapsed:.3f}s ({turns / elapsed:.0f} turns/s), outcome: {game.outcome}")
+    console.print(profiler.table())
+    if cprofile:
+        print(profiler.profile_report())
+    if memory:
+        print(profiler.memory_report())
+    if trace:
+        profiler.write_trace(trace)
+        console.print(f"Trace written to {trace}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,176 @@
+# missions.py
+
+from bisect import bisect_left, bisect_right, insort
+from heapq import heappop, heappush
+from math import inf
+
+from achievements import metric_reader
+
+def mission_conditions(details):
+    # A mission is complete once every requirement it was offered under holds again at the
+    # end of a turn; each requirement is a metric reading compared to a threshold
+    requirements = details["requirements"]
+    conditions = [(f"resource:{name}", amount) for name, amount in requirements["resources"].items()]
+    conditions += [(f"building:{name}", count) for name, count in requirements["buildings"].items()]
+    return tuple(conditions)
+
+class Mission:
+    # One accepted mission; `expires` is the mission phase on which it fails if still open
+    __slots__ = ("id", "name", "details", "expires", "unmet")
+
+    def __init__(self, mission_id, details, expires):
+        self.id = mission_id
+        self.name = details["name"]
+        self.details = details  # Static description, requirements and reward from the rules
+        self.expires = expires
+        self.unmet = 0  # Conditions not currently satisfied
+
+class MissionManager:
+    # Open missions with their conditions indexed by metric. Each watched metric keeps its
+    # conditions sorted by threshold, so a change in value only touches the conditions it
+    # crosses and a mission is ready the moment its unmet count drops to zero. Deadlines
+    # sit in a heap, and completed missions leave only a count behind in the archive.
+    def __init__(self, rules):
+        self.rules = rules
+        self.conditions = {m["name"]: mission_conditions(m) for m in rules.missions}
+        # Requirement thresholds per metric, for the availability cache key
+        thresholds = {}
+        for conditions in self.conditions.values():
+            for metric, threshold in conditions:
+                thresholds.setdefault(metric, set()).add(threshold)
+        self.requirement_metrics = tuple((metric_reader(metric), sorted(values)) for metric, values in thresholds.items())
+        self.reset()
+
+    def reset(self):
+        self.tick = 0  # Number of mission phases run so far
+        self.active = {}  # Open missions by id, in acceptance order
+        self.active_names = {}
+        self.archive = {}  # Times each mission has been completed
+        self.completed_count = 0
+        self.expiry = []  # (expires, id); entries of missions already gone are skipped when popped
+        self.watch = {}  # Metric -> [reader, last value, sorted (threshold, mission id)]
+        self.ready = set()
+        self.next_id = 0
+        self.version = 0  # Bumped whenever the open or completed missions change
+        self.available_key = None
+        self.available_missions = ()
+
+    def __len__(self):
+        return len(self.active)
+
+    def __iter__(self):
+        return iter(self.active.values())
+
+    def turns_left(self, mission):
+        return mission.expires - self.tick
+
+    def available(self, game):
+        # Missions on offer: requirements met, not open and never completed. The result only
+        # changes when a metric crosses a requirement threshold or the missions change.
+        key = (self.version, tuple(bisect_right(thresholds, reader(game)) for reader, thresholds in self.requirement_metrics))
+        if key != self.available_key:
+            self.available_key = key
+            self.available_missions = tuple(
+                m for m in self.rules.missions
+                if m["name"] not in self.active_names and m["name"] not in self.archive
+                and game.meets_requirements(m["requirements"]))
+        return self.available_missions
+
+    def add(self, details, turns, game):
+        self.next_id += 1
+        mission = Mission(self.next_id, details, self.tick + turns)
+        for metric, threshold in self.conditions[mission.name]:
+            watch = self.watch.get(metric)
+            if watch is None:
+                reader = metric_reader(metric)
+                watch = self.watch[metric] = [reader, reader(game), []]
+            else:
+                self.refresh(metric, game)
+            insort(watch[2], (threshold, mission.id))
+            if watch[1] < threshold:
+                mission.unmet += 1
+        self.active[mission.id] = mission
+        self.active_names[mission.name] = mission.id
+        heappush(self.expiry, (mission.expires, mission.id))
+        if not mission.unmet:
+            self.ready.add(mission.id)
+        self.version += 1
+        return mission
+
+    def remove(self, mission):
+        del self.active[mission.id]
+        del self.active_names[mission.name]
+        self.ready.discard(mission.id)
+        for metric, threshold in self.conditions[mission.name]:
+            entries = self.watch[metric][2]
+            del entries[bisect_left(entries, (threshold, mission.id))]
+            if not entries:
+                del self.watch[metric]
+        self.version += 1
+
+    def refresh(self, metric, game):
+        # Re-reads one metric and flips the conditions whose threshold lies between the
+        # previous and the current value
+        watch = self.watch[metric]
+        value = watch[0](game)
+        previous = watch[1]
+        if value == previous:
+            return
+        watch[1] = value
+        entries = watch[2]
+        if value > previous:
+            step, low, high = -1, previous, value
+        else:
+            step, low, high = 1, value, previous
+        active, ready = self.active, self.ready
+        for position in range(bisect_right(entries, (low, inf)), bisect_right(entries, (high, inf))):
+            mission = active[entries[position][1]]
+            mission.unmet += step
+            if not mission.unmet:
+                ready.add(mission.id)
+            elif step > 0 and mission.unmet == 1:
+                ready.discard(mission.id)
+
+    def advance(self, game):
+        # One mission phase: complete every open mission whose conditions hold, in acceptance
+        # order, then fail the missions whose time ran out
+        self.tick += 1
+        if not self.active:
+            self.expiry.clear()
+            return
+        for metric in list(self.watch):
+            self.refresh(metric, game)
+        if self.ready:
+            for mission_id in sorted(self.ready):
+                self.complete(self.active[mission_id], game)
+        expiry = self.expiry
+        while expiry and expiry[0][0] <= self.tick:
+            mission = self.active.get(heappop(expiry)[1])
+            if mission is not None:
+                self.remove(mission)
+                if game.output.enabled:
+                    game.output.emit("mission_failed", name=mission.name)
+
+    def complete(self, mission, game):
+        self.remove(mission)
+        self.archive[mission.name] = self.archive.get(mission.name, 0) + 1
+        self.completed_count += 1
+        reward = mission.details["reward"]
+        if game.output.enabled:
+            game.output.emit("mission_completed", name=mission.name, reward=reward["description"])
+        game.apply_mission_reward(reward)
+        game.achievements.check_achievements(game)
+
+    def skip(self, phases):
+        # Advance the clock over mission phases with no mission open (fast-forwarded turns)
+        self.tick += phases
+
+    def to_list(self):
+        return [{"name": mission.name, "turns_left": self.turns_left(mission)} for mission in self.active.values()]
+
+    def from_list(self, entries, archive, game):
+        self.reset()
+        self.archive = dict(archive)
+        self.completed_count = sum(self.archive.values())
+        for entry in entries:
+            self.add(self.rules.mission_by_name[entry["name"]], entry["turns_left"], game)
@@ -0,0 +1,213 @@
+# output.py
+
+from rules import get_rules
+
+def join_gains(amounts, symbols, empty=""):
+    gains = [f"+{amount} {symbols.get(resource, '')} {resource}" for resource, amount in amounts.items() if amount > 0]
+    return ", ".join(gains) if gains else empty
+
+def batch(fields):
+    # "Farm", or "40 x Farm" for a bulk build
+    count = fields.get("count", 1)
+    return fields["building"] if count == 1 else f"{count} x {fields['building']}"
+
+# Terminal rendering for every game message kind. Format strings receive the emitted fields
+# (plus "symbol" when a "resource" field is present); callables receive (fields, symbols).
+TEMPLATES = {
+    # Resources
+    "gather_started": "[bold yellow]\n[Action] Gathering resources...[/bold yellow]",
+    "gathered": lambda f, symbols: f"[bold green][Resource Modification]{join_gains(f['gains'], symbols, 'No resources gained this turn.')}[/bold green]",
+    "building_effect": "[bold magenta][Building Effect]{building} provides +{amount} {symbol} {resource}.[/bold magenta]",
+    "auto_generated": lambda f, symbols: "[bold green][Auto-Generated]" + ", ".join(
+        f"+{amount} {symbols.get(resource, '')} {resource}" for resource, amount in f["gains"].items()) + "[/bold green]",
+    "spend_failed": "[bold red][Resource Spend] Not enough {resource}. Required: {required}, Available: {available}.[/bold red]",
+    "spent": lambda f, symbols: "[bold green][Resource Spend] Spent resources: " + ", ".join(
+        f"{symbols.get(resource, '')} {resource}: {amount}" for resource, amount in f["costs"].items()) + ".[/bold green]",
+    "resource_added": "[bold green][Resource Modification] +{amount} {symbol} {resource}.[/bold green]",
+    "resource_modified": lambda f, symbols: (
+        f"[bold magenta][Resource Modification] {symbols.get(f['resource'], '')} {f['resource']} changed by "
+        f"{'+' if f['amount'] >= 0 else ''}{f['amount']}. New value: {f['value']}.[/bold magenta]"),
+
+    # Population
+    "population_grew": "[bold green][Population] Population has grown by {amount} to {population}.[/bold green]",
+    "population_capped": "[bold green][Population] Population has grown by {amount} to reach the maximum limit of {population}.[/bold green]",
+    "population_stalled": "[bold yellow][Population] Population has grown by 0. Current population: {population}.[/bold yellow]",
+    "population_capacity": "[bold green][Population] Population capacity increased to {capacity}.[/bold green]",
+    "population_upgrade_failed": "[bold red]Insufficient resources to upgrade population capacity.[/bold red]",
+    "population_modified": lambda f, symbols: (
+        f"[bold magenta][Population] Population has {'increased' if f['amount'] >= 0 else 'decreased'} "
+        f"by {abs(f['amount'])} to {f['population']}.[/bold magenta]"),
+
+    # Player and advisor
+    "experience": "[bold yellow][Player]{player} gains {amount} experience points.[/bold yellow]",
+    "level_up": "[bold green][Player]{player} has reached level {level}![/bold green]",
+    "advisor_greeting": "\n[bold magenta][Advising Agent] Greetings, Leader of the Civilization.[/bold magenta]",
+    "advisor_intro": "[bold magenta][Advising Agent]: {message}[/bold magenta]",
+    "advisor_tip": "[bold green][Advising Agent]: {message}[/bold green]",
+    "advisor_plan": lambda f, symbols: (
+        f"[bold green][Advising Agent]: {f['action']}. " + (
+            f"The Dimensional Gate is about {f['expected_turns']} turns away on that path.[/bold green]"
+            if f["expected_turns"] < f["horizon"] else
+            f"The Dimensional Gate is more than {f['horizon']} turns away.[/bold green]")),
+
+    # Buildings
+    "unknown_building": "[bold red]Unknown building: {building}.[/bold red]",
+    "build_unaffordable": lambda f, symbols: (
+        f"[bold red]You do not have enough resources to construct {batch(f)}.[/bold red]"),
+    "constructed": lambda f, symbols: f"[bold green]{batch(f)} constructed successfully.[/bold green]",
+    "upgrade_missing": "[bold red]You don't have any {building} to upgrade.[/bold red]",
+    "upgrade_unavailable": "[bold yellow]{building} cannot be upgraded.[/bold yellow]",
+    "upgraded": lambda f, symbols: (
+        f"[bold green]{f['building']} has been upgraded successfully.[/bold green]" if f.get("count", 1) == 1 else
+        f"[bold green]{f['building']} has been upgraded {f['count']} times.[/bold green]"),
+    "upgrade_unaffordable": lambda f, symbols: f"[bold red]Insufficient resources to upgrade {batch(f)}.[/bold red]",
+
+    # Events, achievements, buffs and missions
+    "event": "\n[bold cyan][Event] {name}:[/bold cyan] {description}",
+    "no_events": "[bold cyan]\n[Event] No events this turn.[/bold cyan]",
+    "fast_forward": "[bold cyan]\n[Fast Forward] {turns} turns passed; {events} events occurred.[/bold cyan]",
+    "achievement_unlocked": "\n[bold yellow]🎖️ Achievement Unlocked: {name}! {description}[/bold yellow]",
+    "buff_activated": "\n[bold magenta][Buff] {name} has been activated: {description} for {turns} turns.[/bold magenta]",
+    "buff_applied": lambda f, symbols: (
+        f"[bold magenta][Buff] {f['name']} applied: +{f['value']} Population.[/bold magenta]" if f.get("resource") is None else
+        f"[bold magenta][Buff] {f['name']} applied: {'+' if f['value'] >= 0 else ''}{f['value']} {f['resource']}.[/bold magenta]"),
+    "buff_expired": "[bold blue][Buff] {name} has expired.[/bold blue]",
+    "mission_accepted": "\n[bold magenta]Mission '{name}' has been accepted![/bold magenta]",
+    "mission_unavailable": "[bold red]Mission '{name}' is not available.[/bold red]",
+    "mission_completed": "\n[bold green]🎯 Mission Completed: {name}! Reward: {reward}[/bold green]",
+    "mission_failed": "\n[bold red]🚫 Mission Failed: {name}.[/bold red]",
+
+    # Game end
+    "portal_locked": "[bold red]The Dimensional Gate cannot be used before Victory.[/bold red]",
+    "portal_used": ("\n[bold green]🌟 You have used the Dimensional Gate to traverse dimensions successfully! 🌟[/bold green]\n"
+                    "[bold green]🎉 Congratulations! You have completed your journey and won the game![/bold green]"),
+    "quit": "[bold red]Thank you for playing![/bold red]",
+    "depleted": "\n[bold red]☠️ Resources depleted! Your civilization cannot survive.[/bold red]",
+}
+
+class NullSink:
+    # Discards everything; a bus with only null sinks is disabled, so call sites never
+    # build the message fields in the first place
+    enabled = False
+
+    def write(self, kind, fields):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class RichSink:
+    # Renders events as rich markup on the shared terminal console
+    enabled = True
+
+    def __init__(self, console=None, rules=None):
+        self.console = console
+        self.symbols = rules.resource_symbols if rules else None
+
+    def render(self, kind, fields):
+        if self.symbols is None:
+            self.symbols = get_rules().resource_symbols
+        template = TEMPLATES[kind]
+        if callable(template):
+            return template(fields, self.symbols)
+        if "resource" in fields:
+            fields = dict(fields, symbol=self.symbols.get(fields["resource"], ""))
+        return template.format(**fields)
+
+    def write(self, kind, fields):
+        if self.console is None:
+            from utils import console
+            self.console = console
+        self.console.print(self.render(kind, fields))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class BufferedFileSink:
+    # Appends one JSON object per event to a file, writing in batches
+    enabled = True
+
+    def __init__(self, path, buffer_size=1000):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.handle = open(path, "a", encoding="utf-8")
+        import json
+        self.dumps = json.dumps
+
+    def write(self, kind, fields):
+        self.buffer.append(self.dumps(dict(fields, kind=kind), ensure_ascii=False))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.handle.write("\n".join(self.buffer) + "\n")
+            self.buffer.clear()
+            self.handle.flush()
+
+    def close(self):
+        if not self.handle.closed:
+            self.flush()
+            self.handle.close()
+
+class MemorySink:
+    # Keeps (kind, fields) pairs in a list; handy for tools that inspect a game's messages
+    enabled = True
+
+    def __init__(self):
+        self.events = []
+
+    def write(self, kind, fields):
+        self.events.append((kind, fields))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class OutputBus:
+    # Structured game messages fanned out to any number of sinks. Call sites guard with
+    # `if self.output.enabled:` so a muted game pays one attribute check per message.
+    def __init__(self, *sinks):
+        self.sinks = []
+        self.enabled = False
+        for sink in sinks:
+            self.add_sink(sink)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        self.enabled = any(s.enabled for s in self.sinks)
+
+    def remove_sink(self, sink):
+        self.sinks.remove(sink)
+        self.enabled = any(s.enabled for s in self.sinks)
+
+    def emit(self, kind, **fields):
+        for sink in self.sinks:
+            if sink.enabled:
+                sink.write(kind, fields)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+def terminal_output(rules=None):
+    return OutputBus(RichSink(rules=rules))
+
+def null_output():
+    return OutputBus(NullSink())
+
+# Default for subsystems used on their own; GameLoop hands every subsystem the game's bus
+TERMINAL = OutputBus(RichSink())
@@ -0,0 +1,274 @@
+# planner.py
+
+import math
+import time
+from collections import namedtuple
+
+import actions
+from achievements import metric_reader
+from policies import VictoryPolicy
+from rules import RESOURCE_SCALE
+
+# Best action found for the current turn, with the mean number of turns its simulations
+# needed to pass through the Dimensional Gate and how many simulations back that estimate
+Recommendation = namedtuple("Recommendation", ["action", "expected_turns", "visits"])
+
+class Node:
+    # Statistics for one game state; shared by every path that reaches the same state
+    __slots__ = ("actions", "visits", "counts", "totals", "generation")
+
+    def __init__(self, legal, generation):
+        self.actions = legal
+        self.visits = 0
+        self.counts = [0] * len(legal)
+        self.totals = [0.0] * len(legal)  # Sum of turns-to-Gate observed after each action
+        self.generation = generation
+
+def legal_actions(game):
+    # Every useful action this turn; gathering is always possible
+    legal = [actions.gather()]
+    resources = game.resources
+    buildings = game.buildings
+    for building in buildings.list_available_buildings():
+        if buildings.can_afford_building(building, resources):
+            legal.append(actions.build(building["name"]))
+    if game.achievements.achievements["Victory"]["unlocked"]:
+        legal.append(actions.use_portal())
+    if resources.resources.covers(game.rules.population_cost_fixed):
+        legal.append(actions.upgrade_population())
+    for mission in game.get_available_missions():
+        legal.append(actions.accept_mission(mission["name"]))
+    for name, count in buildings.buildings.items():
+        if count > 0 and buildings.get_upgrade_cost(name) and buildings.can_upgrade_building(name, resources):
+            legal.append(actions.upgrade_building(name))
+    return tuple(legal)
+
+def state_key(game):
+    # Transposition key: resources are rounded so nearly identical states share a node
+    resources = game.resources.resources
+    return (
+        tuple(int(resources.get(name, 0)) for name in game.rules.resource_names),
+        tuple(sorted(game.buildings.buildings.items())),
+        game.population.current_population,
+        game.population.max_population,
+        game.achievements.unlocked_count,
+        tuple((m.name, game.missions.turns_left(m)) for m in game.missions),
+        tuple(sorted(game.missions.archive.items())),
+        tuple((b.name, game.buffs.turns_left(b)) for b in game.buffs),
+        game.player.level,
+        game.player.experience,
+    )
+
+def turns_to_stock(game, targets, limit):
+    # Turns of the current income until every (resource index, fixed-point amount) in
+    # `targets` is in stock, capped at `limit`; a shortfall with no income takes the cap
+    slots = game.resources.resources.slots
+    income = game.resources.production_vector(game.population.current_population, game.buildings)
+    turns = 0.0
+    for idx, amount in targets:
+        short = amount - slots[idx]
+        if short > 0:
+            turns = max(turns, short / income[idx] if income[idx] > 0 else limit)
+    return min(turns, limit)
+
+def progress_reader(rules, achievement, limit):
+    # Share of the way to an achievement, 0 to 1. Resource goals, and the cost of a building
+    # still to be built, count by how soon the income gets there rather than by the stock:
+    # a stockpile that construction is about to spend is not progress, the producers are.
+    metric, threshold = achievement["metric"], achievement["threshold"]
+    kind, _, name = metric.partition(":")
+    if kind == "resource" or metric == "min_resource":
+        indices = [rules.resource_index[name]] if kind == "resource" else range(len(rules.resource_names))
+        targets = [(idx, threshold * RESOURCE_SCALE) for idx in indices]
+        return lambda game: 1 - turns_to_stock(game, targets, limit) / limit
+    if metric == "level":
+        # Experience towards the next level counts part of the way
+        read = lambda game: game.player.level + game.player.experience / (game.player.level * 100)
+    elif kind == "building":
+        cost = [(idx, amount) for idx, amount in enumerate(rules.building_by_name[name]["cost_fixed"]) if amount > 0]
+        count = metric_reader(metric)
+        read = lambda game: count(game) + 1 - turns_to_stock(game, cost, limit) / limit
+    else:
+        read = metric_reader(metric)
+    return lambda game: min(read(game) / threshold, 1.0)
+
+class Planner:
+    # Monte Carlo tree search over the real action set, run on a scratch copy of the game.
+    # Nodes live in a transposition table keyed by state, so the search tree built on one
+    # turn is reused on the next. Outcomes are turns until the game is won through the Gate.
+    # Rollouts are a few scripted turns long and the rest of the way is estimated from the
+    # progress towards Victory, so each root action gets enough visits within the budget.
+    def __init__(self, rules, budget=0.05, horizon=150, exploration=1.0, max_nodes=50000, rollout_depth=5,
+                 stock_turns=25, calibration_games=3):
+        from main import create_game
+        self.budget = budget
+        self.horizon = horizon  # Lost games, and estimates past it, count as this long
+        self.exploration = exploration
+        self.max_nodes = max_nodes
+        self.rollout_depth = rollout_depth  # Scripted turns played past the tree before estimating
+        self.table = {}
+        self.generation = 0
+        self.sim = create_game(headless=True, seed=0, rules=rules)
+        self.rollout_policy = VictoryPolicy()
+        # (achievement, progress reader) for every achievement Victory requires; income counts
+        # towards a resource goal for at most stock_turns turns
+        self.progress = [(a["name"], progress_reader(rules, a, stock_turns))
+                         for a in rules.achievements if a["metric"] != "victory"]
+        self.turns_per_game, self.endgame_turns = self.calibrate(calibration_games)
+
+    def unmet_share(self, game):
+        # Share of the Victory conditions still to do, each achievement counting its progress
+        # reader's share
+        achievements = game.achievements.achievements
+        done = 0.0
+        for name, read in self.progress:
+            done += 1.0 if achievements[name]["unlocked"] else read(game)
+        return 1 - done / len(self.progress)
+
+    def calibrate(self, games):
+        # Fits remaining_turns to scripted games under these rules: a least-squares line through
+        # the turns each state still needed against its unmet share. Returns (turns_per_game,
+        # endgame_turns): the turns the Victory conditions take from scratch, and those any
+        # unfinished game needs on top, as the last missions and the Gate rarely land the turn
+        # their progress looks complete. The endgame also keeps estimates above real wins.
+        sim = self.sim
+        start = sim.to_dict()
+        points = []
+        for seed in range(games):
+            sim.from_dict(dict(start, seed=seed))
+            shares = []
+            while not sim.game_over and sim.turn <= self.horizon:
+                shares.append(self.unmet_share(sim))
+                sim.play_turn(self.rollout_policy.choose(sim))
+            if self.goal_reached(sim):
+                # Turns left after the state's own, less the portal turn
+                points.extend((share, len(shares) - turn - 1) for turn, share in enumerate(shares))
+        if not points:
+            return self.horizon, 0  # The script never wins: every unfinished state is far away
+        mean_share = sum(share for share, _ in points) / len(points)
+        mean_turns = sum(turns for _, turns in points) / len(points)
+        spread = sum((share - mean_share) ** 2 for share, _ in points)
+        slope = sum((share - mean_share) * (turns - mean_turns) for share, turns in points) / spread if spread else 0
+        slope = max(slope, 1.0)
+        return slope, max(mean_turns - slope * mean_share, 0.0)
+
+    def remaining_turns(self, game):
+        # Heuristic turns left to the Gate: the portal turn and the endgame, plus the unmet
+        # share of the Victory conditions times their length. No state short of Victory scores
+        # as close to the Gate as Victory.
+        if game.achievements.achievements["Victory"]["unlocked"]:
+            return 1
+        return 1 + self.endgame_turns + self.unmet_share(game) * self.turns_per_game
+
+    def goal_reached(self, game):
+        return game.outcome == "victory"
+
+    def node_for(self, game):
+        key = state_key(game)
+        node = self.table.get(key)
+        if node is None:
+            node = self.table[key] = Node(legal_actions(game), self.generation)
+            return node, True
+        node.generation = self.generation
+        return node, False
+
+    def select(self, node):
+        # UCB1 on turns-to-Gate (lower is better). Means are rescaled to [0, 1] between the
+        # node's worst and best action: actions usually differ by a turn or two, which would
+        # vanish next to the exploration term on any fixed scale and spread visits evenly.
+        counts = node.counts
+        if 0 in counts:
+            return counts.index(0)
+        means = [total / count for total, count in zip(node.totals, counts)]
+        best_mean, worst_mean = min(means), max(means)
+        spread = worst_mean - best_mean or 1.0
+        log_visits = math.log(node.visits + 1)
+        best, best_score = 0, -math.inf
+        for idx, count in enumerate(counts):
+            score = (worst_mean - means[idx]) / spread + self.exploration * math.sqrt(log_visits / count)
+            if score > best_score:
+                best, best_score = idx, score
+        return best
+
+    def simulate(self, root_state, seed, deadline):
+        # One iteration: descend the tree, expand one state, roll out a few turns with the
+        # scripted policy, estimate the rest and back up the turns-to-Gate. Returns False if
+        # the time budget ran out mid-way.
+        sim = self.sim
+        sim.from_dict(dict(root_state, seed=seed))
+        path = []
+        depth = 0
+        while not sim.game_over:
+            if time.perf_counter() > deadline:
+                return False
+            node, created = self.node_for(sim)
+            idx = self.select(node)
+            path.append((node, idx, depth))
+            sim.play_turn(node.actions[idx])
+            depth += 1
+            if created or depth >= self.horizon:
+                break
+        # The estimate is the best one along the rollout: the script keeps spending after it
+        # made its progress, and where it happens to stop should not decide between actions
+        stop = min(depth + self.rollout_depth, self.horizon)
+        turns = self.horizon
+        while True:
+            if self.goal_reached(sim):
+                turns = depth
+                break
+            if sim.game_over:
+                turns = self.horizon
+                break
+            turns = min(turns, depth + self.remaining_turns(sim))
+            if depth >= stop:
+                break
+            if time.perf_counter() > deadline:
+                return False
+            sim.play_turn(self.rollout_policy.choose(sim))
+            depth += 1
+        for node, idx, node_depth in path:
+            node.visits += 1
+            node.counts[idx] += 1
+            node.totals[idx] += max(turns - node_depth, 0)
+        return True
+
+    def prune(self):
+        # Drop states not visited during the last two searches once the table is full
+        if len(self.table) > self.max_nodes:
+            keep = self.generation - 1
+            self.table = {key: node for key, node in self.table.items() if node.generation >= keep}
+
+    def advise(self, game, rng):
+        # Searches until the budget is spent and returns the most visited root action.
+        # Simulations draw their own seeds, so they never peek at the real game's future events.
+        deadline = time.perf_counter() + self.budget
+        self.generation += 1
+        self.prune()
+        if game.game_over:
+            return None
+        root_state = game.to_dict()
+        root, _ = self.node_for(game)
+        while time.perf_counter() < deadline:
+            if not self.simulate(root_state, int(rng.random() * (1 << 53)), deadline):
+                break
+        if not root.visits:
+            return None
+        idx = max(range(len(root.actions)), key=lambda i: (root.counts[i], -root.totals[i]))
+        count = root.counts[idx]
+        return Recommendation(root.actions[idx], root.totals[idx] / count if count else None, count)
+
+def describe(action):
+    # Player-facing wording for a recommended action
+    if action.kind == actions.GATHER:
+        return "Gather resources"
+    if action.kind == actions.BUILD:
+        return f"Build a {action.target}"
+    if action.kind == actions.UPGRADE_POPULATION:
+        return "Upgrade population capacity"
+    if action.kind == actions.ACCEPT_MISSION:
+        return f"Accept the '{action.target}' mission"
+    if action.kind == actions.UPGRADE_BUILDING:
+        return f"Upgrade a {action.target}"
+    if action.kind == actions.USE_PORTAL:
+        return "Use the Dimensional Gate"
+    return action.kind.replace("_", " ").capitalize()
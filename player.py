@@ -1,24 +1,25 @@
 # player.py
-from rich.console import Console  # Add this import at the top of the file
+from output import TERMINAL
 
 class Player:
     def __init__(self, name):
         self.name = name
         self.level = 1
         self.experience = 0
+        self.output = TERMINAL  # Replaced by the game's output bus in GameLoop
 
     def gain_experience(self, amount):
         self.experience += amount
-        console = Console()
-        console.print(f"[bold yellow][Player]{self.name} gains {amount} experience points.[/bold yellow]")
+        if self.output.enabled:
+            self.output.emit("experience", player=self.name, amount=amount)
         while self.experience >= self.level * 100:
             self.level_up()
 
     def level_up(self):
         self.level += 1
         self.experience -= (self.level - 1) * 100
-        console = Console()
-        console.print(f"[bold green][Player]{self.name} has reached level {self.level}![/bold green]")
+        if self.output.enabled:
+            self.output.emit("level_up", player=self.name, level=self.level)
 
     def to_dict(self):
         return {
@@ -0,0 +1,52 @@
+# policies.py
+
+import actions
+
+BUILD_ORDER = ["Land Formation", "Settlement", "Farm", "Metal Mine", "Technology Lab", "Dimensional Gate"]
+
+class GatherPolicy:
+    # Gathers every turn and never builds
+    def choose(self, game):
+        return actions.gather()
+
+class BuildOrderPolicy:
+    # Builds the first affordable structure from a fixed order, otherwise gathers
+    def __init__(self, order=None):
+        self.order = list(order or BUILD_ORDER)
+
+    def choose(self, game):
+        for name in self.order:
+            if game.buildings.can_afford_building(game.buildings.get_building(name), game.resources):
+                return actions.build(name)
+        return actions.gather()
+
+class VictoryPolicy:
+    # Heads for the Dimensional Gate: takes missions as they open up, builds each
+    # missing structure type, fills mission quotas and uses the portal on Victory
+    def __init__(self, order=None, targets=None):
+        self.order = list(order or BUILD_ORDER)
+        self.targets = dict(targets or {"Farm": 3, "Technology Lab": 2, "Land Formation": 3})
+
+    def choose(self, game):
+        if game.achievements.achievements["Victory"]["unlocked"]:
+            return actions.use_portal()
+        available = game.get_available_missions()
+        if available:
+            return actions.accept_mission(available[0]["name"])
+        owned = game.buildings.buildings
+        for name in self.order:
+            if owned.get(name, 0) < max(1, self.targets.get(name, 1)):
+                if game.buildings.can_afford_building(game.buildings.get_building(name), game.resources):
+                    return actions.build(name)
+        return actions.gather()
+
+POLICIES = {
+    "gather": GatherPolicy,
+    "build-order": BuildOrderPolicy,
+    "victory": VictoryPolicy,
+}
+
+def make_policy(name, **kwargs):
+    if name not in POLICIES:
+        raise ValueError(f"Unknown policy: {name!r}. Choose from {', '.join(POLICIES)}.")
+    return POLICIES[name](**kwargs)
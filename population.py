@@ -1,46 +1,53 @@
 # population.py
 
-from colorama import Fore, Style
-from rich.console import Console
 
-console = Console()
+from output import TERMINAL
+from rules import get_rules
 
 class Population:
-    def __init__(self):
-        self.current_population = 10
-        self.max_population = 100
+    def __init__(self, rules=None):
+        self.rules = rules or get_rules()
+        self.current_population = self.rules.population["start"]
+        self.max_population = self.rules.population["max"]
         self.accumulated_growth = 0.0  # To handle fractional growth
+        self.output = TERMINAL  # Replaced by the game's output bus in GameLoop
 
     def grow(self):
-        growth_rate = 0.05  # 5% growth per turn
+        growth_rate = self.rules.population["growth_rate"]  # 5% growth per turn by default
         growth = self.current_population * growth_rate
         self.accumulated_growth += growth
         new_members = int(self.accumulated_growth)
         if new_members >= 1:
             if self.current_population + new_members <= self.max_population:
                 self.current_population += new_members
-                console.print(f"[bold green][Population] Population has grown by {new_members} to {self.current_population}.[/bold green]")
+                if self.output.enabled:
+                    self.output.emit("population_grew", amount=new_members, population=self.current_population)
             else:
                 new_members = self.max_population - self.current_population
                 self.current_population = self.max_population
-                console.print(f"[bold green][Population] Population has grown by {new_members} to reach the maximum limit of {self.max_population}.[/bold green]")
+                if self.output.enabled:
+                    self.output.emit("population_capped", amount=new_members, population=self.max_population)
             self.accumulated_growth -= new_members
         else:
-            console.print(f"[bold yellow][Population] Population has grown by 0. Current population: {self.current_population}.[/bold yellow]")
+            if self.output.enabled:
+                self.output.emit("population_stalled", population=self.current_population)
 
     def upgrade_population(self, resources):
-        upgrade_cost = {"Light": 100, "Energy": 50}
-        if resources.spend_resources(upgrade_cost):
-            self.max_population += 50
-            console.print(f"[bold green][Population] Population capacity increased to {self.max_population}.[/bold green]")
+        upgrade_cost = self.rules.population["upgrade_cost"]
+        if resources.spend_resources(upgrade_cost, self.rules.population_cost_fixed):
+            self.max_population += self.rules.population["capacity_step"]
+            if self.output.enabled:
+                self.output.emit("population_capacity", capacity=self.max_population)
             return True
         else:
-            console.print("[bold red]Insufficient resources to upgrade population capacity.[/bold red]")
+            if self.output.enabled:
+                self.output.emit("population_upgrade_failed")
             return False
 
     def modify_population(self, amount):
         self.current_population = min(self.current_population + amount, self.max_population)
-        console.print(f"[bold magenta][Population] Population has {'increased' if amount >=0 else 'decreased'} by {abs(amount)} to {self.current_population}.[/bold magenta]")
+        if self.output.enabled:
+            self.output.emit("population_modified", amount=amount, population=self.current_population)
 
     def to_dict(self):
         return {
@@ -50,6 +57,6 @@ class Population:
         }
 
     def from_dict(self, data):
-        self.current_population = data.get("current_population", 10)
-        self.max_population = data.get("max_population", 100)
+        self.current_population = data.get("current_population", self.rules.population["start"])
+        self.max_population = data.get("max_population", self.rules.population["max"])
         self.accumulated_growth = data.get("accumulated_growth", 0.0)
@@ -0,0 +1,286 @@
+# profiling.py
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import tracemalloc
+from time import perf_counter_ns
+
+from utils import Table
+
+# Methods every turn goes through, wrapped on the game itself so play_turn and start() both
+# pick them up; the entries of turn_phases and resolve_phases are wrapped in place
+TURN_METHODS = ("begin_turn", "apply_action", "resolve_turn")
+
+# Subsystem calls made from the phases, as (GameLoop attribute, method)
+SUBSYSTEM_CALLS = (
+    ("agent", "provide_tip"),
+    ("resources", "gather"),
+    ("resources", "generate_automatic_resources"),
+    ("population", "grow"),
+    ("buffs", "apply"),
+    ("event_manager", "trigger_event"),
+    ("achievements", "check_achievements"),
+    ("missions", "advance"),
+)
+
+SUB_BUCKETS = 8  # Histogram buckets per power of two: bucket bounds are within 12.5%
+MAX_TRACE_EVENTS = 1_000_000  # Later calls are counted but not traced
+
+def bucket_index(ns):
+    # Log-linear bucket: the top four bits of the duration
+    if ns < SUB_BUCKETS:
+        return ns
+    shift = ns.bit_length() - 4
+    return (shift + 1) * SUB_BUCKETS + (ns >> shift) - SUB_BUCKETS
+
+def bucket_value(index):
+    # Midpoint of a bucket's range, in nanoseconds
+    if index < SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    low = (index % SUB_BUCKETS + SUB_BUCKETS) << shift
+    return low + (1 << shift) / 2
+
+def micros(value):
+    return f"{value:.1f}" if value < 100 else f"{value:,.0f}"
+
+class PhaseStats:
+    # Call count, total and latency histogram of one instrumented call site, reached through
+    # one chain of parent calls: a method called from two phases has a PhaseStats under each
+    __slots__ = ("name", "key", "depth", "children", "calls", "total", "max", "buckets", "allocated")
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.key = f"{parent.key}/{name}" if parent is not None else name
+        self.depth = parent.depth + 1 if parent is not None else 0  # 0 for calls made outside any other
+        self.children = []  # Calls made from this one, in order of first call
+        self.calls = 0
+        self.total = 0  # Nanoseconds
+        self.max = 0
+        self.buckets = {}
+        self.allocated = 0  # Net bytes allocated while tracemalloc is on
+
+    def add(self, ns):
+        self.calls += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+        index = bucket_index(ns)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, fraction):
+        # Nanoseconds, to the histogram's resolution
+        if not self.calls:
+            return 0
+        rank = max(1, -(-self.calls * fraction // 1))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(bucket_value(index), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "depth": self.depth,
+            "calls": self.calls,
+            "total_ms": round(self.total / 1e6, 3),
+            "mean_us": round(self.total / self.calls / 1e3, 2) if self.calls else 0,
+            "p50_us": round(self.percentile(0.5) / 1e3, 2),
+            "p99_us": round(self.percentile(0.99) / 1e3, 2),
+            "max_us": round(self.max / 1e3, 2),
+            "allocated_kib": round(self.allocated / 1024, 1),
+        }
+
+class Profiler:
+    # Times every turn phase and subsystem call of the games attached to it. Nothing is
+    # installed until attach(), so unprofiled games pay nothing; an attached call costs two
+    # clock reads and a histogram update. Tracing, cProfile and tracemalloc are opt-in.
+    def __init__(self, trace=False, cprofile=False, memory=False, max_events=MAX_TRACE_EVENTS):
+        self.stats = {}  # Call path ("resolve_turn/missions.advance") -> PhaseStats, in order of first call
+        self.current = None  # PhaseStats of the instrumented call in progress
+        self.events = [] if trace else None  # (name, tid, start, end) for the Chrome trace
+        self.max_events = max_events
+        self.dropped = 0
+        self.threads = {}  # Trace thread id -> label
+        self.epoch = perf_counter_ns()
+        self.profile = cProfile.Profile() if cprofile else None
+        self.memory = memory
+        self.detailed = trace or memory  # Calls take the slower path that traces and counts allocations
+        self.snapshot = None
+        self.peak = 0
+        self.running = False
+
+    def attach(self, game, tid=0, label=None):
+        # Instruments one game in place; tid separates games in the trace. Attach a game once.
+        self.threads[tid] = label or f"game {tid}"
+        wrapped = {}
+        for name in TURN_METHODS:
+            wrapped[name] = self.wrap(name, getattr(game, name), tid)
+            setattr(game, name, wrapped[name])
+        game.turn_phases[:] = [wrapped.get(phase.__name__) or self.wrap(phase.__name__, phase, tid)
+                               for phase in game.turn_phases]
+        game.resolve_phases[:] = [self.wrap(phase.__name__, phase, tid) for phase in game.resolve_phases]
+        for attribute, method in SUBSYSTEM_CALLS:
+            owner = getattr(game, attribute)
+            setattr(owner, method, self.wrap(f"{attribute}.{method}", getattr(owner, method), tid))
+        return game
+
+    def stat(self, name, parent=None):
+        key = f"{parent.key}/{name}" if parent is not None else name
+        stat = self.stats.get(key)
+        if stat is None:
+            stat = self.stats[key] = PhaseStats(name, parent)
+            if parent is not None:
+                parent.children.append(stat)
+        return stat
+
+    def wrap(self, name, function, tid=0):
+        profiler = self
+        clock = perf_counter_ns
+        by_parent = {}  # Caller's PhaseStats (None at the top) -> this call's PhaseStats
+
+        def timed(*args, **kwargs):
+            parent = profiler.current
+            stat = by_parent.get(parent)
+            if stat is None:
+                stat = by_parent[parent] = profiler.stat(name, parent)
+            if profiler.detailed:
+                return profiler.call_detailed(stat, parent, function, args, kwargs, tid)
+            profiler.current = stat
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                ns = clock() - start
+                profiler.current = parent
+                # PhaseStats.add, inlined: this runs on every instrumented call
+                stat.calls += 1
+                stat.total += ns
+                if ns > stat.max:
+                    stat.max = ns
+                shift = ns.bit_length() - 4
+                index = (shift + 1) * SUB_BUCKETS + (ns >> shift) - SUB_BUCKETS if shift > 0 else ns
+                buckets = stat.buckets
+                buckets[index] = buckets.get(index, 0) + 1
+        timed.__name__ = getattr(function, "__name__", name)
+        return timed
+
+    def call_detailed(self, stat, parent, function, args, kwargs, tid):
+        # The instrumented call with trace events and per-phase allocations recorded
+        memory = self.memory and self.running
+        if memory:
+            before = tracemalloc.get_traced_memory()[0]
+        self.current = stat
+        start = perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            end = perf_counter_ns()
+            self.current = parent
+            stat.add(end - start)
+            if memory:
+                stat.allocated += tracemalloc.get_traced_memory()[0] - before
+            if self.events is not None:
+                if len(self.events) < self.max_events:
+                    self.events.append((stat.name, tid, start, end))
+                else:
+                    self.dropped += 1
+
+    def start(self):
+        # Turns on the opt-in cProfile and tracemalloc collectors
+        if self.running:
+            return
+        self.running = True
+        if self.memory:
+            tracemalloc.start()
+        if self.profile is not None:
+            self.profile.enable()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        if self.profile is not None:
+            self.profile.disable()
+        if self.memory:
+            self.peak = tracemalloc.get_traced_memory()[1]
+            self.snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def summary(self):
+        return {name: stat.summary() for name, stat in self.stats.items()}
+
+    def table(self, title="Time per turn phase"):
+        # Nested calls are listed and indented under the call that made them; shares are of
+        # the total time spent in top-level phases
+        top = [stat for stat in self.stats.values() if stat.depth == 0]
+        turns = sum(stat.total for stat in top)
+        ordered = []
+        pending = top[::-1]
+        while pending:
+            stat = pending.pop()
+            ordered.append(stat)
+            pending.extend(stat.children[::-1])
+        rows = []
+        for stat in ordered:
+            row = stat.summary()
+            cells = ["  " * stat.depth + stat.name, str(stat.calls), f"{row['total_ms']:,.1f}"]
+            cells += [micros(row[key]) for key in ("p50_us", "p99_us", "max_us")]
+            cells.append(f"{stat.total / turns:.1%}" if turns else "-")
+            if self.memory:
+                cells.append(f"{row['allocated_kib']:,.1f}")
+            rows.append(cells)
+        columns = ["Calls", "Total ms", "p50 µs", "p99 µs", "Max µs", "Share"] + (["Alloc KiB"] if self.memory else [])
+        phase_table = Table(title=title, show_header=True, header_style="bold blue")
+        # Numbers keep their full width; on a narrow terminal the phase names are cut short
+        phase_table.add_column("Phase", style="cyan", no_wrap=True, overflow="ellipsis", max_width=24)
+        for position, column in enumerate(columns, start=1):
+            width = max([len(cells[position]) for cells in rows] + [len(max(column.split(), key=len))])
+            phase_table.add_column(column, justify="right", min_width=width, style="green" if column == "Share" else None)
+        for cells in rows:
+            phase_table.add_row(*cells)
+        return phase_table
+
+    def trace(self):
+        # Chrome trace event format: open in chrome://tracing or https://ui.perfetto.dev
+        pid = os.getpid()
+        events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": label}}
+                  for tid, label in self.threads.items()]
+        epoch = self.epoch
+        events.extend({"name": name, "cat": "phase" if "." not in name else "subsystem", "ph": "X",
+                       "ts": (start - epoch) / 1e3, "dur": (end - start) / 1e3, "pid": pid, "tid": tid}
+                      for name, tid, start, end in self.events or ())
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"dropped_events": self.dropped}}
+
+    def write_trace(self, path):
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(self.trace(), handle)
+
+    def profile_report(self, limit=25, sort="cumulative"):
+        # Top functions from cProfile, as pstats text
+        if self.profile is None:
+            return ""
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream=stream).sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def memory_report(self, limit=15):
+        # Peak traced memory and the source lines holding the most memory when tracing stopped
+        if self.snapshot is None:
+            return ""
+        lines = [f"Peak traced memory: {self.peak / 1024:,.1f} KiB"]
+        for entry in self.snapshot.statistics("lineno")[:limit]:
+            frame = entry.traceback[0]
+            lines.append(f"{entry.size / 1024:10,.1f} KiB {entry.count:8,} blocks  {frame.filename}:{frame.lineno}")
+        return "\n".join(lines)
@@ -0,0 +1,28 @@
+# prompts.py
+
+import time
+
+class TerminalPrompts:
+    # Every question the interactive game asks, answered by the player at the terminal.
+    # `key` names the question and `options` the short names of a numbered menu's entries;
+    # the terminal ignores both, scripted answers (replay.py) rely on them. The UI libraries
+    # are imported on first use, so headless games never load them.
+    def choose(self, key, message, options, default="1"):
+        from rich.prompt import Prompt
+        return Prompt.ask(message, default=default)
+
+    def confirm(self, key, message):
+        from rich.prompt import Confirm
+        return Confirm.ask(message)
+
+    def pause(self, message):
+        input(message)
+
+    def progress(self, description, steps, seconds):
+        # Simulated work time shown as a progress bar
+        from tqdm import tqdm
+        for _ in tqdm(range(steps), desc=description, unit="step"):
+            time.sleep(seconds)
+
+    def delay(self, seconds):
+        time.sleep(seconds)
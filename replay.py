@@ -0,0 +1,240 @@
+# replay.py
+
+import os
+import time
+import zlib
+
+import savegame
+from profiling import Profiler
+from utils import console
+
+# Input scripts hold one answer per line as "<prompt> <answer>"; blank lines and lines
+# starting with "#" are ignored. A script starts with optional "version", "seed", "name"
+# and "scenario" lines.
+#   menu build                  main menu, by option key (or the number that was typed)
+#   build Farm                  building, mission and upgrade menus, by name or number
+#   build Farm x40              a batch of 40 from the building or upgrade menu
+#   mission Metal Mining
+#   upgrade Farm
+#   confirm gather y            confirmations: gather, upgrade_population, upgrade_building
+#   pause                       any "Press Enter" pause
+#   check 12 8f3a21c4           state digest at the end of turn 12, written by the recorder
+# A menu answer of "=<text>" is passed through as typed, so invalid input replays exactly.
+
+# Format of recorded scripts. Version 2 digests cover the fixed-point resource store;
+# scripts without a version line are version 1, and their digests can no longer match.
+SCRIPT_VERSION = 2
+
+class ReplayError(RuntimeError):
+    pass
+
+def state_digest(game):
+    # CRC of the binary save of the whole game state
+    return zlib.crc32(savegame.dumps(game.to_dict(), game.rules))
+
+class ScriptedPrompts:
+    # Answers prompts from a script at full speed: no terminal input, progress bars or pauses.
+    # Any disagreement between the script and the game raises ReplayError.
+    def __init__(self, lines, source="<script>"):
+        self.source = source
+        self.entries = []
+        for number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                kind, _, value = line.partition(" ")
+                self.entries.append((number, kind, value.strip()))
+        self.position = 0
+        self.game = None  # Set by replay() for turn numbers in error messages
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as handle:
+            return cls(handle.read().splitlines(), path)
+
+    def fail(self, message, number=None):
+        turn = f" (turn {self.game.turn})" if self.game is not None else ""
+        where = f"{self.source}:{number}" if number else self.source
+        raise ReplayError(f"{where}{turn}: {message}")
+
+    def peek(self):
+        return self.entries[self.position] if self.position < len(self.entries) else None
+
+    def header(self, kind):
+        entry = self.peek()
+        if entry is not None and entry[1] == kind:
+            self.position += 1
+            return entry[2]
+        return None
+
+    def check_version(self, version):
+        # Scripts without check lines replay under any version; digests only match their own
+        try:
+            version = int(version) if version is not None else 1
+        except ValueError:
+            self.fail(f"malformed version {version!r}")
+        if version > SCRIPT_VERSION:
+            self.fail(f"script format version {version} is newer than this game's {SCRIPT_VERSION}")
+        if version < SCRIPT_VERSION and any(kind == "check" for _, kind, _ in self.entries):
+            self.fail(f"script format version {version} has check digests from before fixed-point "
+                      f"resources; record it again or delete its check lines")
+
+    def next(self, kind):
+        entry = self.peek()
+        if entry is None:
+            self.fail(f"script ended where the game asks for {kind!r}")
+        number, found, value = entry
+        if found != kind:
+            self.fail(f"game asks for {kind!r} but the script has {found!r}", number)
+        self.position += 1
+        return number, value
+
+    def choose(self, key, message, options, default="1"):
+        number, value = self.next(key)
+        if not value:
+            return default
+        if value.startswith("="):
+            return value[1:]
+        if value.isdigit():
+            return value
+        name, _, count = value.rpartition(" x")
+        if name in options and count.isdigit():
+            return f"{options.index(name) + 1}x{count}"  # A batch, as in "build Farm x40"
+        if value not in options:
+            self.fail(f"{value!r} is not offered; choices are {', '.join(options) or 'none'}", number)
+        return str(options.index(value) + 1)
+
+    def confirm(self, key, message):
+        number, value = self.next("confirm")
+        found, _, answer = value.partition(" ")
+        if found != key:
+            self.fail(f"game asks to confirm {key!r} but the script confirms {found!r}", number)
+        if answer not in ("y", "n"):
+            self.fail(f"confirmation must be y or n, not {answer!r}", number)
+        return answer == "y"
+
+    def pause(self, message):
+        self.next("pause")
+
+    def progress(self, description, steps, seconds):
+        pass
+
+    def delay(self, seconds):
+        pass
+
+    def verify(self):
+        # Runs after each turn's resolve phase: compares a recorded state digest, if any
+        entry = self.peek()
+        if entry is None or entry[1] != "check":
+            return
+        number, _, value = entry
+        self.position += 1
+        turn, _, digest = value.partition(" ")
+        try:
+            turn, digest = int(turn), int(digest, 16)
+        except ValueError:
+            self.fail(f"malformed check {value!r}; expected a turn and a hexadecimal digest", number)
+        if turn != self.game.turn or digest != state_digest(self.game):
+            self.fail(f"game state diverged from the recording at turn {turn}", number)
+
+    def finish(self):
+        entry = self.peek()
+        if entry is not None:
+            self.fail(f"game ended ({self.game.outcome}) but the script continues with {entry[1]!r}", entry[0])
+
+class RecordingPrompts:
+    # Asks the player through another prompts object and writes every answer as a script line
+    def __init__(self, prompts, handle):
+        self.prompts = prompts
+        self.handle = handle
+        self.game = None
+
+    def write(self, line):
+        self.handle.write(line + "\n")
+        self.handle.flush()
+
+    def choose(self, key, message, options, default="1"):
+        answer = self.prompts.choose(key, message, options, default)
+        number, separator, count = answer.partition("x")
+        if number.isdigit() and 1 <= int(number) <= len(options) and (not separator or count.isdigit()):
+            self.write(f"{key} {options[int(number) - 1]}" + (f" x{count}" if separator else ""))
+        else:
+            self.write(f"{key} ={answer}")
+        return answer
+
+    def confirm(self, key, message):
+        answer = self.prompts.confirm(key, message)
+        self.write(f"confirm {key} {'y' if answer else 'n'}")
+        return answer
+
+    def pause(self, message):
+        self.prompts.pause(message)
+        self.write("pause")
+
+    def progress(self, description, steps, seconds):
+        self.prompts.progress(description, steps, seconds)
+
+    def delay(self, seconds):
+        self.prompts.delay(seconds)
+
+    def checkpoint(self):
+        self.write(f"check {self.game.turn} {state_digest(self.game):08x}")
+
+def after_resolve(game, phase):
+    # Runs `phase` right after resolve_turn on every interactive turn
+    names = [existing.__name__ for existing in game.turn_phases]
+    game.turn_phases.insert(names.index("resolve_turn") + 1, phase)
+
+def record(game, path, scenario=None):
+    # Records the player's answers for the rest of the game to an input script
+    handle = open(path, "w", encoding="utf-8")
+    recorder = RecordingPrompts(game.prompts, handle)
+    recorder.game = game
+    recorder.write("# Dimensional Architect input script")
+    recorder.write(f"version {SCRIPT_VERSION}")
+    recorder.write(f"seed {game.rng.seed}")
+    recorder.write(f"name {game.player.name}")
+    if scenario:
+        recorder.write(f"scenario {scenario}")
+    game.prompts = recorder
+    after_resolve(game, recorder.checkpoint)
+    return handle
+
+def replay(path, rules=None, show=False, profiler=None, dashboard=False):
+    # Plays an input script through the interactive game loop at full speed. Rendering still
+    # happens, into the null device unless show is set; with show and dashboard, the status
+    # goes to a dashboard.Dashboard. Returns (game, profiler, seconds).
+    from main import create_game
+    script = ScriptedPrompts.load(path)
+    script.check_version(script.header("version"))
+    seed = script.header("seed")
+    name = script.header("name") or "Leader"
+    scenario = script.header("scenario")
+    game = create_game(name, seed=int(seed) if seed else None, rules=rules, scenario=scenario)
+    game.agent.planning = False  # Tips are not recorded; a time-budgeted search would only add noise
+    game.prompts = script
+    script.game = game
+    profiler = profiler or Profiler()
+    profiler.attach(game, label=path)
+    after_resolve(game, script.verify)
+    saved_file = console.file
+    sink = None if show else open(os.devnull, "w", encoding="utf-8")
+    if sink is not None:
+        console.file = sink
+    if show and dashboard:
+        from dashboard import Dashboard
+        game.dashboard = Dashboard(console)
+        game.dashboard.start()
+    start = time.perf_counter()
+    profiler.start()
+    try:
+        game.start()
+    finally:
+        profiler.stop()
+        elapsed = time.perf_counter() - start
+        if game.dashboard is not None:
+            game.dashboard.stop()
+        if sink is not None:
+            console.file = saved_file
+            sink.close()
+    script.finish()
+    return game, profiler, elapsed
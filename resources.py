@@ -1,124 +1,232 @@
 # resources.py
 
-from colorama import Fore, Style
 import random
-from rich.table import Table
-from rich.console import Console
+from array import array
+from collections.abc import MutableMapping
+
+from output import TERMINAL
+from rules import RESOURCE_SCALE, from_fixed, get_rules, to_fixed
+
+class ResourceStore(MutableMapping):
+    # Resource amounts in one slot per rules resource, in rules order, held as fixed-point
+    # integers (rules.RESOURCE_SCALE units each) in a single array. Fractional production
+    # such as 0.5 Metal per person adds up exactly instead of drifting like a float sum.
+    # Reads and writes by name work like the dict it replaces, taking and returning plain
+    # numbers; only the rules' resources have slots. Bulk operations take whole vectors
+    # in fixed-point units, such as the rules' compiled cost_fixed.
+    __slots__ = ("rules", "index", "slots")
+
+    def __init__(self, rules, amounts=()):
+        self.rules = rules
+        self.index = rules.resource_index
+        self.slots = array("q", [0]) * len(rules.resource_names)
+        self.update(amounts)
+
+    def __getitem__(self, name):
+        value = self.slots[self.index[name]]
+        return value / RESOURCE_SCALE if value % RESOURCE_SCALE else value // RESOURCE_SCALE
+
+    def __setitem__(self, name, amount):
+        self.slots[self.index[name]] = to_fixed(amount)
+
+    def __delitem__(self, name):
+        raise TypeError("Resource slots are fixed by the rules")
+
+    def __iter__(self):
+        return iter(self.rules.resource_names)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __repr__(self):
+        return f"ResourceStore({self.copy()!r})"
+
+    def get(self, name, default=None):
+        # from_fixed, inlined here and above: achievements and missions read amounts every turn
+        index = self.index.get(name)
+        if index is None:
+            return default
+        value = self.slots[index]
+        return value / RESOURCE_SCALE if value % RESOURCE_SCALE else value // RESOURCE_SCALE
+
+    def values(self):
+        return [value / RESOURCE_SCALE if value % RESOURCE_SCALE else value // RESOURCE_SCALE for value in self.slots]
+
+    def items(self):
+        return list(zip(self.rules.resource_names, self.values()))
+
+    def copy(self):
+        return dict(self.items())
+
+    def load(self, amounts):
+        # Replaces every amount; resources missing from `amounts` are emptied
+        for index in range(len(self.slots)):
+            self.slots[index] = 0
+        self.update(amounts)
+
+    def add(self, name, amount):
+        self.slots[self.index[name]] += round(amount * RESOURCE_SCALE)
+
+    def add_amounts(self, amounts):
+        # Adds a {resource: amount} dict of plain numbers
+        slots, index = self.slots, self.index
+        for name, amount in amounts.items():
+            slots[index[name]] += round(amount * RESOURCE_SCALE)
+
+    def add_vector(self, vector, times=1):
+        slots = self.slots
+        for index, amount in enumerate(vector):
+            if amount:
+                slots[index] += amount * times
+
+    def covers(self, vector, times=1):
+        # Whether every slot holds at least `times` the vector
+        for held, amount in zip(self.slots, vector):
+            if held < amount * times:
+                return False
+        return True
+
+    def affordable(self, vector):
+        # How many times the vector fits in the slots, in one pass; None if it costs nothing
+        fits = None
+        for held, amount in zip(self.slots, vector):
+            if amount > 0:
+                times = held // amount
+                if fits is None or times < fits:
+                    fits = times
+        return fits if fits is None or fits > 0 else 0
+
+    def spend_vector(self, vector, times=1):
+        if not self.covers(vector, times):
+            return False
+        self.add_vector(vector, -times)
+        return True
 
-console = Console()
+    def clamp(self):
+        # Empties any slot that went negative
+        slots = self.slots
+        for index, value in enumerate(slots):
+            if value < 0:
+                slots[index] = 0
 
 class ResourceManager:
-    def __init__(self):
-        self.resources = {
-            "Light": 100,
-            "Water": 100,
-            "Land": 0,
-            "Energy": 50,
-            "Metal": 0,
-            "Food": 0,
-            "Technology": 0
-        }
+    def __init__(self, rules=None):
+        self.rules = rules or get_rules()
+        self.resources = ResourceStore(self.rules, self.rules.start_resources)
         self.gather_count = 0  # Tracks the number of times resources have been gathered
+        self.rng = random  # Replaced by the game's gather stream in GameLoop
+        self.pending_gains = None  # Gains drawn by a preview, committed by the next gather
+        # Per-turn income in fixed point. The buildings' share is kept until
+        # invalidate_production(); the total is kept for one population size.
+        self.building_income = None
+        self.production = None  # (population, income vector)
+        self.output = TERMINAL  # Replaced by the game's output bus in GameLoop
+
+    def roll_gather(self):
+        # Randomly determine gains within each resource's gather range
+        return {resource: self.rng.randint(*bounds) for resource, bounds in self.rules.gather_ranges.items()}
+
+    def preview_gather(self):
+        # Draw this turn's gains once so the following gather commits the same numbers
+        if self.pending_gains is None:
+            self.pending_gains = self.roll_gather()
+        return self.pending_gains.copy()
 
     def gather(self):
-        console.print("[bold yellow]\n[Action] Gathering resources...[/bold yellow]")
-        # Define possible resource gains
-        possible_gains = {
-            "Light": (5, 15),       # Gain between 5 to 15 Light
-            "Water": (10, 20),      # Gain between 10 to 20 Water
-            "Energy": (5, 10),      # Gain between 5 to 10 Energy
-            "Food": (0, 5)          # Occasionally gain Food
-        }
-        # Randomly determine gains
-        light_gained = random.randint(*possible_gains["Light"])
-        water_gained = random.randint(*possible_gains["Water"])
-        energy_gained = random.randint(*possible_gains["Energy"])
-        food_gained = random.randint(*possible_gains["Food"])
+        if self.output.enabled:
+            self.output.emit("gather_started")
+        gained = self.pending_gains if self.pending_gains is not None else self.roll_gather()
+        self.pending_gains = None
 
         # Update resources
-        self.resources["Light"] += light_gained
-        self.resources["Water"] += water_gained
-        self.resources["Energy"] += energy_gained
-        self.resources["Food"] += food_gained
+        self.resources.add_amounts(gained)
         self.gather_count += 1
 
-        # Display gains
-        gains = []
-        if light_gained > 0:
-            gains.append(f"+{light_gained} {self.get_resource_symbol('Light')} Light")
-        if water_gained > 0:
-            gains.append(f"+{water_gained} {self.get_resource_symbol('Water')} Water")
-        if energy_gained > 0:
-            gains.append(f"+{energy_gained} {self.get_resource_symbol('Energy')} Energy")
-        if food_gained > 0:
-            gains.append(f"+{food_gained} {self.get_resource_symbol('Food')} Food")
-
-        gains_str = ", ".join(gains) if gains else "No resources gained this turn."
-        console.print(f"[bold green][Resource Modification]{gains_str}[/bold green]")
+        if self.output.enabled:
+            self.output.emit("gathered", gains=gained)
+
+    def invalidate_production(self):
+        # Hook for every change to the buildings: construction, upgrades and loading a state.
+        # Code that edits BuildingManager.buildings directly must call it too.
+        self.building_income = None
+        self.production = None
+
+    def production_vector(self, population, buildings):
+        # One turn's income with `population` people, in fixed point: building effects plus
+        # base generation, where truncated resources only count whole units
+        cached = self.production
+        if cached is not None and cached[0] == population:
+            return cached[1]
+        if self.building_income is None:
+            income = [0] * len(self.rules.resource_names)
+            building_effects = self.rules.building_effects_fixed
+            for building, count in buildings.list_buildings().items():
+                for index, bonus in building_effects.get(building, ()):
+                    income[index] += bonus * count
+            self.building_income = tuple(income)
+        income = list(self.building_income)
+        for index, rate, truncated in self.rules.generation_fixed:
+            amount = population * rate
+            if truncated:
+                amount -= amount % RESOURCE_SCALE
+            income[index] += amount
+        income = tuple(income)
+        self.production = (population, income)
+        return income
 
     def generate_automatic_resources(self, population, buildings):
-        # Base generation
-        light_generated = population.current_population * 2
-        water_generated = population.current_population * 1
-        energy_generated = int(population.current_population * 0.5)
-        metal_generated = population.current_population * 0.5
-        food_generated = population.current_population * 1.5
-        tech_generated = population.current_population * 0.2
-
-        # Apply building effects
-        building_effects = buildings.get_building_effects()
+        # The turn's income is one vector add; it is only worked out again after the
+        # buildings or the population changed
+        self.resources.add_vector(self.production_vector(population.current_population, buildings))
+        if self.output.enabled:
+            self.report_production(population.current_population, buildings)
+
+    def report_production(self, population, buildings):
+        # The messages for one turn's income, from building effects and base generation
+        names = self.rules.resource_names
+        building_effects = self.rules.building_effects_fixed
         for building, count in buildings.list_buildings().items():
-            if building in building_effects:
-                effect = building_effects[building]
-                for resource, bonus in effect.items():
-                    if resource in self.resources:
-                        additional = bonus * count
-                        self.resources[resource] += additional
-                        console.print(f"[bold magenta][Building Effect]{building} provides +{additional} {self.get_resource_symbol(resource)} {resource}.[/bold magenta]")
-
-        # Now, add the base resource generation
-        self.resources["Light"] += light_generated
-        self.resources["Water"] += water_generated
-        self.resources["Energy"] += energy_generated
-        self.resources["Metal"] += metal_generated
-        self.resources["Food"] += food_generated
-        self.resources["Technology"] += tech_generated
-
-        # Display auto-generated resources
-        auto_gains = [
-            f"+{light_generated} {self.get_resource_symbol('Light')} Light",
-            f"+{water_generated} {self.get_resource_symbol('Water')} Water",
-            f"+{energy_generated} {self.get_resource_symbol('Energy')} Energy",
-            f"+{metal_generated} {self.get_resource_symbol('Metal')} Metal",
-            f"+{food_generated} {self.get_resource_symbol('Food')} Food",
-            f"+{tech_generated} {self.get_resource_symbol('Technology')} Technology"
-        ]
-        auto_gains_str = ", ".join(auto_gains)
-        console.print(f"[bold green][Auto-Generated]{auto_gains_str}[/bold green]")
-
-    def spend_resources(self, costs):
-        for resource, amount in costs.items():
-            if self.resources.get(resource, 0) < amount:
-                console.print(f"[bold red][Resource Spend] Not enough {resource}. Required: {amount}, Available: {self.resources.get(resource, 0)}.[/bold red]")
-                return False
-        for resource, amount in costs.items():
-            self.resources[resource] -= amount
-        spent_resources = ", ".join([f"{self.get_resource_symbol(res)} {res}: {amt}" for res, amt in costs.items()])
-        console.print(f"[bold green][Resource Spend] Spent resources: {spent_resources}.[/bold green]")
+            for index, bonus in building_effects.get(building, ()):
+                self.output.emit("building_effect", building=building, resource=names[index], amount=from_fixed(bonus * count))
+        generated = {}
+        for index, rate, truncated in self.rules.generation_fixed:
+            amount = population * rate
+            generated[names[index]] = from_fixed(amount - amount % RESOURCE_SCALE if truncated else amount)
+        self.output.emit("auto_generated", gains=generated)
+
+    def spend_resources(self, costs, vector=None, times=1):
+        # Spends `times` the costs at once, or nothing. `vector` is costs in fixed-point
+        # units, when the caller has it compiled already.
+        if not self.resources.spend_vector(vector or self.rules.fixed(costs), times):
+            for resource, amount in costs.items():
+                if self.resources.get(resource, 0) < amount * times:
+                    if self.output.enabled:
+                        self.output.emit("spend_failed", resource=resource, required=amount * times,
+                                         available=self.resources.get(resource, 0))
+                    break
+            return False
+        if self.output.enabled:
+            self.output.emit("spent", costs=costs if times == 1 else {resource: amount * times for resource, amount in costs.items()})
         return True
 
     def add_resources(self, gains):
         for resource, amount in gains.items():
-            self.resources[resource] = self.resources.get(resource, 0) + amount
-            console.print(f"[bold green][Resource Modification] +{amount} {self.get_resource_symbol(resource)} {resource}.[/bold green]")
+            self.resources.add(resource, amount)
+            if self.output.enabled:
+                self.output.emit("resource_added", resource=resource, amount=amount)
 
     def modify_resource(self, resource, amount):
-        if resource in self.resources:
-            self.resources[resource] += amount
-            if self.resources[resource] < 0:
-                self.resources[resource] = 0
-            change = f"+{amount}" if amount >= 0 else f"{amount}"
-            console.print(f"[bold magenta][Resource Modification] {self.get_resource_symbol(resource)} {resource} changed by {change}. New value: {self.resources[resource]}.[/bold magenta]")
+        index = self.resources.index.get(resource)
+        if index is not None:
+            slots = self.resources.slots
+            slots[index] += to_fixed(amount)
+            if slots[index] < 0:
+                slots[index] = 0
+            if self.output.enabled:
+                self.output.emit("resource_modified", resource=resource, amount=amount, value=self.resources[resource])
 
     def get_resources(self):
         return self.resources.copy()
@@ -127,19 +235,10 @@ class ResourceManager:
         return self.gather_count
 
     def get_resource_symbol(self, resource):
-        symbols = {
-            "Light": "✨",
-            "Water": "💧",
-            "Land": "🌍",
-            "Energy": "⚡",
-            "Metal": "🔩",
-            "Food": "🍖",
-            "Technology": "💻"
-        }
-        return symbols.get(resource, "")
+        return self.rules.resource_symbols.get(resource, "")
 
     def to_dict(self):
         return self.resources.copy()
 
     def from_dict(self, data):
-        self.resources = data.copy()
+        self.resources.load(data)
@@ -0,0 +1,107 @@
+# rng.py
+
+import math
+import os
+import zlib
+
+MASK64 = (1 << 64) - 1
+GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+DOUBLE_UNIT = 1.0 / (1 << 53)
+
+# Subsystems that draw random numbers; each gets its own independent stream
+STREAMS = ("gather", "events", "advisor")
+
+def mix64(value):
+    # SplitMix64 finalizer: a bijective 64-bit hash with good avalanche
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & MASK64
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & MASK64
+    return value ^ (value >> 31)
+
+class RngStream:
+    # Counter-based generator: draw i of turn t is mix64(key(seed, stream, t) + i * gamma),
+    # so any turn can be reached with jump(turn) without generating earlier draws
+    __slots__ = ("key", "turn", "counter", "base")
+
+    def __init__(self, seed, name):
+        self.key = mix64((seed & MASK64) ^ mix64(zlib.crc32(name.encode())))
+        self.jump(0)
+
+    def jump(self, turn):
+        self.turn = turn
+        self.counter = 0
+        self.base = mix64(self.key ^ mix64(turn * GOLDEN_GAMMA & MASK64))
+
+    def next64(self):
+        self.counter += 1
+        return mix64((self.base + self.counter * GOLDEN_GAMMA) & MASK64)
+
+    def random(self):
+        return (self.next64() >> 11) * DOUBLE_UNIT
+
+    def randint(self, a, b):
+        # Inclusive on both ends, like random.randint
+        return a + ((self.next64() * (b - a + 1)) >> 64)
+
+    def choice(self, seq):
+        return seq[(self.next64() * len(seq)) >> 64]
+
+    def binomial(self, n, p):
+        # Successes in n independent trials: exact inversion of the distribution for small
+        # means, normal approximation once the mean is large enough for it to be accurate
+        if n <= 0 or p <= 0:
+            return 0
+        if p >= 1:
+            return n
+        if p > 0.5:
+            return n - self.binomial(n, 1.0 - p)
+        mean = n * p
+        if mean < 30:
+            ratio = p / (1.0 - p)
+            pmf = math.exp(n * math.log1p(-p))
+            cdf = pmf
+            u = self.random()
+            k = 0
+            while u > cdf and k < n:
+                pmf *= (n - k) / (k + 1) * ratio
+                k += 1
+                cdf += pmf
+            return k
+        z = math.sqrt(-2.0 * math.log(1.0 - self.random())) * math.cos(2.0 * math.pi * self.random())
+        return min(n, max(0, round(mean + z * math.sqrt(mean * (1.0 - p)))))
+
+    def multinomial(self, n, probabilities):
+        # Counts per category for n draws, as a chain of conditional binomials
+        counts = []
+        remaining = 1.0
+        for p in probabilities[:-1]:
+            k = self.binomial(n, min(1.0, p / remaining)) if remaining > 0 and n else 0
+            counts.append(k)
+            n -= k
+            remaining -= p
+        counts.append(n)
+        return counts
+
+class GameRng:
+    # One seed per game, one stream per subsystem
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), "little")
+        self.seed = seed
+        self.streams = {name: RngStream(seed, name) for name in STREAMS}
+        self.gather = self.streams["gather"]
+        self.events = self.streams["events"]
+        self.advisor = self.streams["advisor"]
+
+    def jump(self, turn):
+        # Position every stream at the first draw of the given turn
+        for stream in self.streams.values():
+            stream.jump(turn)
+
+    def state(self):
+        return {name: (stream.turn, stream.counter) for name, stream in self.streams.items()}
+
+    def restore(self, state):
+        for name, (turn, counter) in state.items():
+            stream = self.streams[name]
+            stream.jump(turn)
+            stream.counter = counter
@@ -0,0 +1,233 @@
+# rules.py
+
+import marshal
+import os
+import zlib
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules.json")
+
+EVENT_EFFECT_TYPES = ("add", "modify", "population")
+RESOURCE_SCALE = 1000  # Fixed-point units per resource: amounts are exact to 0.001
+REWARD_TYPES = ("resource", "population")
+
+class RulesError(ValueError):
+    pass
+
+class FrozenDict(dict):
+    # Read-only dict for compiled tables; still a dict, so lookups cost nothing extra
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Rules tables are read-only")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __hash__(self):
+        return hash(tuple(sorted(self.items())))
+
+EMPTY = FrozenDict()
+
+def to_fixed(amount):
+    return round(amount * RESOURCE_SCALE)
+
+def from_fixed(value):
+    # Whole amounts come back as ints, the rest as floats
+    whole, fraction = divmod(value, RESOURCE_SCALE)
+    return whole if not fraction else value / RESOURCE_SCALE
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+class Rules:
+    # Static game data compiled once into immutable, index-addressed tables.
+    # Instances are plain picklable objects, so they can be shipped to worker processes.
+    def __init__(self, data, fingerprint=None):
+        self.data = freeze(data)
+        # Stable 32-bit hash of the rules content; saved games and caches record it
+        self.fingerprint = rules_fingerprint(data) if fingerprint is None else fingerprint
+
+        # Resources
+        self.resource_names = tuple(r["name"] for r in data["resources"])
+        self.resource_index = FrozenDict((name, idx) for idx, name in enumerate(self.resource_names))
+        self.resource_symbols = FrozenDict((r["name"], r["symbol"]) for r in data["resources"])
+        self.resource_colors = FrozenDict((r["name"], r["color"]) for r in data["resources"])
+        self.start_resources = FrozenDict((r["name"], r["start"]) for r in data["resources"])
+
+        # Population, generation, gathering and experience
+        self.population = freeze(data["population"])
+        self.generation = freeze(data["generation"]["per_population"])
+        self.truncated = frozenset(data["generation"]["truncate"])
+        # (resource index, fixed-point rate, truncated) for each generated resource
+        self.generation_fixed = tuple((self.resource_index[name], to_fixed(rate), name in self.truncated)
+                                      for name, rate in self.generation.items())
+        self.gather_ranges = FrozenDict((name, tuple(bounds)) for name, bounds in data["gather"].items())
+        self.experience = freeze(data["experience"])
+
+        # Buildings
+        self.buildings = tuple(
+            FrozenDict(index=idx, name=b["name"], emoji=b["emoji"], cost=freeze(b["cost"]),
+                       effects=freeze(b["effects"]), upgrade_cost=freeze(b["upgrade_cost"]),
+                       cost_vector=self.vector(b["cost"]), upgrade_cost_vector=self.vector(b["upgrade_cost"]),
+                       cost_fixed=self.fixed(b["cost"]), upgrade_cost_fixed=self.fixed(b["upgrade_cost"]),
+                       effects_fixed=self.fixed(b["effects"]))
+            for idx, b in enumerate(data["buildings"]))
+        self.building_names = tuple(b["name"] for b in self.buildings)
+        self.building_index = FrozenDict((b["name"], b["index"]) for b in self.buildings)
+        self.building_by_name = FrozenDict((b["name"], b) for b in self.buildings)
+        self.building_emojis = FrozenDict((b["name"], b["emoji"]) for b in self.buildings)
+        self.building_effects = FrozenDict((b["name"], b["effects"]) for b in self.buildings)
+        self.upgrade_costs = FrozenDict((b["name"], b["upgrade_cost"]) for b in self.buildings)
+        # Building name -> (resource index, fixed-point amount) for each resource it produces
+        self.building_effects_fixed = FrozenDict(
+            (b["name"], tuple((idx, amount) for idx, amount in enumerate(b["effects_fixed"]) if amount))
+            for b in self.buildings)
+        self.upgrade_costs_fixed = FrozenDict((b["name"], b["upgrade_cost_fixed"]) for b in self.buildings)
+        self.population_cost_fixed = self.fixed(data["population"]["upgrade_cost"])
+
+        # Events, missions and achievements
+        self.events = tuple(FrozenDict(index=idx, **freeze(e)) for idx, e in enumerate(data["events"]))
+        self.missions = tuple(
+            FrozenDict(freeze(m), index=idx, requirements=FrozenDict(
+                resources=freeze(m["requirements"].get("resources", {})),
+                resources_fixed=self.fixed(m["requirements"].get("resources", {})),
+                buildings=freeze(m["requirements"].get("buildings", {}))))
+            for idx, m in enumerate(data["missions"]))
+        self.mission_by_name = FrozenDict((m["name"], m) for m in self.missions)
+        self.achievements = tuple(FrozenDict(index=idx, **freeze(a)) for idx, a in enumerate(data["achievements"]))
+        self.achievement_names = tuple(a["name"] for a in self.achievements)
+
+    def vector(self, amounts):
+        # Amounts keyed by resource name as a tuple in resource order
+        return tuple(amounts.get(name, 0) for name in self.resource_names)
+
+    def fixed(self, amounts):
+        # The same vector in fixed-point units, as resources.ResourceStore holds them
+        return tuple(to_fixed(amounts.get(name, 0)) for name in self.resource_names)
+
+    def __getstate__(self):
+        return {"data": self.data}
+
+    def __setstate__(self, state):
+        self.__init__(state["data"])
+
+def _require(condition, message):
+    if not condition:
+        raise RulesError(message)
+
+def validate(data):
+    for section in ("resources", "population", "generation", "gather", "experience",
+                    "buildings", "events", "missions", "achievements"):
+        _require(section in data, f"Missing rules section: {section}")
+    resources = [r["name"] for r in data["resources"]]
+    _require(len(set(resources)) == len(resources), "Duplicate resource names")
+    buildings = [b["name"] for b in data["buildings"]]
+    _require(len(set(buildings)) == len(buildings), "Duplicate building names")
+
+    def check_amounts(amounts, where):
+        for name, amount in amounts.items():
+            _require(name in resources, f"{where}: unknown resource {name!r}")
+            _require(isinstance(amount, (int, float)), f"{where}: amount for {name} must be a number")
+            _require(abs(amount * RESOURCE_SCALE - to_fixed(amount)) < 1e-6,
+                     f"{where}: amount for {name} must be a multiple of {1 / RESOURCE_SCALE}")
+
+    def check_reward(reward, where):
+        _require(reward.get("type") in REWARD_TYPES, f"{where}: reward type must be one of {REWARD_TYPES}")
+        if reward["type"] == "resource":
+            _require(reward.get("resource") in resources, f"{where}: unknown reward resource {reward.get('resource')!r}")
+        _require(isinstance(reward.get("turns"), int) and reward["turns"] > 0, f"{where}: reward turns must be a positive integer")
+        _require(isinstance(reward.get("value"), (int, float)), f"{where}: reward value must be a number")
+
+    check_amounts(data["population"]["upgrade_cost"], "population upgrade")
+    check_amounts(data["generation"]["per_population"], "generation")
+    for name in data["generation"]["truncate"]:
+        _require(name in resources, f"generation: unknown truncated resource {name!r}")
+    for name, bounds in data["gather"].items():
+        _require(name in resources, f"gather: unknown resource {name!r}")
+        _require(len(bounds) == 2 and bounds[0] <= bounds[1], f"gather: bad range for {name}")
+    for building in data["buildings"]:
+        for key in ("cost", "effects", "upgrade_cost"):
+            check_amounts(building[key], f"building {building['name']} {key}")
+    for event in data["events"]:
+        _require(0 <= event["chance"] <= 1, f"event {event['name']}: chance must be within [0, 1]")
+        for effect in event["effects"]:
+            _require(effect["type"] in EVENT_EFFECT_TYPES, f"event {event['name']}: unknown effect type {effect['type']!r}")
+            if effect["type"] == "add":
+                check_amounts(effect["resources"], f"event {event['name']}")
+            elif effect["type"] == "modify":
+                _require(effect["resource"] in resources, f"event {event['name']}: unknown resource {effect['resource']!r}")
+    mission_names = [m["name"] for m in data["missions"]]
+    _require(len(set(mission_names)) == len(mission_names), "Duplicate mission names")
+    for mission in data["missions"]:
+        _require(mission["duration"] > 0, f"mission {mission['name']}: duration must be positive")
+        check_amounts(mission["requirements"].get("resources", {}), f"mission {mission['name']}")
+        for name in mission["requirements"].get("buildings", {}):
+            _require(name in buildings, f"mission {mission['name']}: unknown building {name!r}")
+        check_reward(mission["reward"], f"mission {mission['name']}")
+    achievement_names = [a["name"] for a in data["achievements"]]
+    _require(len(set(achievement_names)) == len(achievement_names), "Duplicate achievement names")
+    _require("Victory" in achievement_names, "Rules must define a Victory achievement")
+    for achievement in data["achievements"]:
+        metric = achievement["metric"]
+        kind, _, name = metric.partition(":")
+        if kind == "resource":
+            _require(name in resources, f"achievement {achievement['name']}: unknown resource {name!r}")
+        elif kind == "building":
+            _require(name in buildings, f"achievement {achievement['name']}: unknown building {name!r}")
+        _require(isinstance(achievement["threshold"], (int, float)), f"achievement {achievement['name']}: threshold must be a number")
+        check_reward(achievement["reward"], f"achievement {achievement['name']}")
+
+def rules_fingerprint(data):
+    import json
+    return zlib.crc32(json.dumps(data, sort_keys=True).encode("utf-8"))
+
+def compile_rules(data, fingerprint=None):
+    try:
+        validate(data)
+        return Rules(data, fingerprint)
+    except (KeyError, TypeError, AttributeError) as exc:
+        raise RulesError(f"Malformed rules: {exc!r}") from exc
+
+def cache_path(path):
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, "__pycache__", name + ".marshal")
+
+def load_rules(path=RULES_PATH):
+    # The parsed rules and their fingerprint are cached with marshal in __pycache__, keyed by
+    # the file's size and modification time like a .pyc, so most processes skip json entirely
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime_ns)
+    cache = cache_path(path)
+    try:
+        with open(cache, "rb") as handle:
+            cached_key, data, fingerprint = marshal.load(handle)
+        if tuple(cached_key) == key:
+            return compile_rules(data, fingerprint)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    import json
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    rules = compile_rules(data)
+    try:
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        temp_path = f"{cache}.{os.getpid()}"
+        with open(temp_path, "wb") as handle:
+            marshal.dump((key, data, rules.fingerprint), handle)
+        os.replace(temp_path, cache)
+    except OSError:
+        pass  # Read-only install: parse the JSON every time
+    return rules
+
+_default_rules = None
+
+def get_rules():
+    # Default rules, loaded and compiled once per process
+    global _default_rules
+    if _default_rules is None:
+        _default_rules = load_rules()
+    return _default_rules
@@ -0,0 +1,259 @@
+# savegame.py
+
+import os
+import struct
+
+from rules import get_rules
+
+MAGIC = b"DASV"
+VERSION = 2  # 2: completed missions kept as an archive of counts
+OUTCOMES = (None, "victory", "depleted", "quit")
+BUFF_TYPES = ("population", "resource")
+
+# Header: magic, format version, fingerprint of the rules the state was saved under.
+# Buildings, achievements, missions and resources are written as rules indices, so a save
+# only loads under the same rules.
+HEADER = struct.Struct("<4sHI")
+GAME = struct.Struct("<QqB?")  # seed, turn, outcome code, game over
+COUNT = struct.Struct("<H")
+INDEXED_COUNT = struct.Struct("<Hq")  # rules index, count or turn
+MISSION = struct.Struct("<Hq")  # mission index, turns left
+BUFF = struct.Struct("<Bqh")  # buff type, turns left, resource index (-1: none)
+
+class SaveError(ValueError):
+    pass
+
+class Writer:
+    def __init__(self):
+        self.parts = []
+
+    def pack(self, layout, *values):
+        self.parts.append(layout.pack(*values))
+
+    def text(self, value):
+        data = value.encode("utf-8")
+        self.parts.append(COUNT.pack(len(data)))
+        self.parts.append(data)
+
+    def numbers(self, values):
+        # Ints stay ints and floats stay floats, so a restored game displays the same values
+        codes = "".join("d" if isinstance(value, float) else "q" for value in values)
+        self.text(codes)
+        self.parts.append(struct.pack("<" + codes, *values))
+
+    def getvalue(self):
+        return b"".join(self.parts)
+
+class Reader:
+    def __init__(self, data, offset=0):
+        self.data = data
+        self.offset = offset
+
+    def unpack(self, layout):
+        values = layout.unpack_from(self.data, self.offset)
+        self.offset += layout.size
+        return values
+
+    def text(self):
+        (length,) = COUNT.unpack_from(self.data, self.offset)
+        start = self.offset + COUNT.size
+        self.offset = start + length
+        return bytes(self.data[start:self.offset]).decode("utf-8")
+
+    def numbers(self):
+        codes = "<" + self.text()
+        values = struct.unpack_from(codes, self.data, self.offset)
+        self.offset += struct.calcsize(codes)
+        return values
+
+def dumps(state, rules=None):
+    # Encodes a GameLoop.to_dict() state into the compact binary save format
+    rules = rules or get_rules()
+    out = Writer()
+    out.pack(HEADER, MAGIC, VERSION, rules.fingerprint)
+    out.pack(GAME, state["seed"] & (1 << 64) - 1, state["turn"], OUTCOMES.index(state["outcome"]), state["game_over"])
+
+    player = state["player"]
+    out.text(player["name"])
+    out.numbers((player["level"], player["experience"]))
+    out.text(state["agent"]["player_name"])
+    out.pack(COUNT, state["agent"]["current_intro_message"])
+
+    population = state["population"]
+    out.numbers((population["current_population"], population["max_population"], population["accumulated_growth"]))
+    resources = state["resources"]
+    out.numbers(tuple(resources.get(name, 0) for name in rules.resource_names) + (state["gather_count"],))
+
+    buildings = state["buildings"]
+    out.pack(COUNT, len(buildings))
+    for name, count in buildings.items():
+        out.pack(INDEXED_COUNT, rules.building_index[name], count)
+
+    achievements = state["achievements"]
+    unlock_turns = achievements["unlock_turns"]
+    out.pack(COUNT, len(achievements["unlocked"]))
+    for name in achievements["unlocked"]:
+        out.pack(INDEXED_COUNT, rules.achievement_names.index(name), unlock_turns.get(name, -1))
+
+    out.pack(COUNT, len(state["active_buffs"]))
+    for buff in state["active_buffs"]:
+        resource = buff.get("resource")
+        out.pack(BUFF, BUFF_TYPES.index(buff["type"]), buff["turns_left"], rules.resource_index[resource] if resource else -1)
+        out.text(buff["name"])
+        out.text(buff["description"])
+        out.numbers((buff["value"],))
+
+    out.pack(COUNT, len(state["missions"]))
+    for mission in state["missions"]:
+        out.pack(MISSION, rules.mission_by_name[mission["name"]]["index"], mission["turns_left"])
+    out.pack(COUNT, len(state["mission_archive"]))
+    for name, count in state["mission_archive"].items():
+        out.pack(INDEXED_COUNT, rules.mission_by_name[name]["index"], count)
+    return out.getvalue()
+
+def loads(data, rules=None):
+    # Decodes a binary save back into the GameLoop.to_dict() shape
+    rules = rules or get_rules()
+    if len(data) < HEADER.size:
+        raise SaveError("Truncated save data")
+    source = Reader(data)
+    magic, version, fingerprint = source.unpack(HEADER)
+    if magic != MAGIC:
+        raise SaveError("Not a Dimensional Architect save")
+    if version != VERSION:
+        raise SaveError(f"Unsupported save version {version} (expected {VERSION})")
+    if fingerprint != rules.fingerprint:
+        raise SaveError("Save was written under different game rules")
+    try:
+        seed, turn, outcome, game_over = source.unpack(GAME)
+        name = source.text()
+        level, experience = source.numbers()
+        agent_name = source.text()
+        (intro,) = source.unpack(COUNT)
+        current, maximum, growth = source.numbers()
+        values = source.numbers()
+        resources = dict(zip(rules.resource_names, values))
+
+        (count,) = source.unpack(COUNT)
+        buildings = {}
+        for _ in range(count):
+            idx, built = source.unpack(INDEXED_COUNT)
+            buildings[rules.building_names[idx]] = built
+
+        (count,) = source.unpack(COUNT)
+        unlocked, unlock_turns = [], {}
+        for _ in range(count):
+            idx, unlock_turn = source.unpack(INDEXED_COUNT)
+            unlocked.append(rules.achievement_names[idx])
+            if unlock_turn >= 0:
+                unlock_turns[rules.achievement_names[idx]] = unlock_turn
+
+        (count,) = source.unpack(COUNT)
+        buffs = []
+        for _ in range(count):
+            buff_type, turns_left, resource = source.unpack(BUFF)
+            buff = {"name": source.text(), "type": BUFF_TYPES[buff_type], "description": source.text(),
+                    "value": source.numbers()[0], "turns_left": turns_left}
+            if resource >= 0:
+                buff["resource"] = rules.resource_names[resource]
+            buffs.append(buff)
+
+        (count,) = source.unpack(COUNT)
+        missions = []
+        for _ in range(count):
+            idx, turns_left = source.unpack(MISSION)
+            missions.append({"name": rules.missions[idx]["name"], "turns_left": turns_left})
+
+        (count,) = source.unpack(COUNT)
+        archive = {}
+        for _ in range(count):
+            idx, completed = source.unpack(INDEXED_COUNT)
+            archive[rules.missions[idx]["name"]] = completed
+    except (struct.error, IndexError, UnicodeDecodeError) as exc:
+        raise SaveError(f"Corrupt save data: {exc}") from exc
+    return {
+        "seed": seed,
+        "turn": turn,
+        "game_over": game_over,
+        "outcome": OUTCOMES[outcome],
+        "player": {"name": name, "level": level, "experience": experience},
+        "agent": {"player_name": agent_name, "current_intro_message": intro},
+        "population": {"current_population": current, "max_population": maximum, "accumulated_growth": growth},
+        "resources": resources,
+        "gather_count": values[-1],
+        "buildings": buildings,
+        "achievements": {"unlocked": unlocked, "unlock_turns": unlock_turns},
+        "active_buffs": buffs,
+        "missions": missions,
+        "mission_archive": archive
+    }
+
+def write_atomic(path, data, sync=True):
+    # Write to a temporary file in the same directory, then rename over the target, so
+    # readers see either the old file or the new one, never a partial write
+    import tempfile
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".sav")
+    try:
+        with os.fdopen(handle, "wb") as temp:
+            temp.write(data)
+            if sync:
+                temp.flush()
+                os.fsync(temp.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def save_game(game, path, sync=True):
+    write_atomic(path, dumps(game.to_dict(), game.rules), sync)
+
+def restore_game(game, path):
+    # Loads a save into an existing game in place
+    with open(path, "rb") as handle:
+        game.from_dict(loads(handle.read(), game.rules))
+    return game
+
+def apply_scenario(game, path):
+    # Scenario files are binary saves or JSON documents with any subset of the
+    # GameLoop.to_dict() keys; nested sections are merged over the game's current state
+    with open(path, "rb") as handle:
+        data = handle.read()
+    if data.startswith(MAGIC):
+        game.from_dict(loads(data, game.rules))
+        return game
+    import json
+    try:
+        scenario = json.loads(data)
+    except ValueError as exc:
+        raise SaveError(f"{path}: scenario is neither a save nor JSON: {exc}") from exc
+    state = game.to_dict()
+    for key, value in scenario.items():
+        if key not in state:
+            raise SaveError(f"{path}: unknown scenario key {key!r}")
+        if isinstance(state[key], dict):
+            state[key].update(value)
+        else:
+            state[key] = value
+    for name in state["resources"]:
+        if name not in game.rules.resource_index:
+            raise SaveError(f"{path}: unknown resource {name!r}")
+    for name in state["buildings"]:
+        if name not in game.rules.building_index:
+            raise SaveError(f"{path}: unknown building {name!r}")
+    for name in state["achievements"]["unlocked"]:
+        if name not in game.achievements.achievements:
+            raise SaveError(f"{path}: unknown achievement {name!r}")
+    missions = []
+    for mission in state["missions"]:
+        details = game.rules.mission_by_name.get(mission["name"])
+        if details is None:
+            raise SaveError(f"{path}: unknown mission {mission['name']!r}")
+        missions.append({"name": details["name"], "turns_left": mission.get("turns_left", details["duration"])})
+    state["missions"] = missions
+    for name in state["mission_archive"]:
+        if name not in game.rules.mission_by_name:
+            raise SaveError(f"{path}: unknown mission {name!r}")
+    game.from_dict(state)
+    return game
@@ -0,0 +1,185 @@
+# server.py
+
+import argparse
+import asyncio
+import json
+
+import actions
+from main import create_game
+from output import OutputBus, MemorySink
+from planner import legal_actions
+from profiling import Profiler
+from rules import get_rules
+
+MAX_LINE = 1 << 12  # Longest request line; also sizes each session's read buffer
+WRITE_BUFFER = 1 << 16  # Unsent reply bytes per session before the session waits for its client
+
+# Protocol: newline-delimited JSON over TCP or a Unix socket. The server greets each
+# connection with {"ok": true, "session": id, "turn": 1}; every request gets exactly one reply.
+#   {"action": "build", "target": "Farm"}  plays one turn; the reply lists the turn's messages
+#   {"query": "state"}                      the full GameLoop.to_dict() state
+#   {"query": "actions"}                    every useful action this turn
+#   {"query": "profile"}                    per-phase call counts and latencies of every session
+#                                           (servers started with --profile)
+# Errors reply {"ok": false, "error": "..."} and leave the game untouched. An unexpected
+# exception while handling a request may have stopped a turn half-way, so it is replied as
+# an internal error and the session is closed.
+
+def error(message):
+    return {"ok": False, "error": message}
+
+class Session:
+    # One player's headless game. A turn is played only when an action message arrives,
+    # so an idle session costs no CPU at all.
+    def __init__(self, session_id, rules, seed=None, profiler=None):
+        self.id = session_id
+        self.sink = MemorySink()
+        self.game = create_game(headless=True, seed=seed, rules=rules, output=OutputBus(self.sink))
+        self.profiler = profiler  # Shared by every session of a profiled server
+        if profiler is not None:
+            profiler.attach(self.game, session_id, f"session {session_id}")
+
+    def handle(self, line):
+        try:
+            message = json.loads(line)
+        except ValueError:
+            return error("Malformed JSON")
+        if not isinstance(message, dict):
+            return error("Requests must be JSON objects")
+        game = self.game
+        query = message.get("query")
+        if query == "state":
+            return {"ok": True, "state": game.to_dict()}
+        if query == "actions":
+            return {"ok": True, "actions": [describe_action(game, a) for a in legal_actions(game)]}
+        if query == "profile":
+            if self.profiler is None:
+                return error("Profiling is off; start the server with --profile")
+            return {"ok": True, "profile": self.profiler.summary()}
+        if query is not None:
+            return error(f"Unknown query: {query!r}")
+        kind = message.get("action")
+        if kind not in actions.ACTION_KINDS:
+            return error(f"Unknown action: {kind!r}")
+        count = message.get("count", 1)
+        if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+            return error("count must be a positive integer")
+        target = message.get("target")
+        if target is not None and not isinstance(target, str):
+            return error("target must be a string")
+        performed = game.play_turn(actions.Action(kind, target, count))
+        events = [dict(fields, kind=kind) for kind, fields in self.sink.events]
+        self.sink.events.clear()
+        return {"ok": True, "turn": game.turn - 1, "performed": performed, "events": events,
+                "game_over": game.game_over, "outcome": game.outcome}
+
+def describe_action(game, action):
+    # Builds and building upgrades also say how many could be done at once
+    described = {"action": action.kind, "target": action.target}
+    if action.kind == actions.BUILD:
+        described["max_count"] = game.buildings.max_affordable(game.buildings.get_building(action.target), game.resources)
+    elif action.kind == actions.UPGRADE_BUILDING:
+        described["max_count"] = game.buildings.max_upgrades(action.target, game.resources)
+    return described
+
+class GameServer:
+    # Hosts many sessions in one event loop. Each connection is read one request at a time
+    # and every reply is drained before the next read, so a client that stops reading stalls
+    # only its own session; one that stays silent or slow past the timeouts is dropped.
+    def __init__(self, rules=None, max_sessions=10000, idle_timeout=300.0, write_timeout=10.0, first_seed=None, profiler=None):
+        self.rules = rules or get_rules()
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.write_timeout = write_timeout
+        self.first_seed = first_seed  # Session k plays seed first_seed + k; None for random seeds
+        self.profiler = profiler  # Optional profiling.Profiler timing every session's phases
+        self.sessions = {}
+        self.next_id = 0
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=8765, path=None):
+        # Listens on a Unix socket when a path is given, otherwise on TCP. The accept backlog is
+        # sized for the session limit (the kernel may cap it) so connection bursts are not refused.
+        if path:
+            self.server = await asyncio.start_unix_server(self.handle_client, path=path, limit=MAX_LINE, backlog=self.max_sessions)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE, backlog=self.max_sessions)
+        return self.server
+
+    async def send(self, writer, reply):
+        writer.write(json.dumps(reply).encode("utf-8") + b"\n")
+        await asyncio.wait_for(writer.drain(), self.write_timeout)
+
+    async def handle_client(self, reader, writer):
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER)
+        if len(self.sessions) >= self.max_sessions:
+            writer.write(json.dumps(error("Server is full")).encode("utf-8") + b"\n")
+            writer.close()
+            return
+        session_id = self.next_id
+        self.next_id += 1
+        seed = None if self.first_seed is None else self.first_seed + session_id
+        session = self.sessions[session_id] = Session(session_id, self.rules, seed, self.profiler)
+        try:
+            await self.send(writer, {"ok": True, "session": session_id, "turn": session.game.turn})
+            while not session.game.game_over:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    writer.write(json.dumps(error("Idle timeout")).encode("utf-8") + b"\n")
+                    break
+                except ValueError:
+                    # Line longer than MAX_LINE; the stream cannot be resynchronised
+                    writer.write(json.dumps(error("Request too long")).encode("utf-8") + b"\n")
+                    break
+                if not line:
+                    break
+                try:
+                    reply = session.handle(line)
+                except Exception as exc:  # The game may be part-way through a turn; end the session
+                    await self.send(writer, error(f"Internal error: {type(exc).__name__}: {exc}"))
+                    break
+                await self.send(writer, reply)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        except asyncio.CancelledError:
+            pass  # Server shutting down; end the session quietly
+        finally:
+            del self.sessions[session_id]
+            writer.close()
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+async def serve(host, port, path, **options):
+    server = GameServer(**options)
+    listener = await server.start(host, port, path)
+    for sock in listener.sockets:
+        print(f"Serving Dimensional Architect on {sock.getsockname()}")
+    await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many headless games over a local socket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="Seconds before a silent session is closed")
+    parser.add_argument("--write-timeout", type=float, default=10.0, help="Seconds a reply may wait for a slow client")
+    parser.add_argument("--seed", type=int, default=None, help="First seed; session k uses seed + k")
+    parser.add_argument("--profile", action="store_true", help="Time every phase of every session; adds the profile query")
+    parser.add_argument("--trace", metavar="FILE", help="Profile, and write a Chrome trace of every phase call on shutdown")
+    args = parser.parse_args()
+    profiler = Profiler(trace=True) if args.trace else Profiler() if args.profile else None
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, max_sessions=args.max_sessions, idle_timeout=args.idle_timeout,
+                          write_timeout=args.write_timeout, first_seed=args.seed, profiler=profiler))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.trace:
+            profiler.write_trace(args.trace)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# sweep.py
+
+import argparse
+import copy
+import glob
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+from policies import POLICIES, make_policy
+from rules import RULES_PATH, RulesError, compile_rules
+from tournament import TournamentResult, make_tasks, play_chunk
+
+CACHE_DIR = "sweep_cache"
+SAMPLE_DIGITS = 3  # Sampled floats are rounded to the rules' fixed-point precision
+
+# Parameters are dotted paths into rules.json. List sections are addressed by entry name:
+#   buildings.Farm.cost.Land                 a building's cost in one resource
+#   events.Resource Surge.chance             an event's chance per turn
+#   achievements.Population Growth.threshold an achievement's unlock threshold
+#   missions.Metal Mining.requirements.resources.Metal
+
+class SweepError(ValueError):
+    pass
+
+def load_data(path=RULES_PATH):
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+def resolve(data, path):
+    # Container holding the parameter and its key there
+    parts = path.split(".")
+    node = data
+    for part in parts[:-1]:
+        if isinstance(node, list):
+            matches = [entry for entry in node if isinstance(entry, dict) and entry.get("name") == part]
+            if not matches:
+                raise SweepError(f"{path}: no entry named {part!r}")
+            node = matches[0]
+        elif isinstance(node, dict) and part in node:
+            node = node[part]
+        else:
+            raise SweepError(f"{path}: no section {part!r}")
+    if not isinstance(node, dict):
+        raise SweepError(f"{path}: {parts[-1]!r} is not a setting")
+    return node, parts[-1]
+
+def apply_params(data, params):
+    # Copy of the rules data with each parameter set; a dict key that is missing is added,
+    # so a building can be given a cost in a resource it did not cost before
+    data = copy.deepcopy(data)
+    for path, value in params:
+        node, key = resolve(data, path)
+        node[key] = value
+    return data
+
+def parse_value(text):
+    try:
+        value = json.loads(text)
+    except ValueError:
+        raise SweepError(f"not a number: {text!r}")
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise SweepError(f"not a number: {text!r}")
+    return value
+
+def parse_grid(spec):
+    # "path=v1,v2,..." -> (path, [values])
+    path, _, values = spec.rpartition("=")
+    if not path or not values:
+        raise SweepError(f"grid parameter must look like path=v1,v2: {spec!r}")
+    return path, [parse_value(value) for value in values.split(",")]
+
+def parse_range(spec):
+    # "path=low:high" -> (path, low, high)
+    path, _, bounds = spec.rpartition("=")
+    low, _, high = bounds.partition(":")
+    if not path or not low or not high:
+        raise SweepError(f"sampled parameter must look like path=low:high: {spec!r}")
+    low, high = parse_value(low), parse_value(high)
+    if low > high:
+        raise SweepError(f"{path}: empty range {low}:{high}")
+    return path, low, high
+
+def sample_value(rng, low, high):
+    # Whole numbers for integer bounds, otherwise a float at fixed-point precision
+    if isinstance(low, int) and isinstance(high, int):
+        return rng.randint(low, high)
+    return round(rng.uniform(low, high), SAMPLE_DIGITS)
+
+def configurations(grid=(), ranges=(), samples=0, sample_seed=0):
+    # Parameter settings as tuples of (path, value): the grid's cartesian product, each
+    # point paired with `samples` random draws over the ranges when any are given
+    grid_points = list(itertools.product(*[[(path, value) for value in values] for path, values in grid]))
+    if not ranges:
+        return [tuple(point) for point in grid_points]
+    rng = random.Random(sample_seed)
+    draws = [tuple((path, sample_value(rng, low, high)) for path, low, high in ranges) for _ in range(samples)]
+    return [tuple(point) + draw for point in grid_points for draw in draws]
+
+def code_version(directory=None):
+    # Hash of every Python source in the game's directory: any code change re-simulates
+    directory = directory or os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(directory, "*.py"))):
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()[:16]
+
+def cache_key(data, first_seed, games, policy_name, policy_kwargs, max_turns, code):
+    key = {
+        "rules": data,
+        "seeds": [first_seed, games],
+        "policy": [policy_name, policy_kwargs],
+        "max_turns": max_turns,
+        "code": code,
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()[:24]
+
+class ResultCache:
+    # One JSON file per configuration, named by its cache key. Writes go through a temporary
+    # file, so an interrupted sweep never leaves a torn entry and keeps finished ones.
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self.path(key), encoding="utf-8") as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, entry):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self.path(key)}.{os.getpid()}"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(entry, handle)
+        os.replace(temp_path, self.path(key))
+
+def play_config_chunk(task):
+    # Worker entry point: one seed shard of one configuration
+    index, chunk = task
+    return index, play_chunk(chunk)
+
+def summarize(result):
+    summary = result.summary()
+    for key in ("policy", "elapsed", "games_per_second"):
+        summary.pop(key)
+    return summary
+
+def run_sweep(configs, games=200, first_seed=0, policy_name="victory", policy_kwargs=None, max_turns=1000,
+              workers=None, chunk_size=50, cache=None, base=None, force=False):
+    # Plays `games` seeds under each configuration, the default rules first. Returns one row
+    # per configuration: {"params", "key", "cached", "summary"} or {"params", "error"}.
+    if games < 1:
+        raise SweepError(f"Games per configuration must be positive, not {games!r}")
+    policy_kwargs = policy_kwargs or {}
+    make_policy(policy_name, **policy_kwargs)  # Fail fast on bad policy arguments
+    cache = cache or ResultCache()
+    base = base or load_data()
+    code = code_version()
+    rows = []
+    pending = {}  # Row index -> compiled rules, for configurations not in the cache
+    for params in [()] + [tuple(params) for params in configs]:
+        row = {"params": params}
+        rows.append(row)
+        try:
+            data = apply_params(base, params)
+            rules = compile_rules(data)
+        except (SweepError, RulesError) as exc:
+            row["error"] = str(exc)
+            continue
+        row["key"] = cache_key(data, first_seed, games, policy_name, policy_kwargs, max_turns, code)
+        entry = None if force else cache.get(row["key"])
+        row["cached"] = entry is not None
+        if entry is not None:
+            row["summary"] = entry["summary"]
+        elif not any(rows[index]["key"] == row["key"] for index in pending):
+            pending[len(rows) - 1] = rules
+    tasks = [(index, chunk) for index, rules in pending.items()
+             for chunk in make_tasks(policy_name, policy_kwargs, games, first_seed, chunk_size, max_turns, rules)]
+    chunks = {index: {} for index in pending}
+    left = {index: 0 for index in pending}
+    for index, _ in tasks:
+        left[index] += 1
+
+    def finish(index):
+        row = rows[index]
+        result = TournamentResult(policy_name)
+        for first in sorted(chunks[index]):
+            result.merge(chunks[index][first])
+        row["summary"] = summarize(result)
+        cache.put(row["key"], {"params": row["params"], "games": games, "first_seed": first_seed,
+                               "policy": policy_name, "max_turns": max_turns, "code": code,
+                               "summary": row["summary"]})
+
+    def collect(index, records):
+        chunks[index][records[0]] = records
+        left[index] -= 1
+        if not left[index]:
+            finish(index)  # Written as soon as it is complete, so a stopped sweep keeps it
+
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            collect(*play_config_chunk(task))
+    elif tasks:
+        with multiprocessing.Pool(workers) as pool:
+            for index, records in pool.imap_unordered(play_config_chunk, tasks):
+                collect(index, records)
+    # Configurations that compiled to the rules of an earlier row share its results
+    for row in rows:
+        if "summary" not in row and "error" not in row:
+            twin = next((other for other in rows if other.get("key") == row["key"] and "summary" in other), None)
+            if twin is None:
+                row["error"] = "no results were played for these rules"
+            else:
+                row["summary"] = twin["summary"]
+    return rows, time.perf_counter() - start
+
+def report_table(rows, paths, title="Parameter sweep"):
+    # Rows may carry "cached" (sweeps) or "planned", the games queued so far (campaign.py)
+    from rich.table import Table
+    cached = any("cached" in row for row in rows)
+    table = Table(title=title, show_header=True, header_style="bold blue")
+    for path in paths:
+        table.add_column(path, style="cyan")
+    for column in ("Games", "Victory", "Failure", "Causes", "Turns mean", "Median", "Max") + (("Cached",) if cached else ()):
+        table.add_column(column, justify="left" if column == "Causes" else "right")
+    for row in rows:
+        params = dict(row["params"])
+        cells = [str(params.get(path, "base")) for path in paths]
+        if "error" in row:
+            table.add_row(*cells, "-", "-", "-", f"[red]{row['error']}[/red]", "-", "-", "-", "")
+            continue
+        summary = row["summary"]
+        games = summary["games"] or 1
+        victories = summary["outcomes"]["victory"]
+        causes = ", ".join(f"{outcome} {count / games:.1%}" for outcome, count in summary["failure_causes"].items())
+        ttv = summary["turns_to_victory"]
+        turns = [f"{ttv['mean']:.1f}", str(ttv["median"]), str(ttv["max"])] if ttv["mean"] is not None else ["-"] * 3
+        played = f"{summary['games']}/{row['planned']}" if "planned" in row else str(summary["games"])
+        table.add_row(*cells, played, f"{victories / games:.1%}", f"{1 - victories / games:.1%}",
+                      causes or "-", *turns, *(["yes" if row.get("cached") else ""] if cached else []))
+    return table
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many games under each setting of some rule parameters.")
+    parser.add_argument("--grid", action="append", default=[], metavar="PATH=V1,V2",
+                        help="Parameter and the values to try; several --grid options form a product")
+    parser.add_argument("--sample", action="append", default=[], metavar="PATH=LOW:HIGH",
+                        help="Parameter drawn uniformly from a range, once per sample")
+    parser.add_argument("--samples", type=int, default=10, help="Random draws per grid point when --sample is given")
+    parser.add_argument("--sample-seed", type=int, default=0)
+    parser.add_argument("--games", type=int, default=200, help="Games per configuration")
+    parser.add_argument("--seed", type=int, default=0, help="First seed; game k uses seed + k")
+    parser.add_argument("--policy", default="victory", choices=sorted(POLICIES))
+    parser.add_argument("--max-turns", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=50)
+    parser.add_argument("--rules", default=RULES_PATH, help="Rules file the parameters are applied to")
+    parser.add_argument("--cache", default=CACHE_DIR, help="Directory of memoized results")
+    parser.add_argument("--force", action="store_true", help="Re-simulate configurations that are cached")
+    parser.add_argument("--json", action="store_true", help="Print the rows as JSON instead of a table")
+    args = parser.parse_args()
+    try:
+        grid = [parse_grid(spec) for spec in args.grid]
+        ranges = [parse_range(spec) for spec in args.sample]
+    except SweepError as exc:
+        parser.error(str(exc))
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    configs = configurations(grid, ranges, args.samples, args.sample_seed)
+    rows, elapsed = run_sweep(configs, args.games, args.seed, args.policy, max_turns=args.max_turns,
+                              workers=args.workers, chunk_size=args.chunk_size, cache=ResultCache(args.cache),
+                              base=load_data(args.rules), force=args.force)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    from utils import console
+    paths = [path for path, _ in grid] + [path for path, _, _ in ranges]
+    console.print(report_table(rows, paths))
+    simulated = len({row["key"] for row in rows if "summary" in row and not row["cached"]})
+    console.print(f"{simulated} of {len(rows)} configurations simulated in {elapsed:.1f}s, {args.games} games each")
+
+if __name__ == "__main__":
+    main()
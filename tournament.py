@@ -0,0 +1,151 @@
+# tournament.py
+
+import argparse
+import os
+import time
+from array import array
+from collections import Counter
+
+from main import create_game
+from policies import POLICIES, make_policy
+from rules import get_rules
+
+OUTCOMES = ("victory", "depleted", "quit", "turn_limit")
+ACHIEVEMENTS = get_rules().achievement_names
+# Packed record per game: seed, outcome code, turns played, then one unlock turn per achievement (0 = locked)
+RECORD_WIDTH = 3 + len(ACHIEVEMENTS)
+
+def play_game(policy, seed, max_turns=1000, rules=None):
+    # Plays one headless game from the main.py initial state and packs the result
+    game = create_game(headless=True, seed=seed, rules=rules)
+    while not game.game_over and game.turn <= max_turns:
+        game.play_turn(policy.choose(game))
+    outcome = game.outcome or "turn_limit"
+    record = [seed, OUTCOMES.index(outcome), game.turn - 1]
+    unlock_turns = game.achievements.unlock_turns
+    record.extend(unlock_turns.get(name, 0) for name in ACHIEVEMENTS)
+    return record
+
+def play_chunk(task):
+    # Worker entry point: plays a contiguous seed shard and returns one flat int array
+    policy_name, policy_kwargs, first_seed, count, max_turns, rules = task
+    policy = make_policy(policy_name, **policy_kwargs)
+    records = array("q")
+    for seed in range(first_seed, first_seed + count):
+        records.extend(play_game(policy, seed, max_turns, rules))
+    return records
+
+class TournamentResult:
+    def __init__(self, policy_name):
+        self.policy_name = policy_name
+        self.records = array("q")
+        self.elapsed = 0.0
+
+    def merge(self, records):
+        self.records.extend(records)
+
+    @property
+    def games(self):
+        return len(self.records) // RECORD_WIDTH
+
+    def rows(self):
+        for offset in range(0, len(self.records), RECORD_WIDTH):
+            yield self.records[offset:offset + RECORD_WIDTH]
+
+    def outcome_counts(self):
+        counts = Counter(OUTCOMES[row[1]] for row in self.rows())
+        return {outcome: counts.get(outcome, 0) for outcome in OUTCOMES}
+
+    def turns_to_victory(self):
+        victory = OUTCOMES.index("victory")
+        return sorted(row[2] for row in self.rows() if row[1] == victory)
+
+    def failure_causes(self):
+        return {outcome: count for outcome, count in self.outcome_counts().items() if outcome != "victory" and count}
+
+    def achievement_unlock_turns(self):
+        # Mean unlock turn and unlock rate per achievement
+        stats = {}
+        games = self.games or 1
+        for idx, name in enumerate(ACHIEVEMENTS):
+            turns = [row[3 + idx] for row in self.rows() if row[3 + idx]]
+            stats[name] = {
+                "rate": len(turns) / games,
+                "mean_turn": sum(turns) / len(turns) if turns else None,
+            }
+        return stats
+
+    def summary(self):
+        turns = self.turns_to_victory()
+        return {
+            "policy": self.policy_name,
+            "games": self.games,
+            "elapsed": round(self.elapsed, 3),
+            "games_per_second": round(self.games / self.elapsed, 1) if self.elapsed else None,
+            "outcomes": self.outcome_counts(),
+            "turns_to_victory": {
+                "mean": sum(turns) / len(turns) if turns else None,
+                "median": turns[len(turns) // 2] if turns else None,
+                "min": turns[0] if turns else None,
+                "max": turns[-1] if turns else None,
+            },
+            "failure_causes": self.failure_causes(),
+            "achievements": self.achievement_unlock_turns(),
+        }
+
+def make_tasks(policy_name, policy_kwargs, games, first_seed, chunk_size, max_turns, rules=None):
+    # Deterministic seed shards: chunk k always covers the same seeds. Games use the default
+    # rules unless compiled rules are given.
+    for start in range(0, games, chunk_size):
+        count = min(chunk_size, games - start)
+        yield (policy_name, policy_kwargs, first_seed + start, count, max_turns, rules)
+
+def run_tournament(policy_name="victory", games=1000, first_seed=0, workers=None, chunk_size=250,
+                   max_turns=1000, policy_kwargs=None, rules=None):
+    policy_kwargs = policy_kwargs or {}
+    make_policy(policy_name, **policy_kwargs)  # Fail fast on bad policy arguments
+    workers = workers or os.cpu_count() or 1
+    result = TournamentResult(policy_name)
+    tasks = make_tasks(policy_name, policy_kwargs, games, first_seed, chunk_size, max_turns, rules)
+    start = time.perf_counter()
+    if workers == 1:
+        for task in tasks:
+            result.merge(play_chunk(task))
+    else:
+        import multiprocessing  # Only multi-worker runs pay for it
+        with multiprocessing.Pool(workers) as pool:
+            chunks = {}
+            for records in pool.imap_unordered(play_chunk, tasks):
+                chunks[records[0]] = records
+            # Merge in seed order so results do not depend on worker scheduling
+            for first in sorted(chunks):
+                result.merge(chunks[first])
+    result.elapsed = time.perf_counter() - start
+    return result
+
+def print_summary(summary):
+    print(f"Policy: {summary['policy']}  Games: {summary['games']}  "
+          f"Time: {summary['elapsed']}s ({summary['games_per_second']} games/s)")
+    print("Outcomes: " + ", ".join(f"{k}={v}" for k, v in summary["outcomes"].items()))
+    ttv = summary["turns_to_victory"]
+    if ttv["mean"] is not None:
+        print(f"Turns to victory: mean {ttv['mean']:.2f}, median {ttv['median']}, min {ttv['min']}, max {ttv['max']}")
+    print("Achievements (unlock rate, mean turn):")
+    for name, stats in summary["achievements"].items():
+        mean_turn = f"{stats['mean_turn']:.1f}" if stats["mean_turn"] is not None else "-"
+        print(f"  {name:<28} {stats['rate']:>7.2%}  {mean_turn}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many headless games across all cores.")
+    parser.add_argument("--policy", default="victory", choices=sorted(POLICIES))
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0, help="First seed; game k uses seed + k")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=250)
+    parser.add_argument("--max-turns", type=int, default=1000)
+    args = parser.parse_args()
+    result = run_tournament(args.policy, args.games, args.seed, args.workers, args.chunk_size, args.max_turns)
+    print_summary(result.summary())
+
+if __name__ == "__main__":
+    main()
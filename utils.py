@@ -1,4 +1,29 @@
 # utils.py
 
+class SharedConsole:
+    # Single rich Console shared by the interactive screens and the terminal output sink.
+    # It is created on first use, so headless games never import rich.
+    def __init__(self):
+        object.__setattr__(self, "_console", None)
+
+    def get(self):
+        if self._console is None:
+            from rich.console import Console
+            object.__setattr__(self, "_console", Console())
+        return self._console
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.get(), name, value)
+
+console = SharedConsole()
+
+def Table(*args, **kwargs):
+    # rich.table.Table, imported on first use for the same reason
+    from rich.table import Table as RichTable
+    return RichTable(*args, **kwargs)
+
 def print_separator(char='=', length=60):
-    print("\n" + char * length + "\n")
+    console.print("\n" + char * length + "\n", markup=False, highlight=False)